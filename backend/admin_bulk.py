@@ -0,0 +1,83 @@
+"""Bulk admin updates applied with a single bulk_write per request.
+
+Callers describe each operation as (document id, fields to $set), or reject
+it up front with a reason. One find() marks ids that do not exist, the rest
+go out in one ordered or unordered bulk_write, and every operation gets its
+own result:
+
+* ``updated``   - written
+* ``invalid``   - rejected before reaching the database
+* ``not_found`` - no document with that id
+* ``error``     - the write itself failed
+* ``skipped``   - not attempted because an earlier operation failed (ordered)
+"""
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+MAX_OPERATIONS = int(os.environ.get("ADMIN_BULK_MAX_OPERATIONS", "500"))
+
+# (document id, $set fields) or (document id, None, reason) for a rejected operation
+Operation = Tuple[Any, ...]
+
+
+def check_size(operations: List[Any]):
+    if not operations:
+        raise HTTPException(status_code=400, detail="No operations given")
+    if len(operations) > MAX_OPERATIONS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_OPERATIONS} operations per request")
+
+
+async def apply(collection, key_field: str, operations: List[Operation], ordered: bool) -> Dict[str, Any]:
+    results: List[Dict[str, Any]] = []
+    for index, operation in enumerate(operations):
+        result = {"index": index, "id": operation[0], "status": None}
+        if operation[1] is None:
+            result.update(status="invalid", detail=operation[2])
+        results.append(result)
+
+    ids = [result["id"] for result in results if result["status"] is None]
+    existing = {
+        document[key_field]
+        for document in await collection.find({key_field: {"$in": ids}}, {"_id": 0, key_field: 1}).to_list(None)
+    }
+
+    requests = []
+    request_results = []
+    for result, operation in zip(results, operations):
+        if result["status"] is None and result["id"] not in existing:
+            result["status"] = "not_found"
+        if result["status"] is not None:
+            if ordered:
+                break
+            continue
+        requests.append(UpdateOne({key_field: result["id"]}, {"$set": operation[1]}))
+        request_results.append(result)
+
+    failed_at: Optional[int] = None
+    if requests:
+        try:
+            await collection.bulk_write(requests, ordered=ordered)
+        except BulkWriteError as exc:
+            for error in exc.details.get("writeErrors", []):
+                request_results[error["index"]].update(status="error", detail=error.get("errmsg"))
+                failed_at = error["index"] if failed_at is None else min(failed_at, error["index"])
+        for position, result in enumerate(request_results):
+            if result["status"] is None:
+                result["status"] = "skipped" if ordered and failed_at is not None and position > failed_at else "updated"
+
+    for result in results:
+        if result["status"] is None:
+            result["status"] = "skipped"
+
+    summary: Dict[str, int] = {}
+    for result in results:
+        summary[result["status"]] = summary.get(result["status"], 0) + 1
+    return {"ordered": ordered, "summary": summary, "results": results}
+
+
+def updated_ids(outcome: Dict[str, Any]) -> List[Any]:
+    return [result["id"] for result in outcome["results"] if result["status"] == "updated"]
@@ -1,9 +1,18 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, EmailStr
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 import uuid
-from server import get_current_user, db
+from deps import ADMIN_ROLES, db, get_current_user
+import catalog_sync
+import compression
+import exports
+import user_directory
+import admin_bulk
+from serialization import json_response
+import query_debug
+import request_profiler
 
 # Admin routes
 admin_router = APIRouter(prefix="/api/admin")
@@ -60,39 +69,66 @@ class Vendor(BaseModel):
     status: str = "active"
     created_at: datetime = None
 
+# Bulk request bodies: ids are typed so malformed ids fail validation with a
+# 422, while the other fields are checked per operation and reported in its result
+class UserStatusOperation(BaseModel):
+    user_id: str
+    is_active: Any = True
+
+class ApplicationReviewOperation(BaseModel):
+    app_id: str
+    status: Optional[str] = None
+    comments: str = ""
+
+class CommissionOperation(BaseModel):
+    vendor_id: str
+    commission_rate: Any = 0
+
+class BulkOperations(BaseModel):
+    ordered: bool = True
+
+class BulkUserStatus(BulkOperations):
+    operations: List[UserStatusOperation]
+
+class BulkApplicationReview(BulkOperations):
+    operations: List[ApplicationReviewOperation]
+
+class BulkCommission(BulkOperations):
+    operations: List[CommissionOperation]
+
 # Admin Authentication Check
 async def verify_admin(current_user: dict = Depends(get_current_user)):
-    # In a real app, check if user has admin role
-    # For demo, we'll allow any authenticated user to access admin
+    if current_user.get("role") not in ADMIN_ROLES:
+        raise HTTPException(status_code=403, detail="Admin access required")
     return current_user
 
 # Users Management Routes
-@admin_router.get("/users", response_model=List[dict])
+@admin_router.get("/users")
 async def get_all_users(
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=100),
     search: Optional[str] = None,
+    role: Optional[str] = None,
+    status: Optional[str] = None,
+    cursor: Optional[str] = None,
     admin_user: dict = Depends(verify_admin)
 ):
-    """Get all users with pagination and search"""
-    skip = (page - 1) * limit
-    query = {}
-    
-    if search:
-        query["$or"] = [
-            {"name": {"$regex": search, "$options": "i"}},
-            {"email": {"$regex": search, "$options": "i"}}
-        ]
-    
-    users = await db.users.find(query).skip(skip).limit(limit).to_list(limit)
-    total = await db.users.count_documents(query)
+    """User directory with prefix search, role/status filters and keyset paging
     
-    return {
-        "users": users,
-        "total": total,
-        "page": page,
-        "pages": (total + limit - 1) // limit
-    }
+    Pass next_cursor from the previous response as cursor; page is kept for
+    older clients and falls back to skip().
+    """
+    result = await user_directory.page(
+        db,
+        limit,
+        cursor=cursor,
+        skip=0 if cursor else (page - 1) * limit,
+        search=search,
+        role=role,
+        status=status
+    )
+    result["page"] = page
+    return json_response(result)
 
 @admin_router.put("/users/{user_id}/status")
 async def update_user_status(
@@ -109,8 +145,30 @@ async def update_user_status(
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="User not found")
     
+    user_directory.invalidate_counts()
     return {"message": "User status updated successfully"}
 
+@admin_router.post("/users/bulk-status")
+async def bulk_update_user_status(
+    bulk: BulkUserStatus,
+    admin_user: dict = Depends(verify_admin)
+):
+    """Update active status for many users in one bulk write"""
+    admin_bulk.check_size(bulk.operations)
+    operations = []
+    for operation in bulk.operations:
+        if not operation.user_id:
+            operations.append((operation.user_id, None, "user_id is required"))
+        elif not isinstance(operation.is_active, bool):
+            operations.append((operation.user_id, None, "is_active must be a boolean"))
+        else:
+            operations.append((operation.user_id, {"is_active": operation.is_active}))
+
+    outcome = await admin_bulk.apply(db.users, "id", operations, bulk.ordered)
+    if admin_bulk.updated_ids(outcome):
+        user_directory.invalidate_counts()
+    return outcome
+
 @admin_router.get("/users/{user_id}/events")
 async def get_user_events(
     user_id: str,
@@ -196,6 +254,57 @@ async def review_business_application(
     
     return {"message": f"Application {status} successfully"}
 
+@admin_router.post("/businesses/applications/bulk-review")
+async def bulk_review_business_applications(
+    bulk: BulkApplicationReview,
+    admin_user: dict = Depends(verify_admin)
+):
+    """Approve or reject many business applications in one bulk write"""
+    admin_bulk.check_size(bulk.operations)
+    reviewed_at = datetime.utcnow()
+    operations = []
+    for operation in bulk.operations:
+        if not operation.app_id:
+            operations.append((operation.app_id, None, "app_id is required"))
+        elif operation.status not in ["approved", "rejected"]:
+            operations.append((operation.app_id, None, "Invalid status"))
+        else:
+            operations.append((operation.app_id, {
+                "status": operation.status,
+                "reviewed_at": reviewed_at,
+                "reviewer_id": admin_user["id"],
+                "review_comments": operation.comments
+            }))
+
+    outcome = await admin_bulk.apply(db.business_applications, "id", operations, bulk.ordered)
+
+    # Create business accounts for every approved application with one read and one insert
+    approved = {
+        result["id"] for result in outcome["results"]
+        if result["status"] == "updated" and operations[result["index"]][1]["status"] == "approved"
+    }
+    applications = []
+    if approved:
+        applications = await db.business_applications.find({"id": {"$in": list(approved)}}).to_list(None)
+        await db.businesses.insert_many([
+            {
+                "id": str(uuid.uuid4()),
+                "name": application["business_name"],
+                "owner_name": application["owner_name"],
+                "email": application["email"],
+                "mobile": application["mobile"],
+                "business_type": application["business_type"],
+                "address": application["address"],
+                "description": application["description"],
+                "status": "active",
+                "created_at": reviewed_at,
+                "application_id": application["id"]
+            }
+            for application in applications
+        ])
+    outcome["businesses_created"] = len(applications)
+    return outcome
+
 @admin_router.get("/businesses")
 async def get_businesses(
     status: Optional[str] = None,
@@ -336,8 +445,35 @@ async def set_vendor_commission(
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Vendor not found")
     
+    await catalog_sync.vendors_written(db, vendor_id)
     return {"message": "Vendor commission updated successfully"}
 
+@admin_router.post("/vendors/bulk-commission")
+async def bulk_set_vendor_commission(
+    bulk: BulkCommission,
+    admin_user: dict = Depends(verify_admin)
+):
+    """Set commission rates for many vendors in one bulk write"""
+    admin_bulk.check_size(bulk.operations)
+    updated_at = datetime.utcnow()
+    operations = []
+    for operation in bulk.operations:
+        rate = operation.commission_rate
+        if not operation.vendor_id:
+            operations.append((operation.vendor_id, None, "vendor_id is required"))
+        elif isinstance(rate, bool) or not isinstance(rate, (int, float)) or rate < 0:
+            operations.append((operation.vendor_id, None, "commission_rate must be a non-negative number"))
+        else:
+            operations.append((operation.vendor_id, {"commission_rate": rate, "updated_at": updated_at}))
+
+    outcome = await admin_bulk.apply(db.vendors, "id", operations, bulk.ordered)
+
+    # One sync pass for the listing and every touched vendor
+    vendor_ids = admin_bulk.updated_ids(outcome)
+    if vendor_ids:
+        await catalog_sync.vendors_written(db, *vendor_ids)
+    return outcome
+
 @admin_router.get("/vendors/{vendor_id}/leads")
 async def get_vendor_leads(
     vendor_id: str,
@@ -445,4 +581,93 @@ async def get_revenue_report(
             {"month": "2024-02", "revenue": 52000.0, "commission": 7800.0},
             {"month": "2024-03", "revenue": 48000.0, "commission": 7200.0}
         ]
-    }
\ No newline at end of file
+    }
+
+# Report exports stream large bodies; keep on-the-fly compression cheap
+compression.override("/api/admin/reports/export", gzip_level=1, brotli_quality=1)
+
+@admin_router.get("/reports/export/{report_type}")
+async def export_report(
+    report_type: str,
+    export_format: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+    gzip: bool = False,
+    start_date: Optional[str] = Query(None, alias="startDate"),
+    end_date: Optional[str] = Query(None, alias="endDate"),
+    admin_user: dict = Depends(verify_admin)
+):
+    """Stream a report as CSV or NDJSON, optionally as a .gz download"""
+    if report_type != "overview" and report_type not in exports.REPORTS:
+        raise HTTPException(status_code=404, detail=f"Unknown report type: {report_type}")
+    
+    try:
+        start = datetime.fromisoformat(start_date.replace('Z', '+00:00')) if start_date else None
+        end = datetime.fromisoformat(end_date.replace('Z', '+00:00')) if end_date else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date range")
+    
+    media_type, extension = exports.FORMATS[export_format]
+    rows = exports.report_rows(db, report_type, start, end)
+    chunks = exports.encode(rows, exports.report_fields(report_type), export_format)
+    filename = f"{report_type}_report_{datetime.utcnow().strftime('%Y%m%d')}.{extension}"
+    if gzip:
+        chunks = exports.gzip_frames(chunks)
+        media_type = "application/gzip"
+        filename += ".gz"
+    
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+# Query Debugging Routes (MONGO_DEBUG_REQUESTS=1)
+@admin_router.get("/debug/requests")
+async def get_debug_requests(
+    limit: int = Query(50, ge=1, le=200),
+    admin_user: dict = Depends(verify_admin)
+):
+    """List recent per-request Mongo query reports"""
+    if not query_debug.ENABLED:
+        raise HTTPException(status_code=404, detail="Query debugging is disabled")
+    return query_debug.list_reports(limit)
+
+@admin_router.get("/debug/requests/{request_id}")
+async def get_debug_request(
+    request_id: str,
+    admin_user: dict = Depends(verify_admin)
+):
+    """Get the Mongo query report for a single request"""
+    report = query_debug.get_report(request_id)
+    if not report:
+        raise HTTPException(status_code=404, detail="Request report not found")
+    return report
+
+# Request Profiling Routes
+@admin_router.post("/debug/profile-token")
+async def create_profile_token(
+    admin_user: dict = Depends(verify_admin)
+):
+    """Issue a short-lived token that enables stack sampling for requests sending it"""
+    return request_profiler.create_profile_token(admin_user)
+
+@admin_router.get("/debug/profiles")
+async def get_profiles(
+    admin_user: dict = Depends(verify_admin)
+):
+    """List stored request profiles"""
+    return request_profiler.list_profiles()
+
+@admin_router.get("/debug/profiles/{profile_id}")
+async def download_profile(
+    profile_id: str,
+    admin_user: dict = Depends(verify_admin)
+):
+    """Download a request profile as collapsed stacks for flamegraph tools"""
+    profile = request_profiler.get_profile(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    
+    return PlainTextResponse(
+        profile["collapsed"],
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.folded"'}
+    )
@@ -0,0 +1,126 @@
+"""POST /api/batch: run several API calls inside one HTTP request.
+
+Sub-requests are dispatched concurrently straight to the application router
+with the batch's authenticated user stored in the ASGI scope, so
+``get_current_user`` resolves them without decoding the token or looking the
+user up again. Each sub-request gets its own status code and body; one
+failing call does not fail the batch.
+"""
+import asyncio
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+from starlette.exceptions import HTTPException as StarletteHTTPException
+
+MAX_REQUESTS = int(os.environ.get("BATCH_MAX_REQUESTS", "20"))
+ALLOWED_METHODS = {"GET", "POST", "PUT", "DELETE"}
+USER_SCOPE_KEY = "urevent.batch_user"
+
+# Scope entries a sub-request inherits from the batch request
+INHERITED_SCOPE_KEYS = (
+    "type", "asgi", "http_version", "scheme", "server", "client", "root_path",
+    "app", "state", "starlette.exception_handlers"
+)
+FORWARDED_HEADERS = {b"authorization", b"accept", b"accept-language", b"user-agent"}
+
+logger = logging.getLogger("urevent.batch")
+
+
+class BatchItem(BaseModel):
+    id: Optional[str] = None
+    method: str = "GET"
+    path: str
+    body: Optional[Any] = None
+
+
+class BatchRequest(BaseModel):
+    requests: List[BatchItem]
+
+
+def validate(batch: BatchRequest):
+    if not batch.requests:
+        raise HTTPException(status_code=400, detail="Batch must contain at least one request")
+    if len(batch.requests) > MAX_REQUESTS:
+        raise HTTPException(status_code=413, detail=f"Batch is limited to {MAX_REQUESTS} requests")
+    for item in batch.requests:
+        if item.method.upper() not in ALLOWED_METHODS:
+            raise HTTPException(status_code=400, detail=f"Unsupported method in batch: {item.method}")
+        if not item.path.startswith("/api/") or item.path.split("?")[0].rstrip("/") == "/api/batch":
+            raise HTTPException(status_code=400, detail=f"Invalid path in batch: {item.path}")
+
+
+def _decode(body: bytes, content_type: str) -> Any:
+    if not body:
+        return None
+    if content_type.startswith("application/json"):
+        return json.loads(body)
+    return body.decode("utf-8", errors="replace")
+
+
+async def _dispatch(router, parent_scope: dict, item: BatchItem, user: dict) -> Dict[str, Any]:
+    path, _, query = item.path.partition("?")
+    body = b"" if item.body is None else json.dumps(item.body, default=str).encode()
+    headers = [(name, value) for name, value in parent_scope["headers"] if name in FORWARDED_HEADERS]
+    if body:
+        headers.append((b"content-type", b"application/json"))
+        headers.append((b"content-length", str(len(body)).encode()))
+
+    scope = {key: parent_scope[key] for key in INHERITED_SCOPE_KEYS if key in parent_scope}
+    scope.update({
+        "method": item.method.upper(),
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "headers": headers,
+        USER_SCOPE_KEY: user,
+    })
+
+    request_sent = False
+    never = asyncio.Event()
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # Only streaming responses listen past the body; they are cancelled when done
+        await never.wait()
+
+    status = 500
+    content_type = ""
+    chunks = []
+
+    async def send(message):
+        nonlocal status, content_type
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            for name, value in message.get("headers", []):
+                if name.lower() == b"content-type":
+                    content_type = value.decode("latin-1")
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    try:
+        await router(scope, receive, send)
+        result = _decode(b"".join(chunks), content_type)
+    except StarletteHTTPException as exc:
+        # Routing errors (404/405) are raised outside the route's exception handling
+        status = exc.status_code
+        result = {"detail": exc.detail}
+    except Exception:
+        logger.exception("Batch sub-request %s %s failed", item.method, item.path)
+        status = 500
+        result = {"detail": "Internal server error"}
+
+    return {"id": item.id, "status": status, "body": result}
+
+
+async def run(router, parent_scope: dict, batch: BatchRequest, user: dict) -> List[Dict[str, Any]]:
+    """Dispatch every sub-request concurrently; results keep request order."""
+    return await asyncio.gather(*(
+        _dispatch(router, parent_scope, item, dict(user)) for item in batch.requests
+    ))
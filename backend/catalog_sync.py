@@ -0,0 +1,34 @@
+"""Keeps the catalog caches and in-memory search indexes in step with writes.
+
+Vendor and venue write paths call ``vendors_written`` / ``venues_written``
+with the ids they touched instead of poking each cache and index in turn.
+Writes that only move a vendor's rating, review count or favorite count
+(reviews, favorites) call ``vendor_stats_written``, which leaves the text
+index, facet counts and shared listings alone and only reweighs the vendor.
+"""
+import search_facets
+import suggest
+import text_search
+import vendor_ranking
+from response_cache import catalog_cache
+
+
+async def vendors_written(db, *vendor_ids: str):
+    catalog_cache.invalidate("vendors", *(f"vendor:{vendor_id}" for vendor_id in vendor_ids))
+    vendor_ranking.ranker.mark_written(*vendor_ids)
+    search_facets.invalidate("vendors")
+    await text_search.vendor_index.refresh(db, *vendor_ids)
+    await suggest.index.refresh(db, "vendors", *vendor_ids)
+
+
+async def vendor_stats_written(db, *vendor_ids: str):
+    catalog_cache.invalidate(*(f"vendor:{vendor_id}" for vendor_id in vendor_ids))
+    vendor_ranking.ranker.mark_written(*vendor_ids)
+    await suggest.index.reweigh(db, *vendor_ids)
+
+
+async def venues_written(db, *venue_ids: str):
+    catalog_cache.invalidate("venues", *(f"venue:{venue_id}" for venue_id in venue_ids))
+    search_facets.invalidate("venues")
+    await text_search.venue_index.refresh(db, *venue_ids)
+    await suggest.index.refresh(db, "venues", *venue_ids)
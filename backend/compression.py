@@ -0,0 +1,189 @@
+"""gzip/brotli response compression for large JSON and text bodies.
+
+Pure ASGI middleware: the encoding is negotiated from Accept-Encoding
+(brotli when the optional ``brotli`` package is installed and the client
+accepts it, otherwise gzip). Responses that arrive in one body message are
+compressed only above a size threshold; streamed responses are compressed
+chunk by chunk without buffering. Responses that already carry a
+Content-Encoding, have a non-text content type, or have no body (204/304) are
+passed through untouched.
+
+Settings can be overridden per path prefix with ``override()``, e.g. to turn
+compression off for an endpoint that encodes its own output.
+"""
+import gzip
+import os
+import zlib
+from typing import Dict, Optional
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.environ.get("COMPRESSION_GZIP_LEVEL", "5"))
+BROTLI_QUALITY = int(os.environ.get("COMPRESSION_BROTLI_QUALITY", "4"))
+
+COMPRESSIBLE_TYPES = (
+    "application/json", "application/x-ndjson", "application/javascript",
+    "application/xml", "image/svg+xml", "text/"
+)
+
+
+class Settings:
+    __slots__ = ("enabled", "min_size", "gzip_level", "brotli_quality")
+
+    def __init__(self, enabled=True, min_size=MIN_SIZE, gzip_level=GZIP_LEVEL, brotli_quality=BROTLI_QUALITY):
+        self.enabled = enabled
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+
+DEFAULT_SETTINGS = Settings()
+_overrides: Dict[str, Settings] = {}
+
+
+def override(path_prefix: str, **settings):
+    """Replace compression settings for every path starting with path_prefix."""
+    base = {name: getattr(DEFAULT_SETTINGS, name) for name in Settings.__slots__}
+    _overrides[path_prefix] = Settings(**{**base, **settings})
+
+
+def settings_for(path: str) -> Settings:
+    matches = [prefix for prefix in _overrides if path.startswith(prefix)]
+    return _overrides[max(matches, key=len)] if matches else DEFAULT_SETTINGS
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    def __init__(self, encoding: str, settings: Settings):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=settings.brotli_quality)
+            self._zlib = None
+        else:
+            self._brotli = None
+            self._zlib = zlib.compressobj(settings.gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        # Intermediate chunks are flushed so streamed output reaches the client promptly
+        if self._brotli is not None:
+            output = self._brotli.process(data)
+            return output + (self._brotli.finish() if final else self._brotli.flush())
+        output = self._zlib.compress(data)
+        return output + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+def compress(data: bytes, encoding: str, settings: Settings = DEFAULT_SETTINGS) -> bytes:
+    """One-shot compression, also used by the benchmark suite."""
+    if encoding == "br":
+        return brotli.compress(data, quality=settings.brotli_quality)
+    return gzip.compress(data, compresslevel=settings.gzip_level, mtime=0)
+
+
+class CompressionMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        settings = settings_for(scope["path"])
+        accept_encoding = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+        encoding = choose_encoding(accept_encoding) if settings.enabled else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                if not _compressible(start_message) or (not more_body and len(body) < settings.min_size):
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                compressor = _Compressor(encoding, settings)
+                data = compressor.compress(body, not more_body)
+                headers = _compressed_headers(start_message["headers"], encoding)
+                if not more_body:
+                    headers.append((b"content-length", str(len(data)).encode("latin-1")))
+                await send(dict(start_message, headers=headers))
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+                return
+
+            await send({"type": "http.response.body", "body": compressor.compress(body, not more_body), "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def _compressible(start_message) -> bool:
+    if start_message["status"] in (204, 304) or start_message["status"] < 200:
+        return False
+    content_type = ""
+    for name, value in start_message.get("headers", []):
+        name = name.lower()
+        if name == b"content-encoding":
+            return False
+        if name == b"content-type":
+            content_type = value.decode("latin-1").lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def _compressed_headers(headers, encoding: str):
+    result = []
+    vary = None
+    for name, value in headers:
+        lowered = name.lower()
+        if lowered == b"content-length":
+            continue
+        if lowered == b"etag" and not value.startswith(b"W/"):
+            # The compressed body is a different representation of the same resource
+            value = b"W/" + value
+        if lowered == b"vary":
+            vary = value
+            continue
+        result.append((name, value))
+    result.append((b"content-encoding", encoding.encode("latin-1")))
+    vary_values = [v.strip() for v in vary.split(b",")] if vary else []
+    if b"accept-encoding" not in [v.lower() for v in vary_values]:
+        vary_values.append(b"Accept-Encoding")
+    result.append((b"vary", b", ".join(vary_values)))
+    return result
@@ -0,0 +1,90 @@
+"""Settings, the database handle and the auth dependencies shared by route modules.
+
+server.py and the routers it mounts (admin_routes, vendor_subscription_routes)
+all import these from here rather than from each other, so importing a router
+never re-enters server.py and ``python server.py`` starts cleanly.
+"""
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+
+import bcrypt
+import jwt
+from fastapi import Depends, HTTPException, Request
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from motor.motor_asyncio import AsyncIOMotorClient
+
+import batch
+import request_profiler
+from instrumentation import MongoCommandListener
+
+# Environment variables
+DATABASE_URL = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
+DATABASE_NAME = os.environ.get("DATABASE_NAME", "urevent_db")
+SECRET_KEY = os.environ.get("SECRET_KEY", "your-secret-key-here")
+JWT_ALGORITHM = "HS256"
+JWT_EXPIRE_HOURS = 24
+
+# Roles allowed through admin-only routes
+ADMIN_ROLES = ("admin", "super_admin")
+
+# Security
+security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
+
+# Database connection
+client = AsyncIOMotorClient(DATABASE_URL, event_listeners=[MongoCommandListener()])
+db = client[DATABASE_NAME]
+
+
+# Authentication functions
+def hash_password(password: str) -> str:
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+
+def verify_password(password: str, password_hash: str) -> bool:
+    return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+
+def create_jwt_token(user_data: dict) -> str:
+    payload = {
+        "sub": user_data["email"],
+        "user_id": user_data["id"],
+        "role": user_data.get("role", "client"),
+        "exp": datetime.utcnow() + timedelta(hours=JWT_EXPIRE_HOURS)
+    }
+    return jwt.encode(payload, SECRET_KEY, algorithm=JWT_ALGORITHM)
+
+def decode_jwt_token(token: str) -> dict:
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[JWT_ALGORITHM])
+        return payload
+    except jwt.PyJWTError:
+        raise HTTPException(status_code=401, detail="Could not validate credentials")
+
+async def get_current_user(request: Request, credentials: HTTPAuthorizationCredentials = Depends(security)):
+    # Sub-requests of /api/batch reuse the user the batch authenticated
+    batch_user = request.scope.get(batch.USER_SCOPE_KEY)
+    if batch_user is not None:
+        return batch_user
+    
+    token = credentials.credentials
+    payload = decode_jwt_token(token)
+    # Profiling tokens only switch on the request profiler; they are not sessions
+    if payload.get("scope") == request_profiler.TOKEN_SCOPE or "sub" not in payload:
+        raise HTTPException(status_code=401, detail="Could not validate credentials")
+    
+    user = await db.users.find_one({"email": payload["sub"]})
+    if user is None:
+        raise HTTPException(status_code=401, detail="Could not validate credentials")
+    
+    # Convert ObjectId to string for JSON serialization
+    user["_id"] = str(user["_id"])
+    return user
+
+async def get_optional_user(request: Request, credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)):
+    """The signed-in user on public routes, or None for anonymous requests"""
+    if credentials is None and request.scope.get(batch.USER_SCOPE_KEY) is None:
+        return None
+    try:
+        return await get_current_user(request, credentials)
+    except HTTPException:
+        return None
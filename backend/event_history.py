@@ -0,0 +1,192 @@
+"""Materialized event history: one summary document per completed event.
+
+Showing a past event means joining it with its vendor bookings, payments and
+reviews. That join runs once, when the event moves to ``completed`` (and again
+when a review or payment lands on it later), and the result is written to
+``event_history``. The history page is then a single indexed read of the
+user's summaries, ordered by (date, id) descending and continued with a
+keyset cursor.
+
+Events completed before summaries existed are filled in by the backfill job,
+which builds summaries a chunk of events at a time with one query per
+collection per chunk:
+    python event_history.py --backfill
+"""
+import argparse
+import asyncio
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import pymongo
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReplaceOne
+
+from deps import DATABASE_NAME
+from user_directory import decode_cursor, encode_cursor
+
+load_dotenv()
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+BACKFILL_CHUNK = 500
+
+PROJECTION = {"_id": 0, "user_id": 0}
+
+
+async def ensure_indexes(db):
+    await db.event_history.create_index("id", unique=True)
+    await db.event_history.create_index(
+        [("user_id", pymongo.ASCENDING), ("date", pymongo.DESCENDING), ("id", pymongo.DESCENDING)]
+    )
+
+
+def _label(value: Optional[str]) -> Optional[str]:
+    return value.replace("_", " ").title() if isinstance(value, str) else value
+
+
+def summarize(event: dict, bookings: List[dict], payments: List[dict], reviews: List[dict]) -> Dict[str, Any]:
+    """The history document for one event from its bookings, payments and reviews"""
+    review_of = {review["vendor_id"]: review for review in reviews}
+    vendors = []
+    for booking in bookings:
+        if booking.get("status") == "cancelled":
+            continue
+        review = review_of.get(booking["vendor_id"], {})
+        vendors.append({
+            "id": booking["vendor_id"],
+            "name": booking.get("vendor_name"),
+            "service": booking.get("service_type"),
+            "cost": booking.get("cost") or 0.0,
+            "rating": review.get("rating"),
+            "review": review.get("comment"),
+        })
+    total_spent = sum(vendor["cost"] for vendor in vendors)
+    budget = event.get("budget")
+    return {
+        "id": event["id"],
+        "user_id": event["user_id"],
+        "name": event.get("name"),
+        "type": _label(event.get("event_type")),
+        "sub_type": _label(event.get("sub_event_type")),
+        "date": event["date"],
+        "status": event.get("status"),
+        "venue": {
+            "name": event.get("venue_name"),
+            "location": event.get("venue_address") or event.get("location"),
+        },
+        "guests": event.get("guest_count"),
+        "budget": budget,
+        "total_spent": total_spent,
+        "total_paid": sum(payment.get("amount") or 0.0 for payment in payments if payment.get("status") == "completed"),
+        "budget_remaining": budget - total_spent if isinstance(budget, (int, float)) else None,
+        "vendors": vendors,
+        "cultural_style": _label(event.get("cultural_style")),
+        "summary": event.get("description"),
+        "created_date": event.get("created_at"),
+        "image_url": event.get("image_url"),
+        "summarized_at": datetime.utcnow(),
+    }
+
+
+async def summaries(db, events: List[dict]) -> List[Dict[str, Any]]:
+    """Summaries for several events, reading each related collection once"""
+    event_ids = [event["id"] for event in events]
+    by_event = {"bookings": {}, "payments": {}, "reviews": {}}
+    bookings, payments, reviews = await asyncio.gather(
+        db.vendor_bookings.find(
+            {"event_id": {"$in": event_ids}},
+            {"_id": 0, "event_id": 1, "vendor_id": 1, "vendor_name": 1, "service_type": 1, "cost": 1, "status": 1}
+        ).to_list(None),
+        db.payments.find({"event_id": {"$in": event_ids}}, {"_id": 0, "event_id": 1, "amount": 1, "status": 1}).to_list(None),
+        db.reviews.find({"event_id": {"$in": event_ids}}, {"_id": 0, "event_id": 1, "user_id": 1, "vendor_id": 1, "rating": 1, "comment": 1}).to_list(None),
+    )
+    for name, documents in (("bookings", bookings), ("payments", payments), ("reviews", reviews)):
+        for document in documents:
+            by_event[name].setdefault(document["event_id"], []).append(document)
+    return [
+        summarize(
+            event,
+            by_event["bookings"].get(event["id"], []),
+            by_event["payments"].get(event["id"], []),
+            # Only the event owner's own reviews describe their event
+            [review for review in by_event["reviews"].get(event["id"], []) if review.get("user_id") == event["user_id"]],
+        )
+        for event in events
+    ]
+
+
+async def write(db, events: List[dict]):
+    if not events:
+        return
+    documents = await summaries(db, events)
+    await db.event_history.bulk_write(
+        [ReplaceOne({"id": document["id"]}, document, upsert=True) for document in documents], ordered=False
+    )
+
+
+async def refresh(db, event_id: str):
+    """Rewrite an event's summary if it is completed, drop it otherwise"""
+    event = await db.events.find_one({"id": event_id}, {"_id": 0})
+    if event and event.get("status") == "completed":
+        await write(db, [event])
+    else:
+        await db.event_history.delete_one({"id": event_id})
+
+
+async def page(db, user_id: str, limit: int, cursor: Optional[str] = None) -> Dict[str, Any]:
+    query: Dict[str, Any] = {"user_id": user_id}
+    if cursor:
+        date, event_id = decode_cursor(cursor)
+        query["$or"] = [
+            {"date": {"$lt": date}},
+            {"date": date, "id": {"$lt": event_id}},
+        ]
+    ordered = db.event_history.find(query, PROJECTION).sort([("date", pymongo.DESCENDING), ("id", pymongo.DESCENDING)])
+    # One extra row tells whether another page exists
+    events: List[dict] = await ordered.limit(limit + 1).to_list(limit + 1)
+    has_more = len(events) > limit
+    events = events[:limit]
+    return {"events": events, "next_cursor": encode_cursor(events[-1], "date") if has_more else None}
+
+
+async def backfill(db, rebuild: bool = False) -> int:
+    """Write summaries for completed events that have none (every completed event with rebuild)"""
+    summarized = set() if rebuild else set(await db.event_history.distinct("id"))
+    written = 0
+    chunk: List[dict] = []
+    async for event in db.events.find({"status": "completed"}, {"_id": 0}):
+        if event["id"] in summarized:
+            continue
+        chunk.append(event)
+        if len(chunk) == BACKFILL_CHUNK:
+            await write(db, chunk)
+            written += len(chunk)
+            chunk = []
+    await write(db, chunk)
+    return written + len(chunk)
+
+
+async def _backfill_database(mongo_url: str, db_name: str, rebuild: bool) -> int:
+    db = AsyncIOMotorClient(mongo_url)[db_name]
+    await ensure_indexes(db)
+    return await backfill(db, rebuild)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Event history summaries")
+    parser.add_argument("--backfill", action="store_true", help="Summarize completed events that have no summary yet")
+    parser.add_argument("--rebuild", action="store_true", help="With --backfill, rewrite every summary")
+    parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db-name", default=DATABASE_NAME)
+    args = parser.parse_args()
+    if not args.backfill:
+        parser.error("nothing to do; pass --backfill")
+
+    written = asyncio.run(_backfill_database(args.mongo_url, args.db_name, args.rebuild))
+    print(f"✅ Wrote {written:,} event summaries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Streaming admin report exports (NDJSON or CSV, optionally gzip-framed).
+
+Rows are read from a Motor cursor in batches of EXPORT_BATCH_SIZE and
+written into a small buffer that is handed to the response whenever it
+reaches EXPORT_CHUNK_BYTES, so memory stays flat regardless of row count.
+Each chunk is awaited by the ASGI server before the next batch is read, which
+gives backpressure against slow clients for free.
+"""
+import csv
+import io
+import os
+import zlib
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from serialization import dumps
+
+BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", "1000"))
+CHUNK_BYTES = int(os.environ.get("EXPORT_CHUNK_BYTES", str(64 * 1024)))
+
+FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+}
+
+
+class Report:
+    __slots__ = ("collection", "fields", "date_field")
+
+    def __init__(self, collection: str, fields: List[str], date_field: str = "created_at"):
+        self.collection = collection
+        self.fields = fields
+        self.date_field = date_field
+
+
+REPORTS = {
+    "users": Report("users", ["id", "name", "email", "mobile", "role", "is_active", "created_at"]),
+    "vendors": Report("vendors", [
+        "id", "name", "service_type", "location", "price_range", "rating", "base_price",
+        "subscription_plan", "status", "commission_rate", "created_at"
+    ]),
+    "businesses": Report("businesses", [
+        "id", "name", "owner_name", "email", "mobile", "business_type", "status", "created_at"
+    ]),
+    "associates": Report("associates", [
+        "id", "name", "email", "mobile", "business_id", "role", "commission_rate", "status", "created_at"
+    ]),
+    "events": Report("events", [
+        "id", "user_id", "name", "event_type", "date", "location", "guest_count", "budget", "status", "created_at"
+    ]),
+    "revenue": Report("payments", [
+        "id", "booking_id", "vendor_id", "event_id", "amount", "payment_type", "payment_method",
+        "payment_date", "status"
+    ], date_field="payment_date"),
+}
+
+# Collections summarised by the overview report (one row per collection)
+OVERVIEW_COLLECTIONS = ("users", "events", "vendors", "venues", "businesses", "associates", "vendor_bookings", "payments")
+
+
+def date_query(report: Report, start: Optional[datetime], end: Optional[datetime]) -> Dict[str, Any]:
+    if not start and not end:
+        return {}
+    bounds = {}
+    if start:
+        bounds["$gte"] = start
+    if end:
+        bounds["$lte"] = end
+    return {report.date_field: bounds}
+
+
+async def report_rows(db, report_type: str, start: Optional[datetime], end: Optional[datetime]) -> AsyncIterator[Dict[str, Any]]:
+    if report_type == "overview":
+        for name in OVERVIEW_COLLECTIONS:
+            yield {"collection": name, "documents": await db[name].estimated_document_count()}
+        return
+
+    report = REPORTS[report_type]
+    projection = {"_id": 0, **{field: 1 for field in report.fields}}
+    cursor = db[report.collection].find(date_query(report, start, end), projection).batch_size(BATCH_SIZE)
+    async for document in cursor:
+        yield document
+
+
+def report_fields(report_type: str) -> List[str]:
+    if report_type == "overview":
+        return ["collection", "documents"]
+    return REPORTS[report_type].fields
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return dumps(value).decode()
+    return value
+
+
+async def encode(rows: AsyncIterator[Dict[str, Any]], fields: List[str], output_format: str) -> AsyncIterator[bytes]:
+    """Encode rows as NDJSON or CSV, yielding chunks of roughly CHUNK_BYTES."""
+    if output_format == "ndjson":
+        buffer = bytearray()
+        async for row in rows:
+            buffer += dumps(row)
+            buffer += b"\n"
+            if len(buffer) >= CHUNK_BYTES:
+                yield bytes(buffer)
+                buffer.clear()
+        if buffer:
+            yield bytes(buffer)
+        return
+
+    text = io.StringIO()
+    writer = csv.writer(text)
+    writer.writerow(fields)
+    async for row in rows:
+        writer.writerow([_csv_value(row.get(field)) for field in fields])
+        if text.tell() >= CHUNK_BYTES:
+            yield text.getvalue().encode("utf-8")
+            text.seek(0)
+            text.truncate()
+    if text.tell():
+        yield text.getvalue().encode("utf-8")
+
+
+async def gzip_frames(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Wrap a chunk stream in a single gzip member, flushing once per chunk."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
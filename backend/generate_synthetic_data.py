@@ -0,0 +1,496 @@
+"""Deterministic large-scale synthetic data generator.
+
+Produces production-shaped datasets (users, venues, vendors, events, vendor
+bookings, payments, messages, vendor availability, vendor subscriptions and
+favorites) with skewed distributions by city, service type and cultural style,
+and loads them with parallel unordered insert_many batches.
+
+Every document is a pure function of (seed, collection, ordinal): ids come
+from a splitmix64 hash of the ordinal and each batch draws from its own
+seeded RNG, so the same seed always yields the same dataset regardless of
+worker count or scheduling, and cross-collection references (event owner,
+booking vendor, ...) can be computed without lookups. Favorites are the one
+collection generated per user ordinal rather than per document, so each user's
+vendors can be drawn without replacement and never repeat a (user, vendor)
+pair under the unique index.
+
+Usage:
+    python generate_synthetic_data.py --users 1000000 --vendors 50000 --workers 8 --drop
+"""
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import accumulate
+
+import pymongo
+from dotenv import load_dotenv
+
+from deps import DATABASE_NAME
+
+load_dotenv()
+
+MASK64 = (1 << 64) - 1
+EPOCH = datetime(2026, 1, 1)
+DEFAULT_PASSWORD = "password123"
+# bcrypt of DEFAULT_PASSWORD, fixed so the same seed writes byte-identical users
+PASSWORD_HASH = "$2b$12$1/ohWGc2vSH0W9drLYfssuJN8/oS24zzLrRr2CuDJcYySo9WojS3u"
+MAX_FAVORITES_PER_USER = 100
+
+# (city, state, zip) ordered by popularity; weights follow a Zipf curve
+CITIES = [
+    ("New York", "NY", "10001"), ("Los Angeles", "CA", "90210"), ("Chicago", "IL", "60601"),
+    ("Houston", "TX", "77001"), ("Miami", "FL", "33101"), ("Atlanta", "GA", "30301"),
+    ("Dallas", "TX", "75201"), ("San Francisco", "CA", "94102"), ("Seattle", "WA", "98101"),
+    ("Boston", "MA", "02108"), ("Phoenix", "AZ", "85001"), ("Denver", "CO", "80201"),
+    ("Philadelphia", "PA", "19102"), ("Las Vegas", "NV", "89101"), ("Austin", "TX", "73301"),
+    ("San Diego", "CA", "92101"), ("Nashville", "TN", "37201"), ("Orlando", "FL", "32801"),
+    ("Charlotte", "NC", "28202"), ("Portland", "OR", "97201"),
+]
+SERVICE_TYPES = [
+    "Catering", "Photography", "Decoration", "Music/DJ", "Videography", "Bar Service",
+    "Event Planner", "Lighting", "Entertainment", "Transportation", "Waitstaff", "Security",
+]
+CULTURAL_STYLES = ["american", "hispanic", "indian", "african", "asian", "middle_eastern", "jewish"]
+EVENT_TYPES = ["wedding", "birthday", "corporate", "quinceanera", "sweet_16", "anniversary", "baby_shower"]
+VENUE_TYPES = ["Hotel", "Banquet Hall", "Restaurant", "Garden", "Beach", "Barn", "Rooftop", "Conference Center"]
+AMENITIES = ["Parking", "WiFi", "Catering Kitchen", "AV Equipment", "Bridal Suite", "Dance Floor", "Valet Service", "Outdoor Space"]
+SPECIALTIES = {
+    "Catering": ["Buffet", "Plated Dinner", "Vegan Menu", "Halal", "Kosher", "Food Trucks"],
+    "Photography": ["Candid", "Drone", "Portrait", "Photo Booth", "Same-day Edits"],
+    "Decoration": ["Floral Design", "Mandap", "Centerpieces", "Lighting Design", "Balloon Art"],
+    "Music/DJ": ["Bollywood", "Latin", "Hip Hop", "Live Band", "MC Services"],
+}
+FIRST_NAMES = ["Sarah", "Maria", "Priya", "James", "Aisha", "Wei", "Carlos", "Emily", "David", "Fatima", "Noah", "Olivia"]
+LAST_NAMES = ["Johnson", "Garcia", "Patel", "Smith", "Okafor", "Chen", "Rodriguez", "Brown", "Cohen", "Khan", "Nguyen", "Lee"]
+PRICE_RANGES = ["$", "$$", "$$$", "$$$$"]
+SUBSCRIPTION_PLANS = {"basic": 99.0, "premium": 199.0, "enterprise": 399.0}
+PLAN_WEIGHTS = list(accumulate([70, 25, 5]))
+ACTIVE_SUBSCRIPTION_PERCENT = 90
+
+
+def zipf_weights(count, exponent=1.1):
+    return list(accumulate(1 / (rank ** exponent) for rank in range(1, count + 1)))
+
+
+CITY_WEIGHTS = zipf_weights(len(CITIES))
+SERVICE_WEIGHTS = zipf_weights(len(SERVICE_TYPES), 0.8)
+CULTURE_WEIGHTS = zipf_weights(len(CULTURAL_STYLES), 0.9)
+
+
+def splitmix64(value):
+    value = (value + 0x9E3779B97F4A7C15) & MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK64
+    return value ^ (value >> 31)
+
+
+KIND_SALT = {name: index * 7919 for index, name in enumerate(
+    ["user", "venue", "vendor", "event", "booking", "payment", "message", "availability", "favorite", "owner", "date",
+     "subscription", "plan"]
+)}
+
+
+@lru_cache(maxsize=None)
+def kind_key(seed, kind):
+    return splitmix64(seed * 1_000_003 + KIND_SALT[kind])
+
+
+def mix(seed, kind, ordinal):
+    """Stable 64-bit hash of (seed, kind, ordinal)"""
+    return splitmix64(kind_key(seed, kind) ^ ordinal)
+
+
+def make_id(seed, kind, ordinal):
+    """UUID-formatted id derived from the ordinal, so references need no lookup"""
+    key = kind_key(seed, kind)
+    digits = f"{splitmix64(key ^ ordinal):016x}{splitmix64(key ^ ordinal ^ MASK64):016x}"
+    return f"{digits[:8]}-{digits[8:12]}-{digits[12:16]}-{digits[16:20]}-{digits[20:]}"
+
+
+def skewed_ordinal(seed, kind, ordinal, population, exponent=2.0):
+    """Map an ordinal onto [0, population) with a power-law bias toward low ordinals"""
+    fraction = mix(seed, kind, ordinal) / MASK64
+    return min(population - 1, int(population * fraction ** exponent))
+
+
+class Dataset:
+    """Collection sizes and the cross-references derived from them"""
+
+    def __init__(self, args):
+        self.seed = args.seed
+        self.users = args.users
+        self.vendors = args.vendors
+        self.venues = args.venues
+        self.events = int(args.users * args.events_per_user)
+        self.bookings_per_event = args.bookings_per_event
+        self.bookings = self.events * args.bookings_per_event
+        self.payments = self.bookings  # one deposit payment per booking
+        self.messages = int(args.users * args.messages_per_user)
+        self.availability_days = args.availability_days
+        self.availability = self.vendors * args.availability_days
+        self.favorites = int(args.users * args.favorites_per_user)
+        self.subscriptions = args.vendors  # one subscription per vendor
+
+    def counts(self):
+        return {
+            "users": self.users,
+            "venues": self.venues,
+            "vendors": self.vendors,
+            "events": self.events,
+            "vendor_bookings": self.bookings,
+            "payments": self.payments,
+            "messages": self.messages,
+            "vendor_availability": self.availability,
+            "vendor_subscriptions": self.subscriptions,
+            "vendor_favorites": self.favorites,
+        }
+
+    # Deterministic cross-references
+    def event_owner(self, event_ordinal):
+        return skewed_ordinal(self.seed, "owner", event_ordinal, self.users, 1.5)
+
+    def event_date(self, event_ordinal):
+        # Spread events over two years around EPOCH so history and upcoming lists both have data
+        offset = mix(self.seed, "date", event_ordinal) % (730 * 24)
+        return EPOCH + timedelta(hours=offset - 365 * 24)
+
+    def booked_vendor(self, booking_ordinal):
+        return skewed_ordinal(self.seed, "booking", booking_ordinal, self.vendors)
+
+    def vendor_subscription(self, vendor_ordinal):
+        """(plan, status) of a vendor, shared by its vendor and subscription documents"""
+        draw = mix(self.seed, "plan", vendor_ordinal) % PLAN_WEIGHTS[-1]
+        plan = next(plan for plan, bound in zip(SUBSCRIPTION_PLANS, PLAN_WEIGHTS) if draw < bound)
+        active = mix(self.seed, "subscription", vendor_ordinal) % 100 < ACTIVE_SUBSCRIPTION_PERCENT
+        return plan, "active" if active else "cancelled"
+
+    def ordinals(self, collection):
+        """How many ordinals a collection's generator walks"""
+        return self.users if collection == "vendor_favorites" else self.counts()[collection]
+
+
+def generate_users(dataset, rng, start, end):
+    seed = dataset.seed
+    for i in range(start, end):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        created_at = EPOCH - timedelta(minutes=rng.randrange(3 * 365 * 24 * 60))
+        yield {
+            "id": make_id(seed, "user", i),
+            "name": f"{first} {last}",
+            "email": f"user{i}@synthetic.urevent360.com",
+            "password_hash": PASSWORD_HASH,
+            "mobile": f"+1555{i % 10_000_000:07d}",
+            "role": "vendor" if i % 50 == 0 else "client",
+            "status": "active",
+            "is_active": rng.random() > 0.02,
+            "created_at": created_at,
+            "profile_completed": rng.random() > 0.3,
+        }
+
+
+def generate_venues(dataset, rng, start, end):
+    seed = dataset.seed
+    for i in range(start, end):
+        city, state, zipcode = rng.choices(CITIES, cum_weights=CITY_WEIGHTS)[0]
+        venue_type = rng.choice(VENUE_TYPES)
+        yield {
+            "id": make_id(seed, "venue", i),
+            "name": f"{rng.choice(LAST_NAMES)} {venue_type} {i}",
+            "description": f"{venue_type} in {city} for weddings, galas and celebrations",
+            "location": f"{city}, {state} {zipcode}",
+            "venue_type": venue_type,
+            "capacity": rng.choice([50, 80, 120, 150, 200, 300, 500]),
+            "price_per_person": round(rng.lognormvariate(4.4, 0.35), 2),
+            "amenities": rng.sample(AMENITIES, rng.randint(2, 5)),
+            "rating": round(min(5.0, max(1.0, rng.gauss(4.3, 0.4))), 1),
+            "images": [f"https://images.example.com/venues/{i}/{n}.jpg" for n in range(rng.randint(1, 6))],
+            "contact_info": {"phone": f"(555) {i % 1000:03d}-{i % 10000:04d}", "email": f"venue{i}@example.com"},
+        }
+
+
+def generate_vendors(dataset, rng, start, end):
+    seed = dataset.seed
+    for i in range(start, end):
+        city, state, zipcode = rng.choices(CITIES, cum_weights=CITY_WEIGHTS)[0]
+        service_type = rng.choices(SERVICE_TYPES, cum_weights=SERVICE_WEIGHTS)[0]
+        cultures = {rng.choices(CULTURAL_STYLES, cum_weights=CULTURE_WEIGHTS)[0] for _ in range(rng.randint(1, 3))}
+        base_price = round(rng.lognormvariate(7.0, 0.6), 2)
+        plan, subscription_status = dataset.vendor_subscription(i)
+        yield {
+            "id": make_id(seed, "vendor", i),
+            "name": f"{rng.choice(LAST_NAMES)} {service_type} {i}",
+            "description": f"{service_type} specialists serving {city} celebrations",
+            "service_type": service_type,
+            "location": f"{city}, {state}",
+            "price_range": PRICE_RANGES[min(3, int(base_price // 1500))],
+            "rating": round(min(5.0, max(1.0, rng.gauss(4.2, 0.5))), 1),
+            "specialties": rng.sample(SPECIALTIES.get(service_type, ["Custom Packages"]),
+                                      min(2, len(SPECIALTIES.get(service_type, ["Custom Packages"])))),
+            "cultural_specializations": sorted(cultures),
+            "contact_info": {"phone": f"(555) {i % 1000:03d}-{i % 10000:04d}", "email": f"vendor{i}@example.com"},
+            "business_name": f"Vendor Business {i}",
+            # Marketplace profile fields, as /api/vendor/register stores them
+            "owner_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "email": f"vendor{i}@example.com",
+            "mobile": f"+1555{i % 10_000_000:07d}",
+            "business_type": "Event Services",
+            "service_category": service_type,
+            "address": f"{100 + i % 9900} Main St",
+            "city": city,
+            "state": state,
+            "zip_code": zipcode,
+            "insurance_info": {"provider": "Event Shield", "policy_number": f"POL-{i:08d}"},
+            "base_price": base_price,
+            "price_per_person": round(base_price / 100, 2) if service_type == "Catering" else None,
+            "minimum_booking": round(base_price * 0.5, 2),
+            "availability": {"weekdays": rng.random() > 0.3, "weekends": True},
+            "booking_lead_time": rng.choice([7, 14, 30, 60]),
+            "subscription_plan": plan,
+            "subscription_status": subscription_status,
+            "status": "active",
+            "created_at": EPOCH - timedelta(days=rng.randrange(1500)),
+        }
+
+
+def generate_events(dataset, rng, start, end):
+    seed = dataset.seed
+    for i in range(start, end):
+        city, state, zipcode = rng.choices(CITIES, cum_weights=CITY_WEIGHTS)[0]
+        date = dataset.event_date(i)
+        budget = round(rng.lognormvariate(9.8, 0.5), 2)
+        if date < EPOCH:
+            status = "completed" if rng.random() > 0.05 else "cancelled"
+        else:
+            status = rng.choices(["planning", "booked"], weights=[60, 40])[0]
+        yield {
+            "id": make_id(seed, "event", i),
+            "user_id": make_id(seed, "user", dataset.event_owner(i)),
+            "name": f"Event {i}",
+            "event_type": rng.choice(EVENT_TYPES),
+            "cultural_style": rng.choices(CULTURAL_STYLES, cum_weights=CULTURE_WEIGHTS)[0],
+            "date": date,
+            "location": f"{city}, {state}",
+            "zipcode": zipcode,
+            "budget": budget,
+            "guest_count": rng.choice([25, 50, 100, 150, 200, 300]),
+            "status": status,
+            "services_needed": rng.sample(["catering", "photography", "decoration", "music/dj", "videography"], 3),
+            "created_at": date - timedelta(days=rng.randint(30, 365)),
+            "updated_at": None,
+        }
+
+
+def generate_bookings(dataset, rng, start, end):
+    seed = dataset.seed
+    for j in range(start, end):
+        event_ordinal = j // dataset.bookings_per_event
+        vendor_ordinal = dataset.booked_vendor(j)
+        event_date = dataset.event_date(event_ordinal)
+        cost = round(rng.lognormvariate(7.2, 0.6), 2)
+        service_type = rng.choices(SERVICE_TYPES, cum_weights=SERVICE_WEIGHTS)[0]
+        yield {
+            "id": make_id(seed, "booking", j),
+            "event_id": make_id(seed, "event", event_ordinal),
+            "vendor_id": make_id(seed, "vendor", vendor_ordinal),
+            "vendor_name": f"Vendor {vendor_ordinal}",
+            "service_type": service_type,
+            "service_name": f"{service_type} package",
+            "cost": cost,
+            "deposit_amount": round(cost * 0.3, 2),
+            "deposit_paid": True,
+            "final_payment_due": event_date,
+            "status": "completed" if event_date < EPOCH else "confirmed",
+            "booking_date": event_date - timedelta(days=rng.randint(14, 200)),
+            "event_date": event_date,
+            "invoice_id": f"INV-{j:010d}",
+        }
+
+
+def generate_payments(dataset, rng, start, end):
+    seed = dataset.seed
+    for j in range(start, end):
+        event_ordinal = j // dataset.bookings_per_event
+        amount = round(rng.lognormvariate(6.0, 0.6), 2)
+        yield {
+            "id": make_id(seed, "payment", j),
+            "booking_id": make_id(seed, "booking", j),
+            "vendor_id": make_id(seed, "vendor", dataset.booked_vendor(j)),
+            "event_id": make_id(seed, "event", event_ordinal),
+            "amount": amount,
+            "payment_type": "deposit",
+            "payment_method": rng.choices(["card", "bank_transfer", "check"], weights=[80, 15, 5])[0],
+            "payment_date": dataset.event_date(event_ordinal) - timedelta(days=rng.randint(7, 120)),
+            "reference_number": f"REF-{j:010d}",
+            "status": "completed",
+        }
+
+
+def generate_messages(dataset, rng, start, end):
+    seed = dataset.seed
+    for k in range(start, end):
+        client = skewed_ordinal(seed, "message", k, dataset.users, 1.5)
+        vendor = skewed_ordinal(seed, "vendor", k, dataset.vendors)
+        outbound = rng.random() > 0.5
+        client_id, vendor_id = make_id(seed, "user", client), make_id(seed, "vendor", vendor)
+        yield {
+            "id": make_id(seed, "message", k),
+            "sender_id": client_id if outbound else vendor_id,
+            "receiver_id": vendor_id if outbound else client_id,
+            "content": rng.choice([
+                "Hi! Are you available on our event date?",
+                "Could you send your package pricing?",
+                "Thanks, we'd love to schedule a tasting.",
+                "Confirming the deposit has been paid.",
+            ]),
+            "timestamp": EPOCH - timedelta(seconds=rng.randrange(365 * 24 * 3600)),
+            "read": rng.random() > 0.2,
+        }
+
+
+def generate_availability(dataset, rng, start, end):
+    seed = dataset.seed
+    days = dataset.availability_days
+    for n in range(start, end):
+        vendor_ordinal, day = divmod(n, days)
+        open_hour = rng.choice([8, 9, 10])
+        yield {
+            "id": make_id(seed, "availability", n),
+            "vendor_id": make_id(seed, "vendor", vendor_ordinal),
+            "date": EPOCH + timedelta(days=day),
+            "available_slots": [{"start": f"{open_hour:02d}:00", "end": f"{open_hour + 8:02d}:00"}],
+            "unavailable_periods": [] if rng.random() > 0.3 else [{"start": "12:00", "end": "13:00", "reason": "booked"}],
+            "created_at": EPOCH,
+            "updated_at": None,
+        }
+
+
+def generate_subscriptions(dataset, rng, start, end):
+    seed = dataset.seed
+    for i in range(start, end):
+        plan, status = dataset.vendor_subscription(i)
+        start_date = EPOCH - timedelta(days=rng.randrange(1000))
+        yield {
+            "id": make_id(seed, "subscription", i),
+            "vendor_id": make_id(seed, "vendor", i),
+            "plan_type": plan,
+            "monthly_fee": SUBSCRIPTION_PLANS[plan],
+            "status": status,
+            "start_date": start_date,
+            # The marketplace lists subscriptions billing after the wall clock,
+            # so active ones renew far enough out to outlive the dataset
+            "next_billing_date": EPOCH + timedelta(days=3650 + rng.randrange(30)) if status == "active"
+            else start_date + timedelta(days=30),
+            "payment_method": rng.choices(["card", "bank_transfer"], weights=[90, 10])[0],
+            "created_at": start_date,
+        }
+
+
+def generate_favorites(dataset, rng, start, end):
+    """Favorites of users start..end, each user's vendors distinct"""
+    seed = dataset.seed
+    if not dataset.vendors:
+        return
+    mean = dataset.favorites / max(dataset.users, 1)
+    limit = min(dataset.vendors, MAX_FAVORITES_PER_USER)
+    for u in range(start, end):
+        # Exponentially distributed counts: most users keep a few favorites, some many
+        count = min(limit, int(rng.expovariate(1 / mean) + 0.5)) if mean > 0 else 0
+        vendors = {}  # vendor ordinal -> position, in draw order
+        while len(vendors) < count:
+            vendors.setdefault(min(dataset.vendors - 1, int(dataset.vendors * rng.random() ** 2)), len(vendors))
+        for vendor_ordinal, position in vendors.items():
+            yield {
+                "id": make_id(seed, "favorite", u * MAX_FAVORITES_PER_USER + position),
+                "user_id": make_id(seed, "user", u),
+                "vendor_id": make_id(seed, "vendor", vendor_ordinal),
+                "created_at": EPOCH - timedelta(minutes=rng.randrange(365 * 24 * 60)),
+            }
+
+
+GENERATORS = {
+    "users": generate_users,
+    "venues": generate_venues,
+    "vendors": generate_vendors,
+    "events": generate_events,
+    "vendor_bookings": generate_bookings,
+    "payments": generate_payments,
+    "messages": generate_messages,
+    "vendor_availability": generate_availability,
+    "vendor_subscriptions": generate_subscriptions,
+    "vendor_favorites": generate_favorites,
+}
+
+# One MongoClient per worker process
+_worker_client = None
+
+
+def insert_batch(mongo_url, db_name, dataset, collection, start, end):
+    global _worker_client
+    if _worker_client is None:
+        _worker_client = pymongo.MongoClient(mongo_url, w=1)
+    rng = random.Random(f"{dataset.seed}:{collection}:{start}")
+    documents = list(GENERATORS[collection](dataset, rng, start, end))
+    if documents:
+        _worker_client[db_name][collection].insert_many(documents, ordered=False, bypass_document_validation=True)
+    return collection, len(documents)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a deterministic synthetic dataset for benchmarks")
+    parser.add_argument("--seed", type=int, default=360)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--vendors", type=int, default=10_000)
+    parser.add_argument("--venues", type=int, default=5_000)
+    parser.add_argument("--events-per-user", type=float, default=1.5)
+    parser.add_argument("--bookings-per-event", type=int, default=3)
+    parser.add_argument("--messages-per-user", type=float, default=4)
+    parser.add_argument("--availability-days", type=int, default=90)
+    parser.add_argument("--favorites-per-user", type=float, default=2)
+    parser.add_argument("--batch-size", type=int, default=5_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--collections", help="Comma-separated subset of collections to generate")
+    parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db-name", default=DATABASE_NAME)
+    parser.add_argument("--drop", action="store_true", help="Drop target collections first")
+    args = parser.parse_args()
+
+    dataset = Dataset(args)
+    counts = dataset.counts()
+    if args.collections:
+        selected = [name.strip() for name in args.collections.split(",")]
+        counts = {name: counts[name] for name in selected}
+
+    if args.drop:
+        db = pymongo.MongoClient(args.mongo_url)[args.db_name]
+        for name in counts:
+            db.drop_collection(name)
+            print(f"🗑️  Dropped {name}")
+
+    print(f"🌱 Generating {sum(counts.values()):,} documents with seed {args.seed} using {args.workers} workers...")
+    started = time.perf_counter()
+    inserted = dict.fromkeys(counts, 0)
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = []
+        for name in counts:
+            ordinals = dataset.ordinals(name)
+            futures.extend(
+                pool.submit(insert_batch, args.mongo_url, args.db_name, dataset, name, start, min(start + args.batch_size, ordinals))
+                for start in range(0, ordinals, args.batch_size)
+            )
+        for future in as_completed(futures):
+            name, count = future.result()
+            inserted[name] += count
+
+    elapsed = time.perf_counter() - started
+    for name, count in inserted.items():
+        print(f"✅ {name}: {count:,}")
+    total = sum(inserted.values())
+    print(f"🎉 Inserted {total:,} documents in {elapsed:.1f}s ({total / elapsed:,.0f} docs/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""Request and MongoDB instrumentation exposed in Prometheus text format.
+
+The ASGI middleware opens a per-request record in a context variable; the
+pymongo command listener appends command timings to whichever record is
+active (Motor copies the context into its executor threads), and the
+middleware folds them into the registry once the route template is known.
+"""
+import bisect
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import monitoring
+
+import query_debug
+
+# Histogram bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MONGO_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+UNMATCHED_ROUTE = "unmatched"
+NO_ROUTE = "none"  # Mongo commands issued outside of a request (startup, jobs)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class RequestRecord:
+    """Mutable state for the request currently being handled."""
+    __slots__ = ("method", "path", "route", "status", "mongo_commands",
+                 "request_id", "debug_commands", "pending_commands")
+
+    def __init__(self, method: str, path: str, debug: bool = False):
+        self.method = method
+        self.path = path
+        self.route: Optional[str] = None
+        self.status = 500
+        # (command_name, duration_seconds, failed)
+        self.mongo_commands: List[Tuple[str, float, bool]] = []
+        # Full command capture, only populated in query debug mode
+        self.request_id: Optional[str] = uuid.uuid4().hex if debug else None
+        self.debug_commands: Optional[List[Dict[str, Any]]] = [] if debug else None
+        self.pending_commands: Dict[Tuple[Any, int], Dict[str, Any]] = {}
+
+
+current_request: ContextVar[Optional[RequestRecord]] = ContextVar("current_request", default=None)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items())
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.http_latency: Dict[Tuple[str, str], Histogram] = {}
+        self.http_responses: Dict[Tuple[str, str, int], int] = {}
+        self.mongo_latency: Dict[Tuple[str, str], Histogram] = {}
+        self.mongo_failures: Dict[Tuple[str, str], int] = {}
+
+    def observe_request(self, record: RequestRecord, elapsed: float):
+        route = record.route or UNMATCHED_ROUTE
+        key = (record.method, route)
+        with self._lock:
+            histogram = self.http_latency.get(key)
+            if histogram is None:
+                histogram = self.http_latency[key] = Histogram(LATENCY_BUCKETS)
+            histogram.observe(elapsed)
+            status_key = (record.method, route, record.status)
+            self.http_responses[status_key] = self.http_responses.get(status_key, 0) + 1
+            for command, duration, failed in record.mongo_commands:
+                self._observe_mongo(route, command, duration, failed)
+
+    def observe_mongo(self, route: str, command: str, duration: float, failed: bool):
+        with self._lock:
+            self._observe_mongo(route, command, duration, failed)
+
+    def _observe_mongo(self, route: str, command: str, duration: float, failed: bool):
+        key = (route, command)
+        histogram = self.mongo_latency.get(key)
+        if histogram is None:
+            histogram = self.mongo_latency[key] = Histogram(MONGO_BUCKETS)
+        histogram.observe(duration)
+        if failed:
+            self.mongo_failures[key] = self.mongo_failures.get(key, 0) + 1
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = [
+            "# HELP urevent_http_requests_in_flight Requests currently being handled.",
+            "# TYPE urevent_http_requests_in_flight gauge",
+            f"urevent_http_requests_in_flight {self.in_flight}",
+        ]
+        with self._lock:
+            lines += [
+                "# HELP urevent_http_request_duration_seconds Request latency by route.",
+                "# TYPE urevent_http_request_duration_seconds histogram",
+            ]
+            for (method, route), histogram in sorted(self.http_latency.items()):
+                lines += _render_histogram(
+                    "urevent_http_request_duration_seconds", histogram, method=method, route=route
+                )
+
+            lines += [
+                "# HELP urevent_http_responses_total Responses by route and status code.",
+                "# TYPE urevent_http_responses_total counter",
+            ]
+            for (method, route, status), count in sorted(self.http_responses.items()):
+                lines.append(
+                    f"urevent_http_responses_total{{{_labels(method=method, route=route, status=status)}}} {count}"
+                )
+
+            lines += [
+                "# HELP urevent_mongo_command_duration_seconds MongoDB command latency by originating route.",
+                "# TYPE urevent_mongo_command_duration_seconds histogram",
+            ]
+            for (route, command), histogram in sorted(self.mongo_latency.items()):
+                lines += _render_histogram(
+                    "urevent_mongo_command_duration_seconds", histogram, route=route, command=command
+                )
+
+            lines += [
+                "# HELP urevent_mongo_command_failures_total Failed MongoDB commands by originating route.",
+                "# TYPE urevent_mongo_command_failures_total counter",
+            ]
+            for (route, command), count in sorted(self.mongo_failures.items()):
+                lines.append(
+                    f"urevent_mongo_command_failures_total{{{_labels(route=route, command=command)}}} {count}"
+                )
+        return "\n".join(lines) + "\n"
+
+
+def _render_histogram(name: str, histogram: Histogram, **labels) -> List[str]:
+    base = _labels(**labels)
+    lines = []
+    cumulative = 0
+    for bound, count in zip(histogram.buckets, histogram.counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{base},le="{bound}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{base},le="+Inf"}} {histogram.count}')
+    lines.append(f"{name}_sum{{{base}}} {histogram.total}")
+    lines.append(f"{name}_count{{{base}}} {histogram.count}")
+    return lines
+
+
+registry = MetricsRegistry()
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Attribute MongoDB command durations to the request that issued them."""
+
+    def started(self, event):
+        record = current_request.get()
+        if record is None or record.debug_commands is None:
+            return
+        explainable = event.command_name in query_debug.EXPLAINABLE_COMMANDS
+        record.pending_commands[(event.connection_id, event.request_id)] = {
+            "command_name": event.command_name,
+            "database": event.database_name,
+            "shape": query_debug.command_shape(event.command_name, event.command),
+            "command": dict(event.command) if explainable else None,
+        }
+
+    def succeeded(self, event):
+        self._record(event, False)
+
+    def failed(self, event):
+        self._record(event, True)
+
+    def _record(self, event, failed: bool):
+        duration = event.duration_micros / 1_000_000
+        record = current_request.get()
+        if record is None:
+            registry.observe_mongo(NO_ROUTE, event.command_name, duration, failed)
+            return
+        record.mongo_commands.append((event.command_name, duration, failed))
+        if record.debug_commands is not None:
+            captured = record.pending_commands.pop((event.connection_id, event.request_id), None)
+            if captured is not None:
+                captured["duration_ms"] = duration * 1000
+                captured["failed"] = failed
+                record.debug_commands.append(captured)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency, status and in-flight counts per route."""
+
+    def __init__(self, app, metrics: MetricsRegistry = registry):
+        self.app = app
+        self.metrics = metrics
+        self._route_paths: Dict[object, str] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        record = RequestRecord(scope["method"], scope["path"], debug=query_debug.ENABLED)
+        token = current_request.set(record)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                record.status = message["status"]
+                if record.request_id is not None:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-request-id", record.request_id.encode("latin-1")))
+                    message = dict(message, headers=headers)
+            await send(message)
+
+        self.metrics.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.metrics.in_flight -= 1
+            current_request.reset(token)
+            record.route = self._route_template(scope)
+            self.metrics.observe_request(record, elapsed)
+            if record.debug_commands is not None:
+                query_debug.finish_request(record, elapsed)
+
+    def _route_template(self, scope) -> Optional[str]:
+        # The router stores the matched endpoint in the scope; map it back to
+        # the path template so labels stay bounded (/api/events/{event_id}).
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return None
+        path = self._route_paths.get(endpoint)
+        if path is None:
+            app = scope.get("app")
+            for route in getattr(app, "routes", []):
+                if getattr(route, "endpoint", None) is not None and hasattr(route, "path"):
+                    self._route_paths.setdefault(route.endpoint, route.path)
+            path = self._route_paths.get(endpoint, UNMATCHED_ROUTE)
+        return path
@@ -0,0 +1,164 @@
+"""Per-request MongoDB query reports for development and staging.
+
+Enabled with MONGO_DEBUG_REQUESTS=1. Every command issued while handling a
+request is captured by the instrumentation listener; at the end of the
+request the commands are grouped by query shape (the command with literal
+values stripped) so repeated identical shapes - N+1 access patterns - stand
+out, and commands slower than MONGO_SLOW_QUERY_MS get an explain() plan.
+Reports are kept in a bounded in-memory ring served by the admin debug routes.
+"""
+import asyncio
+import json
+import logging
+import os
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+ENABLED = os.environ.get("MONGO_DEBUG_REQUESTS", "").lower() in ("1", "true", "yes")
+SLOW_QUERY_MS = float(os.environ.get("MONGO_SLOW_QUERY_MS", "100"))
+N_PLUS_ONE_THRESHOLD = int(os.environ.get("MONGO_N_PLUS_ONE_THRESHOLD", "5"))
+MAX_REPORTS = int(os.environ.get("MONGO_DEBUG_MAX_REPORTS", "200"))
+
+# Commands the server can explain
+EXPLAINABLE_COMMANDS = {"find", "aggregate", "count", "distinct", "delete", "update", "findAndModify"}
+# Command fields that make up a query shape
+SHAPE_FIELDS = ("filter", "query", "pipeline", "q", "key", "sort")
+# Session and cluster bookkeeping that must not be replayed inside explain
+DRIVER_FIELDS = {"lsid", "txnNumber", "$db", "$clusterTime", "$readPreference", "autocommit", "startTransaction"}
+
+logger = logging.getLogger("urevent.query_debug")
+
+_db = None
+_reports: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+
+def configure(database):
+    """Register the database handle used to run explain() for slow commands."""
+    global _db
+    _db = database
+
+
+def normalize_shape(value: Any) -> Any:
+    """Replace literal values with placeholders, keeping keys and operators."""
+    if isinstance(value, dict):
+        return {key: normalize_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        # $in lists of any length collapse to one shape
+        return [normalize_shape(value[0])] if value else []
+    return "?"
+
+
+def command_shape(command_name: str, command: Dict[str, Any]) -> Dict[str, Any]:
+    """Describe a command by collection and normalized predicate."""
+    shape: Dict[str, Any] = {"command": command_name, "collection": command.get(command_name)}
+    for field in SHAPE_FIELDS:
+        if field in command:
+            shape[field] = normalize_shape(command[field])
+    # Write commands carry their predicates inside statement arrays
+    for field, predicate in (("updates", "q"), ("deletes", "q")):
+        statements = command.get(field)
+        if statements:
+            shape[predicate] = normalize_shape(statements[0].get(predicate, {}))
+    return shape
+
+
+def _explainable(command: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in command.items() if key not in DRIVER_FIELDS}
+
+
+def finish_request(record, elapsed: float):
+    """Analyse the commands captured for a finished request and store the report."""
+    groups: Dict[str, Dict[str, Any]] = {}
+    commands: List[Dict[str, Any]] = []
+    slow: List[Dict[str, Any]] = []
+
+    for captured in record.debug_commands:
+        key = json.dumps(captured["shape"], sort_keys=True, default=str)
+        group = groups.setdefault(key, {"shape": captured["shape"], "count": 0, "total_ms": 0.0})
+        group["count"] += 1
+        group["total_ms"] += captured["duration_ms"]
+
+        entry = {
+            "command": captured["command_name"],
+            "collection": captured["shape"].get("collection"),
+            "duration_ms": round(captured["duration_ms"], 3),
+            "failed": captured["failed"],
+        }
+        commands.append(entry)
+        if captured["duration_ms"] >= SLOW_QUERY_MS:
+            slow_entry = dict(entry, shape=captured["shape"], explain=None)
+            slow.append(slow_entry)
+            if captured["command_name"] in EXPLAINABLE_COMMANDS and captured["command"] is not None:
+                slow_entry["explain"] = "pending"
+                _schedule_explain(slow_entry, captured["database"], captured["command"])
+
+    repeated = [
+        {"shape": group["shape"], "count": group["count"], "total_ms": round(group["total_ms"], 3)}
+        for group in groups.values()
+        if group["count"] >= N_PLUS_ONE_THRESHOLD
+    ]
+
+    report = {
+        "request_id": record.request_id,
+        "method": record.method,
+        "path": record.path,
+        "route": record.route,
+        "status": record.status,
+        "duration_ms": round(elapsed * 1000, 3),
+        "recorded_at": datetime.utcnow(),
+        "command_count": len(commands),
+        "mongo_time_ms": round(sum(entry["duration_ms"] for entry in commands), 3),
+        "n_plus_one": repeated,
+        "slow_commands": slow,
+        "commands": commands,
+    }
+
+    _reports[record.request_id] = report
+    while len(_reports) > MAX_REPORTS:
+        _reports.popitem(last=False)
+
+    if repeated or slow:
+        logger.warning(
+            "%s %s issued %d Mongo commands (%d repeated shapes, %d slow) request_id=%s",
+            record.method, record.path, len(commands), len(repeated), len(slow), record.request_id
+        )
+
+
+def _schedule_explain(entry: Dict[str, Any], database: str, command: Dict[str, Any]):
+    if _db is None:
+        entry["explain"] = None
+        return
+    try:
+        asyncio.get_running_loop().create_task(_run_explain(entry, database, command))
+    except RuntimeError:
+        entry["explain"] = None
+
+
+async def _run_explain(entry: Dict[str, Any], database: str, command: Dict[str, Any]):
+    try:
+        result = await _db.client[database].command(
+            {"explain": _explainable(command), "verbosity": "queryPlanner"}
+        )
+        entry["explain"] = result.get("queryPlanner", result)
+    except Exception as e:
+        entry["explain"] = {"error": str(e)}
+
+
+def get_report(request_id: str) -> Optional[Dict[str, Any]]:
+    return _reports.get(request_id)
+
+
+def list_reports(limit: int = 50) -> List[Dict[str, Any]]:
+    """Most recent reports first, without the per-command detail."""
+    summaries = []
+    for report in reversed(list(_reports.values())[-limit:]):
+        summary = {
+            key: report[key]
+            for key in ("request_id", "method", "path", "route", "status", "duration_ms",
+                        "recorded_at", "command_count", "mongo_time_ms")
+        }
+        summary["n_plus_one"] = len(report["n_plus_one"])
+        summary["slow_commands"] = len(report["slow_commands"])
+        summaries.append(summary)
+    return summaries
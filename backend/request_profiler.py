@@ -0,0 +1,174 @@
+"""Opt-in statistical stack sampler for individual requests.
+
+A request is profiled when it carries a valid X-Profile-Token header (a
+short-lived token issued to admins by /api/admin/debug/profile-token) or
+when it is picked by PROFILE_SAMPLE_RATE. While the request is in flight a
+background thread samples the event loop thread's stack every
+PROFILE_INTERVAL_MS and the result is kept, in collapsed-stack format ready
+for flamegraph tools, in a bounded in-memory ring.
+
+Samples cover everything the event loop runs while the request is in
+flight, so profiles taken under concurrent load include other requests too.
+Requests without the header and outside the sample rate only pay for a
+header scan.
+"""
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import jwt
+
+SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", "5"))
+MAX_PROFILES = int(os.environ.get("PROFILE_MAX_PROFILES", "50"))
+MAX_STACK_DEPTH = 128
+TOKEN_EXPIRE_MINUTES = 15
+TOKEN_HEADER = b"x-profile-token"
+TOKEN_SCOPE = "profile"
+
+_secret_key: Optional[str] = None
+_algorithm = "HS256"
+_profiles: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_profiles_lock = threading.Lock()
+
+
+def configure(secret_key: str, algorithm: str = "HS256"):
+    """Register the key used to sign and verify profiling tokens."""
+    global _secret_key, _algorithm
+    _secret_key = secret_key
+    _algorithm = algorithm
+
+
+def create_profile_token(admin_user: dict) -> Dict[str, Any]:
+    expires_at = datetime.utcnow() + timedelta(minutes=TOKEN_EXPIRE_MINUTES)
+    token = jwt.encode(
+        {"scope": TOKEN_SCOPE, "user_id": admin_user["id"], "exp": expires_at},
+        _secret_key,
+        algorithm=_algorithm
+    )
+    return {"token": token, "header": TOKEN_HEADER.decode(), "expires_at": expires_at}
+
+
+def _token_valid(token: str) -> bool:
+    if _secret_key is None:
+        return False
+    try:
+        payload = jwt.decode(token, _secret_key, algorithms=[_algorithm])
+    except jwt.PyJWTError:
+        return False
+    return payload.get("scope") == TOKEN_SCOPE
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler(threading.Thread):
+    """Sample one thread's stack at a fixed interval until stopped.
+
+    ``stop()`` only signals the thread, so the event loop never waits on it;
+    the thread hands its result to ``on_stop`` after its last sample.
+    """
+
+    def __init__(self, target_thread_id: int, interval: float, on_stop=None):
+        super().__init__(daemon=True, name="request-profiler")
+        self.target_thread_id = target_thread_id
+        self.interval = interval
+        self.on_stop = on_stop
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.target_thread_id)
+            if frame is None:
+                continue
+            labels = []
+            while frame is not None and len(labels) < MAX_STACK_DEPTH:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(labels))] += 1
+            self.samples += 1
+        if self.on_stop is not None:
+            self.on_stop(self)
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def collapsed(stacks: Counter) -> str:
+    """Brendan Gregg's folded format: one 'frame;frame;frame count' per line."""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def _should_profile(scope) -> bool:
+    for name, value in scope.get("headers", ()):
+        if name == TOKEN_HEADER:
+            return _token_valid(value.decode("latin-1"))
+    return SAMPLE_RATE > 0 and random.random() < SAMPLE_RATE
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware that profiles opted-in requests."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", profile_id.encode("latin-1")))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        profile = {"id": profile_id, "method": scope["method"], "path": scope["path"], "interval_ms": INTERVAL_MS}
+
+        def finished(sampler: StackSampler):
+            # Runs on the sampler thread once it has stopped sampling
+            _store({**profile, "samples": sampler.samples, "collapsed": collapsed(sampler.stacks)})
+
+        sampler = StackSampler(threading.get_ident(), INTERVAL_MS / 1000, on_stop=finished)
+        profile["started_at"] = datetime.utcnow()
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profile["duration_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            sampler.stop()
+
+
+def _store(profile: Dict[str, Any]):
+    with _profiles_lock:
+        _profiles[profile["id"]] = profile
+        while len(_profiles) > MAX_PROFILES:
+            _profiles.popitem(last=False)
+
+
+def get_profile(profile_id: str) -> Optional[Dict[str, Any]]:
+    return _profiles.get(profile_id)
+
+
+def list_profiles() -> List[Dict[str, Any]]:
+    """Stored profiles, most recent first, without the stack data."""
+    with _profiles_lock:
+        profiles = list(_profiles.values())
+    return [
+        {key: value for key, value in profile.items() if key != "collapsed"}
+        for profile in reversed(profiles)
+    ]
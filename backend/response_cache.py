@@ -0,0 +1,142 @@
+"""In-process response cache for public catalog endpoints.
+
+Unauthenticated catalog reads (venues, vendors, subscription plans) return
+the same bytes to everyone, so their encoded bodies are cached under the
+request path plus normalized query parameters. Entries are tagged
+("vendors", "vendor:<id>", ...) and the write paths invalidate exactly the
+tags they affect; a memory budget with LRU eviction and a TTL bound both the
+footprint and the staleness between worker processes, which do not share
+invalidations.
+
+Every cached response carries an ETag and Last-Modified, and a matching
+If-None-Match is answered with 304. If-Modified-Since is ignored: its
+one-second precision cannot tell apart two bodies written in the same second,
+and every entry has an ETag for clients to revalidate with.
+"""
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from email.utils import formatdate
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Set
+
+from fastapi import Request
+from fastapi.responses import Response
+
+MAX_BYTES = int(os.environ.get("CATALOG_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+TTL_SECONDS = float(os.environ.get("CATALOG_CACHE_TTL", "300"))
+
+
+class CacheEntry:
+    __slots__ = ("body", "media_type", "etag", "last_modified", "expires_at", "tags")
+
+    def __init__(self, body: bytes, media_type: str, tags: Set[str], ttl: float):
+        now = time.time()
+        self.body = body
+        self.media_type = media_type
+        self.etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        self.last_modified = int(now)
+        self.expires_at = now + ttl
+        self.tags = tags
+
+    def headers(self) -> Dict[str, str]:
+        return {
+            "ETag": self.etag,
+            "Last-Modified": formatdate(self.last_modified, usegmt=True),
+            "Cache-Control": "no-cache",
+        }
+
+    def not_modified(self, request: Request) -> bool:
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            return "*" in candidates or self.etag in candidates
+        return False
+
+
+class ResponseCache:
+    def __init__(self, max_bytes: int = MAX_BYTES, ttl: float = TTL_SECONDS):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+
+    @staticmethod
+    def key(request: Request) -> str:
+        """Path plus query parameters sorted by name, blank values dropped."""
+        params = sorted((name, value) for name, value in request.query_params.multi_items() if value != "")
+        return request.url.path + "?" + "&".join(f"{name}={value}" for name, value in params)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.time():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, body: bytes, media_type: str, tags: Iterable[str]) -> CacheEntry:
+        if key in self._entries:
+            self._remove(key)
+        entry = CacheEntry(body, media_type, set(tags), self.ttl)
+        if len(body) > self.max_bytes:
+            return entry
+        self._entries[key] = entry
+        self.size += len(body)
+        for tag in entry.tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while self.size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+        return entry
+
+    def invalidate(self, *tags: str):
+        for tag in tags:
+            for key in self._tags.pop(tag, set()):
+                self._remove(key)
+
+    def clear(self):
+        self._entries.clear()
+        self._tags.clear()
+        self.size = 0
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.size -= len(entry.body)
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    async def serve(
+        self,
+        request: Request,
+        tags: Iterable[str],
+        load: Callable[[], Awaitable[Response]]
+    ) -> Response:
+        """Serve a cached body, or build it with load() and cache successful responses."""
+        key = self.key(request)
+        entry = self.get(key)
+        if entry is None:
+            self.misses += 1
+            response = await load()
+            if response.status_code != 200:
+                return response
+            entry = self.set(key, response.body, response.media_type, tags)
+        else:
+            self.hits += 1
+
+        if entry.not_modified(request):
+            return Response(status_code=304, headers=entry.headers())
+        return Response(entry.body, media_type=entry.media_type, headers=entry.headers())
+
+
+catalog_cache = ResponseCache()
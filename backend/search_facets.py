@@ -0,0 +1,102 @@
+"""Facet counts for the vendor and venue search filter sidebars.
+
+A single ``$facet`` aggregation computes every facet of a filter set in one
+round trip. Results are cached per normalized filter set: the Mongo query
+with its keys sorted, plus the matched ids when free text narrows the
+search. An entry lives for FACET_CACHE_TTL seconds and is dropped as soon as
+its collection is written through the API.
+"""
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import orjson
+
+CACHE_TTL_SECONDS = float(os.environ.get("FACET_CACHE_TTL", "300"))
+MAX_CACHED = 512
+
+CAPACITY_BANDS = [0, 50, 100, 200, 500, 1000]
+
+
+def _counts(field: str, unwind: bool = False, match: Optional[dict] = None) -> List[dict]:
+    stages = [{"$unwind": f"${field}"}] if unwind else []
+    stages.append({"$match": match or {field: {"$type": "string"}}})
+    stages.append({"$group": {"_id": f"${field}", "count": {"$sum": 1}}})
+    stages.append({"$sort": {"count": -1, "_id": 1}})
+    return stages
+
+
+FACETS = {
+    "vendors": {
+        "service_type": _counts("service_type"),
+        "price_range": _counts("price_range"),
+        "cultural_specializations": _counts("cultural_specializations", unwind=True),
+    },
+    "venues": {
+        "venue_type": _counts("venue_type"),
+        "capacity": [
+            {"$match": {"capacity": {"$type": "number"}}},
+            {"$bucket": {
+                "groupBy": "$capacity",
+                "boundaries": CAPACITY_BANDS,
+                "default": "other",
+                "output": {"count": {"$sum": 1}},
+            }},
+        ],
+    },
+}
+
+_cache: "OrderedDict[Tuple[str, bytes], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+
+def _band_label(lower) -> str:
+    if lower == "other":
+        return f"{CAPACITY_BANDS[-1]}+"
+    upper = CAPACITY_BANDS[CAPACITY_BANDS.index(lower) + 1]
+    return f"{lower}-{upper - 1}"
+
+
+def _key(collection: str, query: Dict[str, Any], ids: Optional[Iterable[str]], exclude: Iterable[str]) -> Tuple[str, bytes]:
+    normalized = {"query": query, "ids": sorted(ids) if ids is not None else None, "exclude": sorted(exclude)}
+    return collection, orjson.dumps(normalized, option=orjson.OPT_SORT_KEYS, default=str)
+
+
+async def facet_counts(db, collection: str, query: Dict[str, Any], ids: Optional[Iterable[str]] = None,
+                       exclude: Iterable[str] = ()) -> Dict[str, Any]:
+    """Counts per facet value for documents matching query (and ids, when given), leaving out exclude"""
+    key = _key(collection, query, ids, exclude)
+    cached = _cache.get(key)
+    if cached is not None and cached[0] > time.monotonic():
+        _cache.move_to_end(key)
+        return cached[1]
+
+    match = query
+    id_filter: Dict[str, Any] = {}
+    if ids is not None:
+        id_filter["$in"] = list(ids)
+    if exclude:
+        # A user's blocked vendors: a short list, unlike the candidate sets ranking excludes by row
+        id_filter["$nin"] = list(exclude)
+    if id_filter:
+        match = {"$and": [query, {"id": id_filter}]} if query else {"id": id_filter}
+    pipeline = [{"$match": match}, {"$facet": FACETS[collection]}]
+    result = (await db[collection].aggregate(pipeline).to_list(1))[0]
+
+    counts = {}
+    for facet, buckets in result.items():
+        if facet == "capacity":
+            counts[facet] = [{"value": _band_label(bucket["_id"]), "count": bucket["count"]} for bucket in buckets]
+        else:
+            counts[facet] = [{"value": bucket["_id"], "count": bucket["count"]} for bucket in buckets]
+
+    _cache[key] = (time.monotonic() + CACHE_TTL_SECONDS, counts)
+    _cache.move_to_end(key)
+    while len(_cache) > MAX_CACHED:
+        _cache.popitem(last=False)
+    return counts
+
+
+def invalidate(collection: str):
+    for key in [key for key in _cache if key[0] == collection]:
+        del _cache[key]
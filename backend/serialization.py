@@ -0,0 +1,137 @@
+"""Fast JSON serialization of MongoDB documents for read endpoints.
+
+Building a Pydantic model per document and letting FastAPI validate the
+result again through ``response_model`` dominates CPU time on large lists.
+Routes instead fetch documents with a projection shaped like the response
+model and return pre-encoded JSON bytes, which FastAPI sends as-is:
+
+* trusted collections (written only through typed code paths) are filled
+  with model defaults and encoded straight to JSON with orjson;
+* collections written from free-form dicts are validated in one batch by a
+  cached ``TypeAdapter`` and dumped to JSON by pydantic-core.
+
+``response_model`` stays on the route decorators for the OpenAPI schema.
+
+List endpoints accept a sparse fieldset (``fields=card`` or
+``fields=id,name,rating``) that narrows both the Mongo projection and the
+response; ``select`` returns a serializer for a model restricted to those
+fields.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Type
+
+import orjson
+from bson import ObjectId
+from fastapi import HTTPException
+from fastapi.responses import Response
+from pydantic import BaseModel, TypeAdapter, create_model
+
+MAX_FIELDSETS = 64  # cached sparse fieldset serializers per model
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class JSONBytesResponse(Response):
+    media_type = "application/json"
+
+
+def json_response(content: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Encode arbitrary JSON-compatible content (dicts, Mongo documents, models) with orjson."""
+    return JSONBytesResponse(dumps(content), status_code=status_code, headers=headers)
+
+
+class ModelSerializer:
+    """Projection, defaults and encoders for one response model."""
+
+    def __init__(self, model: Type[BaseModel], presets: Optional[Dict[str, Sequence[str]]] = None):
+        self.model = model
+        self.fields = tuple(model.model_fields)
+        self.presets = {"detail": self.fields, **(presets or {})}
+        self._fieldsets: Dict[tuple, "ModelSerializer"] = {}
+        self.projection = {"_id": 0, **{name: 1 for name in self.fields}}
+        self._defaults: Dict[str, Any] = {}
+        self._factories: Dict[str, Any] = {}
+        for name, field in model.model_fields.items():
+            if field.is_required():
+                continue
+            if field.default_factory is not None:
+                self._factories[name] = field.default_factory
+            elif isinstance(field.default, (list, dict)):
+                # Never hand out the shared mutable default
+                self._factories[name] = type(field.default)
+            else:
+                self._defaults[name] = field.default
+        self._many = TypeAdapter(List[model])
+        self._one = TypeAdapter(model)
+
+    def select(self, fields: Optional[str]) -> "ModelSerializer":
+        """Serializer for a preset name or comma-separated field names; id is always kept."""
+        if not fields:
+            return self
+        names = self.presets.get(fields)
+        if names is None:
+            names = [name.strip() for name in fields.split(",") if name.strip()]
+            unknown = [name for name in names if name not in self.model.model_fields]
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"Unknown field(s): {', '.join(unknown)}")
+        selected = set(names) | {"id"}
+        key = tuple(name for name in self.fields if name in selected)
+        if key == self.fields:
+            return self
+
+        serializer = self._fieldsets.get(key)
+        if serializer is None:
+            model_fields = self.model.model_fields
+            subset = create_model(
+                f"{self.model.__name__}Fields",
+                **{name: (model_fields[name].annotation, model_fields[name]) for name in key}
+            )
+            serializer = ModelSerializer(subset)
+            if len(self._fieldsets) < MAX_FIELDSETS:
+                self._fieldsets[key] = serializer
+        return serializer
+
+    def shape(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        """Restrict a trusted document to the model fields and fill defaults."""
+        shaped = {}
+        for name in self.fields:
+            if name in document:
+                shaped[name] = document[name]
+            elif name in self._factories:
+                shaped[name] = self._factories[name]()
+            else:
+                shaped[name] = self._defaults.get(name)
+        return shaped
+
+    def load_many(self, documents: Iterable[Dict[str, Any]], trusted: bool = True) -> List[Any]:
+        """Shaped dicts (trusted) or validated models, for embedding in a larger payload."""
+        if trusted:
+            return [self.shape(document) for document in documents]
+        return self._many.validate_python(list(documents))
+
+    def dump_many(self, documents: Iterable[Dict[str, Any]], trusted: bool = True) -> bytes:
+        if trusted:
+            return dumps([self.shape(document) for document in documents])
+        return self._many.dump_json(self._many.validate_python(list(documents)))
+
+    def dump_one(self, document: Dict[str, Any], trusted: bool = True) -> bytes:
+        if trusted:
+            return dumps(self.shape(document))
+        return self._one.dump_json(self._one.validate_python(document))
+
+    def many(self, documents: Iterable[Dict[str, Any]], trusted: bool = True) -> Response:
+        return JSONBytesResponse(self.dump_many(documents, trusted))
+
+    def one(self, document: Dict[str, Any], trusted: bool = True) -> Response:
+        return JSONBytesResponse(self.dump_one(document, trusted))
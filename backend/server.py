@@ -1,30 +1,43 @@
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field, ValidationError
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime, timedelta
 import os
-import bcrypt
-import jwt
+import asyncio
+import math
 import pymongo
-from motor.motor_asyncio import AsyncIOMotorClient
 import uuid
 from contextlib import asynccontextmanager
+from instrumentation import MetricsMiddleware, registry as metrics_registry
+import batch
+import catalog_sync
+import compression
+import event_history
+import query_debug
+import sync
+import user_directory
+import request_profiler
+from serialization import ModelSerializer, json_response
+from response_cache import catalog_cache
+import search_facets
+import suggest
+import text_search
+import vendor_blocks
+import vendor_favorites
+import vendor_ranking
+import vendor_recommendations
+import vendor_reviews
+import vendor_similarity
+from deps import (
+    ADMIN_ROLES, JWT_ALGORITHM, SECRET_KEY, create_jwt_token, db, get_current_user, get_optional_user,
+    hash_password, verify_password,
+)
+from admin_routes import admin_router
+from vendor_subscription_routes import vendor_router
 
-# Environment variables
-DATABASE_URL = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
-DATABASE_NAME = "urevent_db"
-SECRET_KEY = os.environ.get("SECRET_KEY", "your-secret-key-here")
-JWT_ALGORITHM = "HS256"
-JWT_EXPIRE_HOURS = 24
-
-# Security
-security = HTTPBearer()
-
-# Database connection
-client = AsyncIOMotorClient(DATABASE_URL)
-db = client[DATABASE_NAME]
+request_profiler.configure(SECRET_KEY, JWT_ALGORITHM)
+query_debug.configure(db)
 
 # User Models
 class UserLogin(BaseModel):
@@ -277,45 +290,36 @@ class CalendarEvent(BaseModel):
     notification_sent: bool = False
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
-# Authentication functions
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-
-def verify_password(password: str, password_hash: str) -> bool:
-    return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
-
-def create_jwt_token(user_data: dict) -> str:
-    payload = {
-        "sub": user_data["email"],
-        "user_id": user_data["id"],
-        "role": user_data.get("role", "client"),
-        "exp": datetime.utcnow() + timedelta(hours=JWT_EXPIRE_HOURS)
-    }
-    return jwt.encode(payload, SECRET_KEY, algorithm=JWT_ALGORITHM)
-
-def decode_jwt_token(token: str) -> dict:
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[JWT_ALGORITHM])
-        return payload
-    except jwt.PyJWTError:
-        raise HTTPException(status_code=401, detail="Could not validate credentials")
-
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    token = credentials.credentials
-    payload = decode_jwt_token(token)
-    
-    user = await db.users.find_one({"email": payload["sub"]})
-    if user is None:
-        raise HTTPException(status_code=401, detail="Could not validate credentials")
-    
-    # Convert ObjectId to string for JSON serialization
-    user["_id"] = str(user["_id"])
-    return user
+# Response serializers for read endpoints. Events, bookings and scenarios are
+# only written through typed code paths and are trusted; venues and vendors
+# accept free-form dicts on write and are validated in batch.
+# List endpoints accept fields=<preset> or fields=<comma-separated names>;
+# "detail" (the default) returns every field, "card" what list grids render.
+EVENT_SERIALIZER = ModelSerializer(Event, presets={
+    "card": ["id", "name", "event_type", "date", "status", "location", "budget", "guest_count"]
+})
+VENUE_SERIALIZER = ModelSerializer(Venue, presets={
+    "card": ["id", "name", "location", "venue_type", "capacity", "price_per_person", "rating"]
+})
+VENDOR_SERIALIZER = ModelSerializer(Vendor, presets={
+    "card": ["id", "name", "service_type", "location", "price_range", "rating", "base_price", "price_per_person"]
+})
+BOOKING_SERIALIZER = ModelSerializer(VendorBooking, presets={
+    "card": ["id", "vendor_name", "service_type", "cost", "status", "deposit_paid", "event_date"]
+})
+SCENARIO_SERIALIZER = ModelSerializer(PlannerScenario)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     print("🚀 Starting UREVENT 360 Server...")
+    await sync.ensure_indexes(db)
+    await user_directory.ensure_indexes(db)
+    await vendor_blocks.ensure_indexes(db)
+    await vendor_favorites.ensure_indexes(db)
+    await vendor_reviews.ensure_indexes(db)
+    await event_history.ensure_indexes(db)
+    await vendor_similarity.ensure_indexes(db)
     yield
     # Shutdown
     print("⭐ UREVENT 360 Server shutting down...")
@@ -337,6 +341,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip/brotli compression of large responses (inside the metrics timing)
+app.add_middleware(compression.CompressionMiddleware)
+
+# Per-route latency, status and MongoDB command metrics
+app.add_middleware(MetricsMiddleware)
+
+# Opt-in stack sampling for requests carrying a profiling token
+app.add_middleware(request_profiler.ProfilingMiddleware)
+
 # API Router
 from fastapi import APIRouter
 api_router = APIRouter(prefix="/api")
@@ -353,6 +366,8 @@ async def register_user(user_data: UserRegister):
     user_dict = user_data.dict()
     user_dict["id"] = str(uuid.uuid4())
     user_dict["password_hash"] = hash_password(user_data.password)
+    user_dict["created_at"] = datetime.utcnow()
+    user_dict.update(user_directory.normalized_fields(user_data.name, user_data.email))
     del user_dict["password"]
     
     await db.users.insert_one(user_dict)
@@ -421,6 +436,8 @@ async def create_event(event_data: EventCreate, current_user: dict = Depends(get
     event_dict = event_data.dict()
     event_dict["user_id"] = current_user["id"]
     event_dict["id"] = str(uuid.uuid4())
+    event_dict["created_at"] = datetime.utcnow()
+    event_dict["version"] = sync.next_version()
     
     # Enhanced filtering fields are already in EventCreate model, no need to extract from requirements
     
@@ -428,16 +445,17 @@ async def create_event(event_data: EventCreate, current_user: dict = Depends(get
     return Event(**event_dict)
 
 @api_router.get("/events", response_model=List[Event])
-async def get_events(current_user: dict = Depends(get_current_user)):
-    events = await db.events.find({"user_id": current_user["id"]}).to_list(1000)
-    return [Event(**event) for event in events]
+async def get_events(fields: Optional[str] = None, current_user: dict = Depends(get_current_user)):
+    serializer = EVENT_SERIALIZER.select(fields)
+    events = await db.events.find({"user_id": current_user["id"]}, serializer.projection).to_list(1000)
+    return serializer.many(events)
 
 @api_router.get("/events/{event_id}", response_model=Event)
 async def get_event(event_id: str, current_user: dict = Depends(get_current_user)):
-    event = await db.events.find_one({"id": event_id, "user_id": current_user["id"]})
+    event = await db.events.find_one({"id": event_id, "user_id": current_user["id"]}, EVENT_SERIALIZER.projection)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
-    return Event(**event)
+    return EVENT_SERIALIZER.one(event)
 
 @api_router.put("/events/{event_id}", response_model=Event)
 async def update_event(event_id: str, event_data: dict, current_user: dict = Depends(get_current_user)):
@@ -447,7 +465,7 @@ async def update_event(event_id: str, event_data: dict, current_user: dict = Dep
         raise HTTPException(status_code=404, detail="Event not found")
     
     # Update event
-    event_data["updated_at"] = datetime.utcnow()
+    event_data.update(sync.stamp())
     
     # If updating requirements, extract filtering preferences
     if "requirements" in event_data:
@@ -456,6 +474,12 @@ async def update_event(event_id: str, event_data: dict, current_user: dict = Dep
             event_data["preferred_venue_type"] = requirements.get("venue_type")
             event_data["services_needed"] = requirements.get("services", [])
     
+    # Validate before writing so stored events stay trusted for fast reads
+    try:
+        Event(**{**event, **event_data})
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+    
     await db.events.update_one(
         {"id": event_id, "user_id": current_user["id"]},
         {"$set": event_data}
@@ -463,6 +487,9 @@ async def update_event(event_id: str, event_data: dict, current_user: dict = Dep
     
     # Get updated event
     updated_event = await db.events.find_one({"id": event_id, "user_id": current_user["id"]})
+    # Completing an event (or editing or reopening a completed one) rewrites its history summary
+    if "completed" in (event.get("status"), updated_event.get("status")):
+        await event_history.refresh(db, event_id)
     return Event(**updated_event)
 
 @api_router.delete("/events/{event_id}")
@@ -473,49 +500,52 @@ async def delete_event(event_id: str, current_user: dict = Depends(get_current_u
         raise HTTPException(status_code=404, detail="Event not found")
     
     try:
-        # Delete the event
-        result = await db.events.delete_one({"id": event_id, "user_id": current_user["id"]})
+        # Delete the event, leaving tombstones for synced collections
+        user_id = current_user["id"]
+        deleted_count = await sync.delete_with_tombstones(db, "events", {"id": event_id, "user_id": user_id}, user_id)
         
-        if result.deleted_count == 0:
+        if deleted_count == 0:
             raise HTTPException(status_code=404, detail="Event not found or already deleted")
         
         # Delete associated data (vendor bookings, payments, etc.)
-        await db.vendor_bookings.delete_many({"event_id": event_id})
-        await db.payments.delete_many({"event_id": event_id})
-        await db.event_planner_states.delete_many({"event_id": event_id})
+        await sync.delete_with_tombstones(db, "vendor_bookings", {"event_id": event_id}, user_id)
+        vendor_recommendations.recommender.invalidate(user_id)
+        await sync.delete_with_tombstones(db, "payments", {"event_id": event_id}, user_id)
+        await sync.delete_with_tombstones(db, "event_planner_states", {"event_id": event_id}, user_id)
         await db.planner_scenarios.delete_many({"event_id": event_id})
-        await db.appointments.delete_many({"event_id": event_id})
-        await db.calendar_events.delete_many({"related_id": event_id})
+        await sync.delete_with_tombstones(db, "appointments", {"event_id": event_id}, user_id)
+        await sync.delete_with_tombstones(db, "calendar_events", {"related_id": event_id}, user_id)
+        await db.event_history.delete_one({"id": event_id})
         
         return {
             "message": "Event deleted successfully",
-            "deleted_count": result.deleted_count
+            "deleted_count": deleted_count
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting event: {str(e)}")
 
-@api_router.get("/venues/search")
-async def search_venues(
+async def find_search_venues(
     zip_code: Optional[str] = None,
     city: Optional[str] = None,
-    radius: Optional[int] = 25,  # Default 25 miles
     venue_type: Optional[str] = None,
     capacity_min: Optional[int] = None,
     capacity_max: Optional[int] = None,
     budget_min: Optional[float] = None,
     budget_max: Optional[float] = None,
-    preferred_venue_type: Optional[str] = None,  # New filtering parameter
-    current_user: dict = Depends(get_current_user)
-):
-    """Search venues based on location and criteria with preference filtering"""
-    
+    preferred_venue_type: Optional[str] = None,
+    q: Optional[str] = None,
+    projection: Optional[dict] = None,
+    facets: bool = False
+) -> Tuple[List[dict], Optional[dict]]:
+    """Venues matching the search filters, best text matches first, and facet
+    counts when asked"""
     # Handle special venue types that don't need venue search
     no_venue_search_types = ["My Own Private Space", "I Already Have a Venue"]
     filter_venue_type = preferred_venue_type or venue_type
     
     if filter_venue_type in no_venue_search_types:
-        return []  # Return empty list - no venues needed
+        return [], {} if facets else None  # No venues needed
     
     query = {}
     
@@ -586,8 +616,61 @@ async def search_venues(
             budget_filter["$lte"] = budget_max
         query["price_per_person"] = budget_filter
     
-    venues = await db.venues.find(query).to_list(1000)
-    return [Venue(**venue) for venue in venues]
+    # Full-text matches narrow the filter and decide the order
+    text_scores = await text_search.venue_index.search(db, q) if q and q.strip() else None
+    find_query = query if text_scores is None else {**query, "id": {"$in": list(text_scores)}}
+    
+    async def facet_counts():
+        if not facets:
+            return None
+        return await search_facets.facet_counts(db, "venues", query, text_scores)
+    
+    venues, counts = await asyncio.gather(
+        db.venues.find(find_query, projection).to_list(1000),
+        facet_counts()
+    )
+    if text_scores is not None:
+        venues.sort(key=lambda venue: -text_scores[venue["id"]])
+    return venues, counts
+
+@api_router.get("/venues/search")
+async def search_venues(
+    zip_code: Optional[str] = None,
+    city: Optional[str] = None,
+    radius: Optional[int] = 25,  # Default 25 miles
+    venue_type: Optional[str] = None,
+    capacity_min: Optional[int] = None,
+    capacity_max: Optional[int] = None,
+    budget_min: Optional[float] = None,
+    budget_max: Optional[float] = None,
+    preferred_venue_type: Optional[str] = None,  # New filtering parameter
+    q: Optional[str] = None,  # Free text over names, descriptions, amenities
+    facets: bool = False,  # Respond with {results, total, facets}
+    fields: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Search venues based on location and criteria with preference filtering"""
+    serializer = VENUE_SERIALIZER.select(fields)
+    venues, counts = await find_search_venues(
+        zip_code=zip_code,
+        city=city,
+        venue_type=venue_type,
+        capacity_min=capacity_min,
+        capacity_max=capacity_max,
+        budget_min=budget_min,
+        budget_max=budget_max,
+        preferred_venue_type=preferred_venue_type,
+        q=q,
+        projection=serializer.projection,
+        facets=facets
+    )
+    if facets:
+        return json_response({
+            "results": serializer.load_many(venues, trusted=False),
+            "total": len(venues),
+            "facets": counts
+        })
+    return serializer.many(venues, trusted=False)
 
 @api_router.post("/events/{event_id}/select-venue")
 async def select_venue_for_event(
@@ -601,7 +684,7 @@ async def select_venue_for_event(
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     
-    update_data = {"updated_at": datetime.utcnow()}
+    update_data = sync.stamp()
     
     if "venue_id" in venue_data:
         # Using existing venue
@@ -628,6 +711,9 @@ async def select_venue_for_event(
     
     # Get updated event
     updated_event = await db.events.find_one({"id": event_id, "user_id": current_user["id"]})
+    # The history summary shows the venue
+    if event.get("status") == "completed":
+        await event_history.refresh(db, event_id)
     return Event(**updated_event)
 
 
@@ -635,11 +721,14 @@ async def select_venue_for_event(
 # Venue Routes
 @api_router.get("/venues", response_model=List[Venue])
 async def get_venues(
+    request: Request,
     location: Optional[str] = None,
     venue_type: Optional[str] = None,
     min_capacity: Optional[int] = None,
-    max_price: Optional[float] = None
+    max_price: Optional[float] = None,
+    fields: Optional[str] = None
 ):
+    serializer = VENUE_SERIALIZER.select(fields)
     query = {}
     if location:
         query["location"] = {"$regex": location, "$options": "i"}
@@ -650,15 +739,21 @@ async def get_venues(
     if max_price:
         query["price_per_person"] = {"$lte": max_price}
     
-    venues = await db.venues.find(query).to_list(1000)
-    return [Venue(**venue) for venue in venues]
+    async def load():
+        venues = await db.venues.find(query, serializer.projection).to_list(1000)
+        return serializer.many(venues, trusted=False)
+    
+    return await catalog_cache.serve(request, ["venues"], load)
 
 @api_router.get("/venues/{venue_id}", response_model=Venue)
-async def get_venue(venue_id: str):
-    venue = await db.venues.find_one({"id": venue_id})
-    if not venue:
-        raise HTTPException(status_code=404, detail="Venue not found")
-    return Venue(**venue)
+async def get_venue(venue_id: str, request: Request):
+    async def load():
+        venue = await db.venues.find_one({"id": venue_id}, VENUE_SERIALIZER.projection)
+        if not venue:
+            raise HTTPException(status_code=404, detail="Venue not found")
+        return VENUE_SERIALIZER.one(venue, trusted=False)
+    
+    return await catalog_cache.serve(request, [f"venue:{venue_id}"], load)
 
 @api_router.post("/venues", response_model=Venue)
 async def create_venue(venue_data: dict, current_user: dict = Depends(get_current_user)):
@@ -668,6 +763,7 @@ async def create_venue(venue_data: dict, current_user: dict = Depends(get_curren
         venue_dict["id"] = str(uuid.uuid4())
     
     await db.venues.insert_one(venue_dict)
+    await catalog_sync.venues_written(db, venue_dict["id"])
     return Venue(**venue_dict)
 
 # Enhanced Vendor Routes with Filtering
@@ -680,14 +776,77 @@ async def search_vendors(
     location: Optional[str] = None,
     event_id: Optional[str] = None,
     services_needed: Optional[str] = None,  # New parameter for filtering by needed services
+    q: Optional[str] = None,  # Free text over names, descriptions, specialties
+    latitude: Optional[float] = None,
+    longitude: Optional[float] = None,
+    limit: int = Query(vendor_ranking.PAGE_SIZE, ge=1, le=vendor_ranking.MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    facets: bool = False,
+    fields: Optional[str] = None,
     current_user: dict = Depends(get_current_user)
 ):
-    """Enhanced vendor search with event-specific filtering"""
+    """Enhanced vendor search with event-specific filtering, best matches first
+    
+    With facets=true the response is {results, total, facets} so the filter
+    sidebar gets its counts in the same request. Each vendor carries
+    is_favorite for the current user.
+    """
+    serializer = VENDOR_SERIALIZER.select(fields)
+    vendors, total, facet_counts = await find_search_vendors(
+        budget_min=budget_min,
+        budget_max=budget_max,
+        service_type=service_type,
+        cultural_style=cultural_style,
+        location=location,
+        event_id=event_id,
+        services_needed=services_needed,
+        projection=serializer.projection,
+        current_user=current_user,
+        q=q,
+        latitude=latitude,
+        longitude=longitude,
+        limit=limit,
+        offset=offset,
+        facets=facets
+    )
+    favorite_ids = await vendor_favorites.favorites.ids(db, current_user["id"])
+    results = [
+        {**vendor.model_dump(mode="json"), "is_favorite": vendor.id in favorite_ids}
+        for vendor in serializer.load_many(vendors, trusted=False)
+    ]
+    if facets:
+        return json_response({"results": results, "total": total, "facets": facet_counts})
+    return json_response(results, headers={"X-Total-Count": str(total)})
+
+async def find_search_vendors(
+    current_user: dict,
+    budget_min: Optional[float] = None,
+    budget_max: Optional[float] = None,
+    service_type: Optional[str] = None,
+    cultural_style: Optional[str] = None,
+    location: Optional[str] = None,
+    event_id: Optional[str] = None,
+    services_needed: Optional[str] = None,
+    projection: Optional[dict] = None,
+    event_context: Optional[dict] = None,
+    q: Optional[str] = None,
+    latitude: Optional[float] = None,
+    longitude: Optional[float] = None,
+    limit: int = vendor_ranking.PAGE_SIZE,
+    offset: int = 0,
+    facets: bool = False
+) -> Tuple[List[dict], int, Optional[dict]]:
+    """One relevance-ranked page of vendors matching the search filters and
+    event context, the total number of matches and, when asked, facet counts
+    
+    Callers that already verified the event pass it as event_context to skip
+    the lookup. The event's services_needed outranks service_type, so planner
+    steps that must list one service pass it as services_needed.
+    """
     query = {}
     
     # Get event details if event_id is provided for contextual filtering
-    event_context = None
-    if event_id:
+    if event_id and event_context is None:
         event_context = await db.events.find_one({"id": event_id, "user_id": current_user["id"]})
     
     # Service type filtering - prioritize services needed from event context
@@ -758,17 +917,37 @@ async def search_vendors(
     elif event_context and event_context.get("location"):
         query["location"] = {"$regex": event_context["location"], "$options": "i"}
     
-    vendors = await db.vendors.find(query).to_list(1000)
-    return [Vendor(**vendor) for vendor in vendors]
+    # Budget fit scores against the event budget when no explicit range is given
+    if budget_min is None and budget_max is None and event_context:
+        budget_max = event_context.get("budget")
+    context = vendor_ranking.RankingContext(budget_min, budget_max, filter_cultural, latitude, longitude)
+    text_scores = await text_search.vendor_index.search(db, q) if q and q.strip() else None
+    blocked = await vendor_blocks.blocks.blocked(db, current_user["id"])
+    
+    async def facet_counts():
+        if not facets:
+            return None
+        return await search_facets.facet_counts(db, "vendors", query, text_scores, exclude=blocked)
+    
+    (vendors, total), counts = await asyncio.gather(
+        vendor_ranking.ranker.rank(
+            db, query, context, projection or VENDOR_SERIALIZER.projection, limit, offset, text_scores, exclude=blocked
+        ),
+        facet_counts()
+    )
+    return vendors, total, counts
 
 @api_router.get("/vendors", response_model=List[Vendor])
 async def get_vendors(
+    request: Request,
     service_type: Optional[str] = None,
     location: Optional[str] = None,
     cultural_style: Optional[str] = None,
     budget_min: Optional[float] = None,
-    budget_max: Optional[float] = None
+    budget_max: Optional[float] = None,
+    fields: Optional[str] = None
 ):
+    serializer = VENDOR_SERIALIZER.select(fields)
     query = {}
     
     if service_type:
@@ -794,15 +973,98 @@ async def get_vendors(
             {"base_price": budget_query}
         ]
     
-    vendors = await db.vendors.find(query).to_list(1000)
-    return [Vendor(**vendor) for vendor in vendors]
+    async def load():
+        vendors = await db.vendors.find(query, serializer.projection).to_list(1000)
+        return serializer.many(vendors, trusted=False)
+    
+    return await catalog_cache.serve(request, ["vendors"], load)
+
+# Vendor Favorites Routes
+# Registered before /vendors/{vendor_id} so "favorites" is not taken for a vendor id
+@api_router.get("/vendors/favorites")
+async def get_favorite_vendors(current_user: dict = Depends(get_current_user)):
+    """Get user's favorite vendors"""
+    vendor_ids = await vendor_favorites.favorites.ids(db, current_user["id"])
+    if not vendor_ids:
+        return []
+    vendors = await db.vendors.find({"id": {"$in": list(vendor_ids)}}, VENDOR_SERIALIZER.projection).to_list(None)
+    return VENDOR_SERIALIZER.many(vendors, trusted=False)
+
+@api_router.post("/vendors/{vendor_id}/favorite")
+async def toggle_vendor_favorite(vendor_id: str, current_user: dict = Depends(get_current_user)):
+    """Toggle vendor as favorite for the current user"""
+    favorited = await vendor_favorites.favorites.toggle(db, current_user["id"], vendor_id)
+    vendor_recommendations.recommender.invalidate(current_user["id"])
+    if favorited:
+        return {"message": "Vendor added to favorites", "favorited": True}
+    return {"message": "Vendor removed from favorites", "favorited": False}
 
 @api_router.get("/vendors/{vendor_id}", response_model=Vendor)
-async def get_vendor(vendor_id: str):
-    vendor = await db.vendors.find_one({"id": vendor_id})
-    if not vendor:
-        raise HTTPException(status_code=404, detail="Vendor not found")
-    return Vendor(**vendor)
+async def get_vendor(vendor_id: str, request: Request):
+    async def load():
+        vendor = await db.vendors.find_one({"id": vendor_id}, VENDOR_SERIALIZER.projection)
+        if not vendor:
+            raise HTTPException(status_code=404, detail="Vendor not found")
+        return VENDOR_SERIALIZER.one(vendor, trusted=False)
+    
+    return await catalog_cache.serve(request, [f"vendor:{vendor_id}"], load)
+
+@api_router.get("/vendors/{vendor_id}/similar")
+async def get_similar_vendors(
+    vendor_id: str,
+    request: Request,
+    limit: int = Query(10, ge=1, le=vendor_similarity.NEIGHBORS),
+    fields: Optional[str] = None,
+    current_user: Optional[dict] = Depends(get_optional_user)
+):
+    """Vendors similar to this one, precomputed by vendor_similarity.py"""
+    serializer = VENDOR_SERIALIZER.select(fields)
+    blocked = await vendor_blocks.blocks.blocked(db, current_user["id"]) if current_user else frozenset()
+
+    async def load():
+        entry = await db.vendor_similar.find_one({"vendor_id": vendor_id}, {"_id": 0, "neighbors": 1})
+        if entry is None:
+            if not await db.vendors.find_one({"id": vendor_id}, {"_id": 1}):
+                raise HTTPException(status_code=404, detail="Vendor not found")
+            return serializer.many([], trusted=False)
+        neighbors = [neighbor for neighbor in entry["neighbors"] if neighbor["vendor_id"] not in blocked][:limit]
+        found = await db.vendors.find(
+            {"id": {"$in": [neighbor["vendor_id"] for neighbor in neighbors]}}, serializer.projection
+        ).to_list(limit)
+        by_id = {vendor["id"]: vendor for vendor in found}
+        return serializer.many([by_id[neighbor["vendor_id"]] for neighbor in neighbors if neighbor["vendor_id"] in by_id], trusted=False)
+
+    if blocked:
+        # Filtered per user, so not shared through the response cache
+        return await load()
+    return await catalog_cache.serve(request, ["vendors", f"vendor:{vendor_id}"], load)
+
+# Review Routes
+class ReviewCreate(BaseModel):
+    vendor_id: str
+    rating: int = Field(ge=1, le=5)
+    comment: str = ""
+    event_id: Optional[str] = None
+
+@api_router.post("/reviews")
+async def create_review(review_data: ReviewCreate, current_user: dict = Depends(get_current_user)):
+    """Review a vendor and update its rating aggregates"""
+    review = await vendor_reviews.create(
+        db, current_user, review_data.vendor_id, review_data.rating, review_data.comment.strip(), review_data.event_id
+    )
+    await catalog_sync.vendor_stats_written(db, review_data.vendor_id)
+    if review_data.event_id:
+        await event_history.refresh(db, review_data.event_id)
+    return json_response(review)
+
+@api_router.get("/vendors/{vendor_id}/reviews")
+async def get_vendor_reviews(
+    vendor_id: str,
+    limit: int = Query(vendor_reviews.PAGE_SIZE, ge=1, le=vendor_reviews.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    """Reviews of a vendor, newest first; pass next_cursor back as cursor for the next page"""
+    return json_response(await vendor_reviews.page(db, vendor_id, limit, cursor))
 
 @api_router.post("/vendors", response_model=Vendor)
 async def create_vendor(vendor_data: dict, current_user: dict = Depends(get_current_user)):
@@ -814,52 +1076,27 @@ async def create_vendor(vendor_data: dict, current_user: dict = Depends(get_curr
         vendor_dict["created_at"] = datetime.utcnow()
     
     await db.vendors.insert_one(vendor_dict)
+    await catalog_sync.vendors_written(db, vendor_dict["id"])
     return Vendor(**vendor_dict)
 
-# Vendor Favorites Routes
-@api_router.post("/vendors/{vendor_id}/favorite")
-async def toggle_vendor_favorite(vendor_id: str, current_user: dict = Depends(get_current_user)):
-    """Toggle vendor as favorite for the current user"""
-    user_id = current_user["id"]
-    
-    # Check if vendor exists
-    vendor = await db.vendors.find_one({"id": vendor_id})
-    if not vendor:
-        raise HTTPException(status_code=404, detail="Vendor not found")
-    
-    # Check if already favorited
-    favorite = await db.vendor_favorites.find_one({"user_id": user_id, "vendor_id": vendor_id})
-    
-    if favorite:
-        # Remove from favorites
-        await db.vendor_favorites.delete_one({"user_id": user_id, "vendor_id": vendor_id})
-        return {"message": "Vendor removed from favorites", "favorited": False}
-    else:
-        # Add to favorites
-        favorite_data = {
-            "id": str(uuid.uuid4()),
-            "user_id": user_id,
-            "vendor_id": vendor_id,
-            "created_at": datetime.utcnow()
-        }
-        await db.vendor_favorites.insert_one(favorite_data)
-        return {"message": "Vendor added to favorites", "favorited": True}
-
-@api_router.get("/vendors/favorites")
-async def get_favorite_vendors(current_user: dict = Depends(get_current_user)):
-    """Get user's favorite vendors"""
-    user_id = current_user["id"]
-    
-    # Get favorite vendor IDs
-    favorites = await db.vendor_favorites.find({"user_id": user_id}).to_list(1000)
-    vendor_ids = [fav["vendor_id"] for fav in favorites]
-    
-    if not vendor_ids:
-        return []
-    
-    # Get vendor details
-    vendors = await db.vendors.find({"id": {"$in": vendor_ids}}).to_list(1000)
-    return [Vendor(**vendor) for vendor in vendors]
+# Typeahead
+@api_router.get("/suggest")
+async def get_suggestions(
+    prefix: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(8, ge=1, le=25),
+    types: Optional[str] = None,  # comma-separated: vendor, venue, city, zip
+    current_user: Optional[dict] = Depends(get_optional_user)
+):
+    """Autocomplete vendor and venue names, cities and ZIP codes"""
+    selected = None
+    if types:
+        selected = tuple(sorted({name.strip() for name in types.split(",") if name.strip()}))
+        unknown = [name for name in selected if name not in suggest.TYPES]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown suggestion type(s): {', '.join(unknown)}")
+    blocked = await vendor_blocks.blocks.blocked(db, current_user["id"]) if current_user else frozenset()
+    suggestions = await suggest.index.suggest(db, prefix, limit, selected, exclude=blocked)
+    return json_response({"prefix": prefix, "suggestions": suggestions})
 
 # Message Routes
 class Message(BaseModel):
@@ -870,6 +1107,10 @@ class Message(BaseModel):
     timestamp: datetime = Field(default_factory=datetime.utcnow)
     read: bool = False
 
+MESSAGE_SERIALIZER = ModelSerializer(Message, presets={
+    "card": ["id", "sender_id", "receiver_id", "timestamp", "read"]
+})
+
 @api_router.post("/messages")
 async def send_message(message_data: dict, current_user: dict = Depends(get_current_user)):
     message_dict = {
@@ -885,15 +1126,16 @@ async def send_message(message_data: dict, current_user: dict = Depends(get_curr
     return Message(**message_dict)
 
 @api_router.get("/messages")
-async def get_messages(current_user: dict = Depends(get_current_user)):
+async def get_messages(fields: Optional[str] = None, current_user: dict = Depends(get_current_user)):
+    serializer = MESSAGE_SERIALIZER.select(fields)
     messages = await db.messages.find({
         "$or": [
             {"sender_id": current_user["id"]},
             {"receiver_id": current_user["id"]}
         ]
-    }).sort("timestamp", 1).to_list(1000)
+    }, serializer.projection).sort("timestamp", 1).to_list(1000)
     
-    return [Message(**message) for message in messages]
+    return serializer.many(messages)
 
 # Budget Calculation Route
 @api_router.post("/events/temp/calculate-budget")
@@ -985,7 +1227,7 @@ async def calculate_budget(event_id: str, requirements: dict, current_user: dict
     # Update event with estimated budget
     await db.events.update_one(
         {"id": event_id},
-        {"$set": {"estimated_budget": total_estimated}}
+        {"$set": {"estimated_budget": total_estimated, **sync.stamp()}}
     )
     
     return {
@@ -1023,21 +1265,30 @@ async def create_vendor_booking(
         "booking_date": datetime.utcnow(),
         "event_date": event["date"],
         "notes": booking_data.get("notes"),
-        "invoice_id": f"INV-{str(uuid.uuid4())[:8]}"
+        "invoice_id": f"INV-{str(uuid.uuid4())[:8]}",
+        "version": sync.next_version()
     }
     
     await db.vendor_bookings.insert_one(booking_dict)
+    vendor_recommendations.recommender.invalidate(current_user["id"])
+    if event.get("status") == "completed":
+        await event_history.refresh(db, event_id)
     return VendorBooking(**booking_dict)
 
 @api_router.get("/events/{event_id}/vendor-bookings")
-async def get_event_vendor_bookings(event_id: str, current_user: dict = Depends(get_current_user)):
+async def get_event_vendor_bookings(
+    event_id: str,
+    fields: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
     # Verify event belongs to user
     event = await db.events.find_one({"id": event_id, "user_id": current_user["id"]})
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     
-    bookings = await db.vendor_bookings.find({"event_id": event_id}).to_list(1000)
-    return [VendorBooking(**booking) for booking in bookings]
+    serializer = BOOKING_SERIALIZER.select(fields)
+    bookings = await db.vendor_bookings.find({"event_id": event_id}, serializer.projection).to_list(1000)
+    return serializer.many(bookings)
 
 # Payment Routes
 @api_router.post("/vendor-bookings/{booking_id}/payments", response_model=Payment)
@@ -1067,7 +1318,8 @@ async def create_payment(
         "payment_date": datetime.utcnow(),
         "description": payment_data.get("description", f"{payment_data.get('payment_type', 'deposit').title()} payment for {booking['service_name']}"),
         "reference_number": f"REF-{str(uuid.uuid4())[:8]}",
-        "status": "completed"
+        "status": "completed",
+        "version": sync.next_version()
     }
     
     await db.payments.insert_one(payment_dict)
@@ -1076,8 +1328,10 @@ async def create_payment(
     if payment_data.get("payment_type") == "deposit":
         await db.vendor_bookings.update_one(
             {"id": booking_id},
-            {"$set": {"deposit_paid": True, "status": "confirmed"}}
+            {"$set": {"deposit_paid": True, "status": "confirmed", **sync.stamp()}}
         )
+    if event.get("status") == "completed":
+        await event_history.refresh(db, event["id"])
     
     return Payment(**payment_dict)
 
@@ -1130,30 +1384,35 @@ async def get_planner_state(event_id: str, current_user: dict = Depends(get_curr
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     
-    # Get existing state or create new one
-    state = await db.event_planner_states.find_one({"event_id": event_id})
+    state = await find_or_create_planner_state(event)
+    return EventPlannerState(**state)
+
+async def find_or_create_planner_state(event: dict) -> dict:
+    """Existing planner state for an (already verified) event, created on first use"""
+    state = await db.event_planner_states.find_one({"event_id": event["id"]})
     
     if not state:
-        # Create new planner state
-        state_dict = {
+        # Create new planner state; events may be stored with budget None
+        budget = event.get("budget") or 0.0
+        state = {
             "id": str(uuid.uuid4()),
-            "event_id": event_id,
+            "event_id": event["id"],
             "current_step": 0,
             "completed_steps": [],
             "cart_items": [],
             "step_data": {},
             "budget_tracking": {
-                "set_budget": event.get("budget", 0.0),
+                "set_budget": budget,
                 "selected_total": 0.0,
-                "remaining": event.get("budget", 0.0)
+                "remaining": budget
             },
             "created_at": datetime.utcnow(),
-            "updated_at": None
+            "updated_at": None,
+            "version": sync.next_version()
         }
-        await db.event_planner_states.insert_one(state_dict)
-        state = state_dict
+        await db.event_planner_states.insert_one(state)
     
-    return EventPlannerState(**state)
+    return state
 
 @api_router.post("/events/{event_id}/planner/state")
 async def save_planner_state(event_id: str, state_data: dict, current_user: dict = Depends(get_current_user)):
@@ -1164,7 +1423,7 @@ async def save_planner_state(event_id: str, state_data: dict, current_user: dict
         raise HTTPException(status_code=404, detail="Event not found")
     
     # Update state
-    state_data["updated_at"] = datetime.utcnow()
+    state_data.update(sync.stamp())
     
     await db.event_planner_states.update_one(
         {"event_id": event_id},
@@ -1182,64 +1441,66 @@ async def get_planner_steps(event_id: str, current_user: dict = Depends(get_curr
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     
-    # Define all 10 planning steps
-    steps = [
-        {"id": "planning", "title": "Start Planning", "subtitle": "Event overview and setup", "service_type": None},
-        {"id": "venue", "title": "Venue", "subtitle": "Find your perfect location", "service_type": "venue"},
-        {"id": "decoration", "title": "Decoration", "subtitle": "Style and ambiance", "service_type": "decoration"},
-        {"id": "catering", "title": "Catering", "subtitle": "Food and beverages", "service_type": "catering"},
-        {"id": "bar", "title": "Bar Service", "subtitle": "Drinks and bartending", "service_type": "bar"},
-        {"id": "planner", "title": "Event Planner", "subtitle": "Professional coordination", "service_type": "planner"},
-        {"id": "photography", "title": "Photography", "subtitle": "Capture the moments", "service_type": "photography"},
-        {"id": "dj", "title": "DJ & Music", "subtitle": "Entertainment and sound", "service_type": "music"},
-        {"id": "staffing", "title": "Waitstaff", "subtitle": "Service and support staff", "service_type": "staffing"},
-        {"id": "entertainment", "title": "Entertainment", "subtitle": "Special performances", "service_type": "entertainment"},
-        {"id": "review", "title": "Review", "subtitle": "Finalize your plan", "service_type": None}
-    ]
-    
-    # Filter steps based on event's services_needed if available
+    return filter_planner_steps(event)
+
+# All 10 planning steps
+PLANNER_STEPS = [
+    {"id": "planning", "title": "Start Planning", "subtitle": "Event overview and setup", "service_type": None},
+    {"id": "venue", "title": "Venue", "subtitle": "Find your perfect location", "service_type": "venue"},
+    {"id": "decoration", "title": "Decoration", "subtitle": "Style and ambiance", "service_type": "decoration"},
+    {"id": "catering", "title": "Catering", "subtitle": "Food and beverages", "service_type": "catering"},
+    {"id": "bar", "title": "Bar Service", "subtitle": "Drinks and bartending", "service_type": "bar"},
+    {"id": "planner", "title": "Event Planner", "subtitle": "Professional coordination", "service_type": "planner"},
+    {"id": "photography", "title": "Photography", "subtitle": "Capture the moments", "service_type": "photography"},
+    {"id": "dj", "title": "DJ & Music", "subtitle": "Entertainment and sound", "service_type": "music"},
+    {"id": "staffing", "title": "Waitstaff", "subtitle": "Service and support staff", "service_type": "staffing"},
+    {"id": "entertainment", "title": "Entertainment", "subtitle": "Special performances", "service_type": "entertainment"},
+    {"id": "review", "title": "Review", "subtitle": "Finalize your plan", "service_type": None}
+]
+
+# Map step services to event service names
+PLANNER_STEP_SERVICES = {
+    "venue": ["venue"],
+    "decoration": ["decoration", "decor"],
+    "catering": ["catering", "food"],
+    "bar": ["bar", "drinks"],
+    "planner": ["planner", "coordinator"],
+    "photography": ["photography", "photo"],
+    "music": ["music/dj", "dj", "music", "entertainment"],
+    "staffing": ["staffing", "waitstaff", "service"],
+    "entertainment": ["entertainment", "performer"]
+}
+
+def filter_planner_steps(event: dict) -> List[dict]:
+    """Planning steps for an event, filtered by its services_needed if available"""
     event_services = event.get("services_needed", [])
-    if event_services:
-        # Keep planning and review steps, filter others based on needed services
-        filtered_steps = []
+    if not event_services:
+        return PLANNER_STEPS
+    
+    # Keep planning and review steps, filter others based on needed services
+    needed_services = ' '.join(s.lower() for s in event_services)
+    filtered_steps = []
+    
+    for step in PLANNER_STEPS:
+        # Always include planning and review steps
+        if step["id"] in ["planning", "review"]:
+            filtered_steps.append(step)
+            continue
         
-        for step in steps:
-            # Always include planning and review steps
-            if step["id"] in ["planning", "review"]:
+        # Check if any event service matches this step
+        step_service = step.get("service_type")
+        if step_service:
+            step_matches = PLANNER_STEP_SERVICES.get(step_service, [step_service])
+            if any(match.lower() in needed_services for match in step_matches):
                 filtered_steps.append(step)
-                continue
-            
-            # Check if this step's service is needed
-            step_service = step.get("service_type")
-            if step_service:
-                # Map step services to event service names
-                service_mappings = {
-                    "venue": ["venue"],
-                    "decoration": ["decoration", "decor"],
-                    "catering": ["catering", "food"],
-                    "bar": ["bar", "drinks"],
-                    "planner": ["planner", "coordinator"],
-                    "photography": ["photography", "photo"],
-                    "music": ["music/dj", "dj", "music", "entertainment"],
-                    "staffing": ["staffing", "waitstaff", "service"],
-                    "entertainment": ["entertainment", "performer"]
-                }
-                
-                # Check if any event service matches this step
-                needed_services_lower = [s.lower() for s in event_services]
-                step_matches = service_mappings.get(step_service, [step_service])
-                
-                if any(match.lower() in ' '.join(needed_services_lower) for match in step_matches):
-                    filtered_steps.append(step)
-        
-        return filtered_steps
     
-    return steps
+    return filtered_steps
 
 @api_router.get("/events/{event_id}/planner/vendors/{service_type}")
 async def get_planner_vendors(
     event_id: str, 
     service_type: str, 
+    fields: Optional[str] = None,
     current_user: dict = Depends(get_current_user)
 ):
     """Get vendors for a specific service type with event context filtering"""
@@ -1249,15 +1510,97 @@ async def get_planner_vendors(
         raise HTTPException(status_code=404, detail="Event not found")
     
     # Use the enhanced search with event context
-    vendors = await search_vendors(
-        service_type=service_type,
+    serializer = VENDOR_SERIALIZER.select(fields)
+    vendors, _, _ = await find_search_vendors(
+        services_needed=service_type,
         event_id=event_id,
         budget_min=None,
         budget_max=event.get("budget"),
-        current_user=current_user
+        projection=serializer.projection,
+        current_user=current_user,
+        event_context=event
     )
     
-    return vendors
+    return serializer.many(vendors, trusted=False)
+
+def version_stamp(*documents: dict) -> Optional[str]:
+    """Latest modification time across documents, for client-side delta refreshes"""
+    stamps = [
+        document.get("updated_at") or document.get("saved_at") or document.get("created_at")
+        for document in documents
+    ]
+    stamps = [stamp for stamp in stamps if isinstance(stamp, datetime)]
+    return max(stamps).isoformat() if stamps else None
+
+@api_router.get("/events/{event_id}/planner/bootstrap")
+async def get_planner_bootstrap(
+    event_id: str,
+    fields: Optional[str] = "card",
+    current_user: dict = Depends(get_current_user)
+):
+    """Everything the interactive planner needs on open, in one call"""
+    # Verify event belongs to user once for the whole payload
+    event = await db.events.find_one({"id": event_id, "user_id": current_user["id"]})
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+    
+    steps = filter_planner_steps(event)
+    first_step = next((step for step in steps if step["service_type"]), None)
+    serializer = VENDOR_SERIALIZER.select(fields)
+    venue_serializer = VENUE_SERIALIZER.select(fields)
+    
+    async def first_step_venues():
+        if not first_step or first_step["id"] != "venue":
+            return []
+        # The same filters the planner's venue step sends to /venues/search
+        guest_count = event.get("guest_count")
+        venues, _ = await find_search_venues(
+            city=event.get("location"),
+            capacity_min=math.floor(guest_count * 0.8) if guest_count else None,
+            capacity_max=math.ceil(guest_count * 1.2) if guest_count else None,
+            preferred_venue_type=event.get("preferred_venue_type"),
+            projection=venue_serializer.projection
+        )
+        return venues
+    
+    async def first_step_vendors():
+        if not first_step or first_step["id"] == "venue":
+            return []
+        vendors, _, _ = await find_search_vendors(
+            services_needed=first_step["service_type"],
+            event_id=event_id,
+            budget_max=event.get("budget"),
+            projection=serializer.projection,
+            current_user=current_user,
+            event_context=event
+        )
+        return vendors
+    
+    state, scenarios, venues, vendors = await asyncio.gather(
+        find_or_create_planner_state(event),
+        db.planner_scenarios.find({"event_id": event_id}, SCENARIO_SERIALIZER.projection).to_list(1000),
+        first_step_venues(),
+        first_step_vendors()
+    )
+    planner_state = EventPlannerState(**state)
+    
+    return json_response({
+        "event": EVENT_SERIALIZER.shape(event),
+        "planner_state": planner_state,
+        "steps": steps,
+        "cart": planner_state.cart_items,
+        "scenarios": SCENARIO_SERIALIZER.load_many(scenarios),
+        "first_step": {
+            "step_id": first_step["id"] if first_step else None,
+            "venues": venue_serializer.load_many(venues, trusted=False),
+            "vendors": serializer.load_many(vendors, trusted=False)
+        },
+        "versions": {
+            "event": version_stamp(event),
+            "planner_state": version_stamp(state),
+            "scenarios": f"{len(scenarios)}:{version_stamp(*scenarios) or ''}"
+        }
+    })
 
 # Shopping Cart Routes
 @api_router.get("/events/{event_id}/cart")
@@ -1312,7 +1655,8 @@ async def add_to_cart(event_id: str, item_data: dict, current_user: dict = Depen
                 "selected_total": 0.0,
                 "remaining": event.get("budget", 0.0)
             },
-            "created_at": datetime.utcnow()
+            "created_at": datetime.utcnow(),
+            "version": sync.next_version()
         }
         await db.event_planner_states.insert_one(state)
     
@@ -1332,7 +1676,7 @@ async def add_to_cart(event_id: str, item_data: dict, current_user: dict = Depen
             "$set": {
                 "cart_items": cart_items,
                 "budget_tracking": budget_tracking,
-                "updated_at": datetime.utcnow()
+                **sync.stamp()
             }
         }
     )
@@ -1368,7 +1712,7 @@ async def remove_from_cart(event_id: str, item_id: str, current_user: dict = Dep
             "$set": {
                 "cart_items": cart_items,
                 "budget_tracking": budget_tracking,
-                "updated_at": datetime.utcnow()
+                **sync.stamp()
             }
         }
     )
@@ -1396,7 +1740,7 @@ async def clear_cart(event_id: str, current_user: dict = Depends(get_current_use
             "$set": {
                 "cart_items": [],
                 "budget_tracking": budget_tracking,
-                "updated_at": datetime.utcnow()
+                **sync.stamp()
             }
         }
     )
@@ -1433,8 +1777,8 @@ async def get_scenarios(event_id: str, current_user: dict = Depends(get_current_
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     
-    scenarios = await db.planner_scenarios.find({"event_id": event_id}).to_list(1000)
-    return [PlannerScenario(**scenario) for scenario in scenarios]
+    scenarios = await db.planner_scenarios.find({"event_id": event_id}, SCENARIO_SERIALIZER.projection).to_list(1000)
+    return SCENARIO_SERIALIZER.many(scenarios)
 
 @api_router.delete("/events/{event_id}/planner/scenarios/{scenario_id}")
 async def delete_scenario(event_id: str, scenario_id: str, current_user: dict = Depends(get_current_user)):
@@ -1506,12 +1850,14 @@ async def finalize_event_plan(event_id: str, current_user: dict = Depends(get_cu
             "booking_date": datetime.utcnow(),
             "event_date": event["date"],
             "notes": item.get("notes"),
-            "invoice_id": f"INV-{str(uuid.uuid4())[:8]}"
+            "invoice_id": f"INV-{str(uuid.uuid4())[:8]}",
+            "version": sync.next_version()
         }
         
         await db.vendor_bookings.insert_one(booking_dict)
         bookings_created.append(VendorBooking(**booking_dict))
         total_cost += booking_dict["cost"]
+    vendor_recommendations.recommender.invalidate(current_user["id"])
     
     # Create calendar events for payment deadlines
     payment_deadlines = [
@@ -1533,7 +1879,8 @@ async def finalize_event_plan(event_id: str, current_user: dict = Depends(get_cu
             "all_day": True,
             "related_id": event_id,
             "notification_sent": False,
-            "created_at": datetime.utcnow()
+            "created_at": datetime.utcnow(),
+            "version": sync.next_version()
         }
         
         await db.calendar_events.insert_one(calendar_event)
@@ -1549,7 +1896,7 @@ async def finalize_event_plan(event_id: str, current_user: dict = Depends(get_cu
                     "selected_total": 0.0,
                     "remaining": state["budget_tracking"].get("set_budget", 0.0)
                 },
-                "updated_at": datetime.utcnow()
+                **sync.stamp()
             }
         }
     )
@@ -1557,8 +1904,11 @@ async def finalize_event_plan(event_id: str, current_user: dict = Depends(get_cu
     # Update event status
     await db.events.update_one(
         {"id": event_id},
-        {"$set": {"status": "booked", "updated_at": datetime.utcnow()}}
+        {"$set": {"status": "booked", **sync.stamp()}}
     )
+    # Reopening a completed event drops its history summary
+    if event.get("status") == "completed":
+        await event_history.refresh(db, event_id)
     
     return {
         "message": f"Event plan finalized successfully! Created {len(bookings_created)} vendor bookings.",
@@ -1611,7 +1961,8 @@ async def create_calendar_event(
         "location": event_data.get("location"),
         "related_id": event_data.get("related_id"),
         "notification_sent": False,
-        "created_at": datetime.utcnow()
+        "created_at": datetime.utcnow(),
+        "version": sync.next_version()
     }
     
     await db.calendar_events.insert_one(calendar_event)
@@ -1620,12 +1971,11 @@ async def create_calendar_event(
 @api_router.delete("/calendar/events/{event_id}")
 async def delete_calendar_event(event_id: str, current_user: dict = Depends(get_current_user)):
     """Delete a calendar event"""
-    result = await db.calendar_events.delete_one({
-        "id": event_id,
-        "user_id": current_user["id"]
-    })
+    deleted_count = await sync.delete_with_tombstones(
+        db, "calendar_events", {"id": event_id, "user_id": current_user["id"]}, current_user["id"]
+    )
     
-    if result.deleted_count == 0:
+    if deleted_count == 0:
         raise HTTPException(status_code=404, detail="Calendar event not found")
     
     return {"message": "Calendar event deleted"}
@@ -1668,7 +2018,7 @@ async def set_vendor_availability(
     if user_role != "vendor":
         # Check if user is admin or the specific vendor
         vendor = await db.vendors.find_one({"id": vendor_id})
-        if not vendor or (user_role not in ["admin", "super_admin"]):
+        if not vendor or (user_role not in ADMIN_ROLES):
             raise HTTPException(status_code=403, detail="Permission denied")
     
     availability = {
@@ -1723,7 +2073,8 @@ async def create_appointment(
         "vendor_response": None,
         "vendor_response_at": None,
         "client_confirmed": False,
-        "client_confirmed_at": None
+        "client_confirmed_at": None,
+        "version": sync.next_version()
     }
     
     await db.appointments.insert_one(appointment)
@@ -1768,7 +2119,7 @@ async def respond_to_appointment(
     update_data = {
         "vendor_response": response_data["response"],  # approved, rejected, rescheduled
         "vendor_response_at": datetime.utcnow(),
-        "updated_at": datetime.utcnow()
+        **sync.stamp()
     }
     
     if response_data["response"] == "approved":
@@ -1811,7 +2162,7 @@ async def confirm_appointment(
             "$set": {
                 "client_confirmed": True,
                 "client_confirmed_at": datetime.utcnow(),
-                "updated_at": datetime.utcnow()
+                **sync.stamp()
             }
         }
     )
@@ -1832,7 +2183,8 @@ async def confirm_appointment(
         "location": appointment.get("location"),
         "related_id": appointment_id,
         "notification_sent": False,
-        "created_at": datetime.utcnow()
+        "created_at": datetime.utcnow(),
+        "version": sync.next_version()
     }
     
     await db.calendar_events.insert_one(client_event)
@@ -2023,99 +2375,84 @@ async def create_support_ticket(ticket_data: dict, current_user: dict = Depends(
 
 # Event History Route
 @api_router.get("/users/event-history")
-async def get_event_history(current_user: dict = Depends(get_current_user)):
-    """Get user's event history with comprehensive details"""
-    
-    # Mock comprehensive event history data
-    mock_events = [
-        {
-            "id": "evt_history_001",
-            "name": "Sarah's Wedding Reception",
-            "type": "Wedding",
-            "sub_type": "Reception Only",
-            "date": "2023-09-15T18:00:00Z",
-            "status": "completed",
-            "venue": {
-                "name": "Grand Ballroom Plaza",
-                "location": "New York, NY"
-            },
-            "guests": 150,
-            "budget": 25000,
-            "total_spent": 23800,
-            "vendors": [
-                {
-                    "id": "vendor_001",
-                    "name": "Elegant Catering Co.",
-                    "service": "Catering",
-                    "cost": 12000,
-                    "rating": 5,
-                    "review": "Exceptional service and delicious food!"
-                },
-                {
-                    "id": "vendor_002", 
-                    "name": "Perfect Moments Photography",
-                    "service": "Photography",
-                    "cost": 3500,
-                    "rating": 5,
-                    "review": "Beautiful photos that captured every moment perfectly."
-                }
-            ],
-            "cultural_style": "American",
-            "summary": "A magical evening celebrating Sarah and John's union with elegant decor, gourmet cuisine, and unforgettable memories.",
-            "created_date": "2023-06-15T10:30:00Z",
-            "image_url": "https://images.unsplash.com/photo-1519225421980-715cb0215aed?w=800&h=600&fit=crop"
-        },
-        {
-            "id": "evt_history_002",
-            "name": "Corporate Annual Gala",
-            "type": "Corporate Event",
-            "sub_type": "Award Ceremony",
-            "date": "2023-11-20T19:00:00Z",
-            "status": "completed",
-            "venue": {
-                "name": "Metropolitan Conference Center",
-                "location": "Chicago, IL"
-            },
-            "guests": 300,
-            "budget": 45000,
-            "total_spent": 42500,
-            "vendors": [
-                {
-                    "id": "vendor_003",
-                    "name": "Premium Event Solutions",
-                    "service": "Event Planning", 
-                    "cost": 8000,
-                    "rating": 4,
-                    "review": "Professional service with attention to detail."
-                },
-                {
-                    "id": "vendor_004",
-                    "name": "Gourmet Corporate Catering",
-                    "service": "Catering",
-                    "cost": 18000,
-                    "rating": 5,
-                    "review": "Outstanding quality and presentation for our corporate event."
-                }
-            ],
-            "cultural_style": "Other",
-            "summary": "A sophisticated corporate gathering celebrating company achievements with award presentations and networking opportunities.",
-            "created_date": "2023-08-10T14:20:00Z",
-            "image_url": "https://images.unsplash.com/photo-1511578314322-379afb476865?w=800&h=600&fit=crop"
-        }
-    ]
-    
-    return {"events": mock_events}
+async def get_event_history(
+    limit: int = Query(event_history.PAGE_SIZE, ge=1, le=event_history.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Summaries of the user's completed events, most recent first; pass next_cursor back as cursor"""
+    return json_response(await event_history.page(db, current_user["id"], limit, cursor))
 
 # Preferred Vendors Route
 @api_router.get("/users/preferred-vendors")
 async def get_preferred_vendors(current_user: dict = Depends(get_current_user)):
-    """Get user's preferred vendors"""
-    # In a real implementation, this would be based on vendor ratings and usage history
-    # For now, return empty list since this is a new feature
-    return []
+    """Vendors the user has booked or favorited, then vendors recommended from co-occurrence"""
+    vendors = await vendor_recommendations.recommender.preferred(db, current_user["id"], VENDOR_SERIALIZER)
+    return json_response({"vendors": vendors})
+
+# Blocked Vendors Routes
+class BlockVendorRequest(BaseModel):
+    vendor_id: str
+    reason: Optional[str] = None
+
+@api_router.get("/users/blocked-vendors")
+async def get_blocked_vendors(current_user: dict = Depends(get_current_user)):
+    """Vendors the user has blocked, with the reason and date"""
+    entries = await vendor_blocks.blocks.entries(db, current_user["id"])
+    documents = await db.vendors.find(
+        {"id": {"$in": [entry["vendor_id"] for entry in entries]}}, VENDOR_SERIALIZER.projection
+    ).to_list(None)
+    by_id = {vendor.id: vendor for vendor in VENDOR_SERIALIZER.load_many(documents, trusted=False)}
+    vendors = [
+        {**by_id[entry["vendor_id"]].model_dump(mode="json"), "reason": entry.get("reason"), "blocked_date": entry["blocked_date"]}
+        for entry in entries if entry["vendor_id"] in by_id
+    ]
+    return json_response({"vendors": vendors})
+
+@api_router.post("/users/blocked-vendors")
+async def block_vendor(block_request: BlockVendorRequest, current_user: dict = Depends(get_current_user)):
+    """Hide a vendor from the user's search results and recommendations"""
+    if not await db.vendors.find_one({"id": block_request.vendor_id}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Vendor not found")
+    await vendor_blocks.blocks.block(db, current_user["id"], block_request.vendor_id, block_request.reason)
+    vendor_recommendations.recommender.invalidate(current_user["id"])
+    return {"message": "Vendor blocked", "vendor_id": block_request.vendor_id}
+
+@api_router.delete("/users/blocked-vendors/{vendor_id}")
+async def unblock_vendor(vendor_id: str, current_user: dict = Depends(get_current_user)):
+    """Unblock a vendor"""
+    if not await vendor_blocks.blocks.unblock(db, current_user["id"], vendor_id):
+        raise HTTPException(status_code=404, detail="Vendor is not blocked")
+    vendor_recommendations.recommender.invalidate(current_user["id"])
+    return {"message": "Vendor unblocked", "vendor_id": vendor_id}
+
+# Delta Sync
+@api_router.get("/sync")
+async def get_sync_changes(since: Optional[str] = None, current_user: dict = Depends(get_current_user)):
+    """Documents created, updated or deleted since the client's last sync cursor"""
+    return json_response(await sync.collect(db, current_user, since))
+
+# Request Batching
+@api_router.post("/batch")
+async def run_batch(
+    batch_request: batch.BatchRequest,
+    request: Request,
+    current_user: dict = Depends(get_current_user)
+):
+    """Run several API requests concurrently with a single authentication"""
+    batch.validate(batch_request)
+    responses = await batch.run(app.router, request.scope, batch_request, current_user)
+    return json_response({"responses": responses})
 
 # Include the router in the app
 app.include_router(api_router)
+app.include_router(admin_router)
+app.include_router(vendor_router)
+
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 # Root route
 @app.get("/")
@@ -0,0 +1,328 @@
+"""Typeahead suggestions over vendor names, venue names, cities and ZIP codes.
+
+Every suggestion is filed under one or more normalized keys (lowercase,
+accents and punctuation folded). Names are filed under each word position, so
+"cat" finds "Spice Caterers". Keys live in one sorted list with a parallel
+NumPy array of weights: a prefix is two bisects to its range, and the
+heaviest entries in the range come from argpartition. Answers are cached per
+prefix until the next catalog write.
+
+Vendors are weighted by rating, review count and favorites. Cities and ZIP
+codes are weighted by how many vendors and venues are in them.
+
+The index is built from the database on first use. Catalog write paths then
+call ``refresh()``, which re-files only the documents that changed without
+shifting the arrays: a removed entry is tombstoned with a -inf weight, an
+entry that comes back (a document rewritten under the same name) revives
+its slot, and new entries wait in a small pending set that lookups scan
+directly. The arrays are rebuilt once MERGE_THRESHOLD entries are pending or
+dead.
+
+    python suggest_benchmark.py --vendors 100000
+"""
+import asyncio
+import bisect
+import math
+import re
+import unicodedata
+from collections import OrderedDict
+from typing import AbstractSet, Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+MAX_CACHED_PREFIXES = 2048
+MERGE_THRESHOLD = 1024  # pending or tombstoned entries before the arrays are rebuilt
+NAME_WORD_POSITIONS = 4  # words of a name a prefix may start at
+
+SOURCES = {
+    "vendors": ("vendor", {
+        "_id": 0, "id": 1, "name": 1, "location": 1, "city": 1, "zip_code": 1,
+        "rating": 1, "total_reviews": 1, "favorite_count": 1,
+    }),
+    "venues": ("venue", {"_id": 0, "id": 1, "name": 1, "location": 1, "rating": 1}),
+}
+TYPES = ("vendor", "venue", "city", "zip")
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+_ZIP = re.compile(r"\b\d{5}\b")
+
+ItemKey = Tuple[str, str]  # (type, document id or normalized place)
+
+
+def normalize(text: str) -> str:
+    folded = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    return _NON_WORD.sub(" ", folded.lower()).strip()
+
+
+def _places(document: dict) -> List[Tuple[str, str]]:
+    """(type, display text) of the city and ZIP code a document is in"""
+    places = []
+    location = document.get("location") if isinstance(document.get("location"), str) else ""
+    city = document.get("city") or location.split(",")[0]
+    if isinstance(city, str) and city.strip() and not city.strip().isdigit():
+        places.append(("city", city.strip()))
+    zip_code = document.get("zip_code")
+    if not zip_code:
+        match = _ZIP.search(location)
+        zip_code = match.group(0) if match else None
+    if isinstance(zip_code, str) and zip_code.strip():
+        places.append(("zip", zip_code.strip()))
+    return places
+
+
+def _weight(document: dict) -> float:
+    def number(field):
+        value = document.get(field)
+        return float(value) if isinstance(value, (int, float)) and value > 0 else 0.0
+    return 1.0 + number("rating") + math.log1p(number("total_reviews")) + math.log1p(number("favorite_count"))
+
+
+class SuggestIndex:
+    def __init__(self):
+        # Sorted (key, type, ref) entries, with each entry's weight and type code in parallel arrays
+        self._keys: List[Tuple[str, str, str]] = []
+        self._weights = np.zeros(0, dtype=np.float64)
+        self._types = np.zeros(0, dtype=np.int8)
+        # Entries filed since the arrays were last rebuilt, and tombstones left in them
+        self._pending: Set[Tuple[str, str, str]] = set()
+        self._dead = 0
+        self._items: Dict[ItemKey, Dict[str, Any]] = {}
+        self._place_members: Dict[ItemKey, Set[ItemKey]] = {}
+        self._cache: "OrderedDict[Tuple[str, int, Tuple[str, ...]], List[dict]]" = OrderedDict()
+        self._built = False
+        self._lock = asyncio.Lock()
+
+    def _position(self, entry: Tuple[str, str, str]) -> Optional[int]:
+        position = bisect.bisect_left(self._keys, entry)
+        if position < len(self._keys) and self._keys[position] == entry:
+            return position
+        return None
+
+    def _arrange(self, entries):
+        """Sorted keys and weight/type arrays over entries of filed items"""
+        self._keys = sorted({entry for entry in entries if entry[1:] in self._items})
+        self._weights = np.array([self._items[(kind, ref)]["weight"] for _, kind, ref in self._keys], dtype=np.float64)
+        self._types = np.array([TYPES.index(kind) for _, kind, _ in self._keys], dtype=np.int8)
+        self._pending.clear()
+        self._dead = 0
+
+    def _compact_if_needed(self):
+        """Drop tombstones and merge pending entries into the sorted arrays"""
+        if len(self._pending) + self._dead < MERGE_THRESHOLD:
+            return
+        live = self._weights > -math.inf
+        # Lists are spliced a run at a time, so the copying happens in C
+        keys, start = [], 0
+        for dead in np.flatnonzero(~live).tolist():
+            keys.extend(self._keys[start:dead])
+            start = dead + 1
+        keys.extend(self._keys[start:])
+
+        pending = sorted(self._pending)
+        positions = [bisect.bisect_left(keys, entry) for entry in pending]
+        merged, start = [], 0
+        for position, entry in zip(positions, pending):
+            merged.extend(keys[start:position])
+            merged.append(entry)
+            start = position
+        merged.extend(keys[start:])
+
+        # np.insert shifts everything in one pass
+        self._keys = merged
+        self._weights = np.insert(
+            self._weights[live], positions, [self._items[(kind, ref)]["weight"] for _, kind, ref in pending]
+        )
+        self._types = np.insert(self._types[live], positions, [TYPES.index(kind) for _, kind, _ in pending]).astype(np.int8)
+        self._pending.clear()
+        self._dead = 0
+
+    def _file(self, item_key: ItemKey, item: Dict[str, Any]):
+        self._items[item_key] = item
+        for key in item["keys"]:
+            entry = (key, *item_key)
+            if not self._built:
+                # Initial load appends and sorts once at the end
+                self._keys.append(entry)
+                continue
+            position = self._position(entry)
+            if position is None:
+                self._pending.add(entry)
+            else:
+                # Revive the slot this entry had before it was removed
+                self._weights[position] = item["weight"]
+                self._dead -= 1
+
+    def _unfile(self, item_key: ItemKey):
+        item = self._items.pop(item_key)
+        if not self._built:
+            return
+        for key in item["keys"]:
+            entry = (key, *item_key)
+            if entry in self._pending:
+                self._pending.discard(entry)
+                continue
+            position = self._position(entry)
+            if position is not None and self._weights[position] > -math.inf:
+                self._weights[position] = -math.inf
+                self._dead += 1
+
+    def _set_weight(self, item_key: ItemKey, weight: float):
+        item = self._items[item_key]
+        item["weight"] = weight
+        if not self._built:
+            return
+        # Pending entries read their weight from the item at lookup time
+        for key in item["keys"]:
+            position = self._position((key, *item_key))
+            if position is not None and self._weights[position] > -math.inf:
+                self._weights[position] = weight
+
+    def _remove_document(self, item_key: ItemKey):
+        item = self._items.get(item_key)
+        if item is None:
+            return
+        self._unfile(item_key)
+        for place_key in item["places"]:
+            members = self._place_members[place_key]
+            members.discard(item_key)
+            if members:
+                self._set_weight(place_key, float(len(members)))
+            else:
+                del self._place_members[place_key]
+                self._unfile(place_key)
+
+    def _add_document(self, kind: str, document: dict):
+        item_key = (kind, document["id"])
+        self._remove_document(item_key)
+        name = document.get("name")
+        normalized = normalize(name) if isinstance(name, str) else ""
+        if not normalized:
+            return
+
+        words = normalized.split(" ")
+        keys = sorted({" ".join(words[position:]) for position in range(min(len(words), NAME_WORD_POSITIONS))})
+        places = []
+        for place_type, text in _places(document):
+            place_key = (place_type, normalize(text))
+            if not place_key[1]:
+                continue
+            members = self._place_members.setdefault(place_key, set())
+            if not members:
+                self._file(place_key, {"type": place_type, "text": text, "weight": 1.0, "keys": [place_key[1]], "places": []})
+            members.add(item_key)
+            self._set_weight(place_key, float(len(members)))
+            places.append(place_key)
+
+        self._file(item_key, {
+            "type": kind, "id": document["id"], "text": name.strip(),
+            "weight": _weight(document), "keys": keys, "places": places,
+        })
+
+    async def _ensure_built(self, db):
+        if self._built:
+            return
+        async with self._lock:
+            if self._built:
+                return
+            for collection, (kind, projection) in SOURCES.items():
+                async for document in db[collection].find({}, projection):
+                    self._add_document(kind, document)
+            # Entries of documents seen twice were appended twice
+            self._arrange(self._keys)
+            self._built = True
+
+    async def refresh(self, db, collection: str, *ids: str):
+        """Re-file documents after a write; ids no longer in the collection are dropped"""
+        if not self._built:
+            return
+        kind, projection = SOURCES[collection]
+        async with self._lock:
+            documents = await db[collection].find({"id": {"$in": list(ids)}}, projection).to_list(None)
+            for document in documents:
+                self._add_document(kind, document)
+            for missing in set(ids) - {document["id"] for document in documents}:
+                self._remove_document((kind, missing))
+            self._compact_if_needed()
+            self._cache.clear()
+
+    async def reweigh(self, db, *vendor_ids: str):
+        """Update vendor weights after a rating or favorite count change, keeping their keys"""
+        if not self._built:
+            return
+        async with self._lock:
+            documents = await db.vendors.find(
+                {"id": {"$in": list(vendor_ids)}}, {"_id": 0, "id": 1, "rating": 1, "total_reviews": 1, "favorite_count": 1}
+            ).to_list(None)
+            keys = []
+            for document in documents:
+                item_key = ("vendor", document["id"])
+                if item_key in self._items:
+                    self._set_weight(item_key, _weight(document))
+                    keys.extend(self._items[item_key]["keys"])
+            # Only prefixes of the reweighed names can answer differently
+            for cache_key in [cache_key for cache_key in self._cache if any(key.startswith(cache_key[0]) for key in keys)]:
+                del self._cache[cache_key]
+
+    def _lookup(self, prefix: str, limit: int, types: Tuple[str, ...], exclude: AbstractSet[str] = frozenset()) -> List[dict]:
+        low = bisect.bisect_left(self._keys, (prefix,))
+        high = bisect.bisect_left(self._keys, (prefix + "\x7f",), low)
+        weights = self._weights[low:high]
+        if types != TYPES:
+            weights = np.where(np.isin(self._types[low:high], [TYPES.index(name) for name in types]), weights, -np.inf)
+        candidates = int(np.count_nonzero(weights > -np.inf))
+
+        # Names sit under several keys, so take a few times the limit by weight
+        # and widen to every candidate if that still falls short
+        wanted = limit * (NAME_WORD_POSITIONS + 1)
+        chosen: Dict[ItemKey, float] = {}
+        while True:
+            if wanted >= candidates:
+                order = np.argsort(-weights, kind="stable")[:candidates]
+            else:
+                order = np.argpartition(-weights, wanted - 1)[:wanted]
+            for offset in order:
+                _, item_type, ref = self._keys[low + int(offset)]
+                if item_type == "vendor" and ref in exclude:
+                    continue
+                chosen[(item_type, ref)] = float(weights[offset])
+            if len(chosen) >= limit or wanted >= candidates:
+                break
+            wanted = candidates
+        for key, item_type, ref in self._pending:
+            if key.startswith(prefix) and item_type in types and not (item_type == "vendor" and ref in exclude):
+                weight = self._items[(item_type, ref)]["weight"]
+                chosen[(item_type, ref)] = max(chosen.get((item_type, ref), -math.inf), weight)
+
+        best = sorted(chosen, key=lambda item_key: (-chosen[item_key], self._items[item_key]["text"]))[:limit]
+        suggestions = []
+        for item_key in best:
+            item = self._items[item_key]
+            suggestion = {"type": item["type"], "text": item["text"]}
+            if "id" in item:
+                suggestion["id"] = item["id"]
+            suggestions.append(suggestion)
+        return suggestions
+
+    async def suggest(self, db, prefix: str, limit: int, types: Optional[Tuple[str, ...]] = None,
+                      exclude: AbstractSet[str] = frozenset()) -> List[dict]:
+        """Best suggestions for a prefix, leaving out vendor ids in exclude"""
+        await self._ensure_built(db)
+        normalized = normalize(prefix)
+        if not normalized:
+            return []
+        if exclude:
+            # Per-user answers bypass the shared prefix cache
+            return self._lookup(normalized, limit, types or TYPES, exclude)
+        cache_key = (normalized, limit, types or TYPES)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            self._cache.move_to_end(cache_key)
+            return cached
+        suggestions = self._lookup(normalized, limit, types or TYPES)
+        self._cache[cache_key] = suggestions
+        while len(self._cache) > MAX_CACHED_PREFIXES:
+            self._cache.popitem(last=False)
+        return suggestions
+
+
+index = SuggestIndex()
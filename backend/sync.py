@@ -0,0 +1,141 @@
+"""Delta sync for the client dashboard and planner: GET /api/sync?since=<cursor>.
+
+Write paths stamp synced documents with ``updated_at`` and a ``version``
+(``stamp()`` for updates, ``next_version()`` for inserts). Versions are
+millisecond hybrid clocks: wall-clock milliseconds, bumped past the last
+version this process issued so they never go backwards. Deletes leave a
+tombstone in ``sync_tombstones`` keyed by the owning user.
+
+Versions from different workers can interleave by a few milliseconds, and a
+write may commit after a later-stamped one has been read. The cursor handed
+back therefore trails the clock by SYNC_OVERLAP_MS, and changes inside that
+window are sent again on the next sync (clients apply changes by id, so a
+repeat is harmless). Tombstones expire after SYNC_TOMBSTONE_TTL_DAYS; a
+cursor older than that is told to reset and receives a full snapshot.
+"""
+import asyncio
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import pymongo
+from fastapi import HTTPException
+
+OVERLAP_MS = int(os.environ.get("SYNC_OVERLAP_MS", "5000"))
+TOMBSTONE_TTL_DAYS = int(os.environ.get("SYNC_TOMBSTONE_TTL_DAYS", "30"))
+MAX_CHANGES = int(os.environ.get("SYNC_MAX_CHANGES", "1000"))  # per collection per response
+
+# Collections owned by the user directly (owner fields) or through one of their events
+USER_COLLECTIONS = {
+    "events": ("user_id",),
+    "calendar_events": ("user_id",),
+    "appointments": ("client_id", "vendor_id"),
+}
+EVENT_COLLECTIONS = ("vendor_bookings", "payments", "event_planner_states")
+
+_lock = threading.Lock()
+_last_version = 0
+
+
+def next_version() -> int:
+    global _last_version
+    with _lock:
+        _last_version = max(int(time.time() * 1000), _last_version + 1)
+        return _last_version
+
+
+def stamp() -> Dict[str, Any]:
+    """Fields every update to a synced document sets"""
+    return {"updated_at": datetime.utcnow(), "version": next_version()}
+
+
+def encode_cursor(version: int) -> str:
+    return format(version, "x")
+
+
+def decode_cursor(cursor: Optional[str]) -> int:
+    if not cursor:
+        return 0
+    try:
+        return int(cursor, 16)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid sync cursor")
+
+
+async def ensure_indexes(db):
+    for collection, owner_fields in USER_COLLECTIONS.items():
+        for field in owner_fields:
+            await db[collection].create_index([(field, pymongo.ASCENDING), ("version", pymongo.ASCENDING)])
+    for collection in EVENT_COLLECTIONS:
+        await db[collection].create_index([("event_id", pymongo.ASCENDING), ("version", pymongo.ASCENDING)])
+    await db.sync_tombstones.create_index([("user_id", pymongo.ASCENDING), ("version", pymongo.ASCENDING)])
+    await db.sync_tombstones.create_index("deleted_at", expireAfterSeconds=TOMBSTONE_TTL_DAYS * 86400)
+
+
+async def delete_with_tombstones(db, collection: str, query: dict, user_id: str) -> int:
+    """Delete matching documents and record a tombstone for each; returns the deleted count"""
+    ids = [document["id"] for document in await db[collection].find(query, {"_id": 0, "id": 1}).to_list(None)]
+    if not ids:
+        return 0
+    result = await db[collection].delete_many({**query, "id": {"$in": ids}})
+    deleted_at = datetime.utcnow()
+    await db.sync_tombstones.insert_many([
+        {"collection": collection, "id": document_id, "user_id": user_id,
+         "version": next_version(), "deleted_at": deleted_at}
+        for document_id in ids
+    ])
+    return result.deleted_count
+
+
+async def _changes(collection, query: dict, since: int) -> List[dict]:
+    if not since:
+        # Full snapshot, including documents written before versions existed
+        return await collection.find(query, {"_id": 0}).to_list(None)
+    cursor = collection.find({**query, "version": {"$gt": since}}, {"_id": 0})
+    return await cursor.sort("version", pymongo.ASCENDING).to_list(MAX_CHANGES)
+
+
+async def collect(db, user: dict, cursor: Optional[str]) -> Dict[str, Any]:
+    since = decode_cursor(cursor)
+    now = next_version()
+    reset = since < now - TOMBSTONE_TTL_DAYS * 86400 * 1000
+    if reset:
+        since = 0
+
+    user_id = user["id"]
+    event_ids = [event["id"] for event in await db.events.find({"user_id": user_id}, {"_id": 0, "id": 1}).to_list(None)]
+
+    queries = {}
+    for collection, owner_fields in USER_COLLECTIONS.items():
+        owners = [{field: user_id} for field in owner_fields]
+        queries[collection] = owners[0] if len(owners) == 1 else {"$or": owners}
+    for collection in EVENT_COLLECTIONS:
+        queries[collection] = {"event_id": {"$in": event_ids}}
+    if since:
+        queries["sync_tombstones"] = {"user_id": user_id}
+
+    pages = dict(zip(queries, await asyncio.gather(
+        *(_changes(db[name], query, since) for name, query in queries.items())
+    )))
+
+    # A full page may have more behind it: resume from just before its last version.
+    # Otherwise everything stamped before the overlap window has been seen.
+    truncated = [page[-1]["version"] for page in pages.values() if since and len(page) >= MAX_CHANGES]
+    if truncated:
+        next_since = max(since, min(truncated) - 1)
+    else:
+        next_since = max(since, now - OVERLAP_MS)
+
+    deleted: Dict[str, List[str]] = {}
+    for tombstone in pages.pop("sync_tombstones", []):
+        deleted.setdefault(tombstone["collection"], []).append(tombstone["id"])
+
+    return {
+        "cursor": encode_cursor(next_since),
+        "reset": reset,
+        "has_more": bool(truncated),
+        "changes": pages,
+        "deleted": deleted,
+    }
@@ -0,0 +1,267 @@
+"""In-process full-text search over vendors and venues with BM25 ranking.
+
+Documents are tokenized into lowercase words, stop words are dropped and a
+light suffix stemmer folds plurals and common endings ("decorations" and
+"decor", "caterer" and "catering"). Each field has a weight, so a match in a
+name counts for more than one in a description. Each term's postings are
+scored as NumPy arrays, so common words stay cheap at 100k documents.
+
+Query words the index has never seen are matched against the vocabulary
+within one edit (a symmetric-delete lookup, no scan) at a reduced weight, so
+"mehdni" still finds "mehndi".
+
+The index is built from the collection on first use. After that, write paths
+call ``refresh()`` with the ids they changed, which re-reads and re-indexes
+just those documents. Writes made by other workers or outside the API are
+picked up by a full rebuild every TEXT_SEARCH_INDEX_TTL seconds, run in the
+background while the current index keeps serving. Tokenizing is CPU work,
+so every build runs in the default executor rather than on the event loop.
+"""
+import asyncio
+import math
+import os
+import re
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+MAX_MATCHES = int(os.environ.get("TEXT_SEARCH_MAX_MATCHES", "1000"))
+INDEX_TTL_SECONDS = float(os.environ.get("TEXT_SEARCH_INDEX_TTL", "300"))
+
+K1 = 1.2
+B = 0.75
+FUZZY_WEIGHT = 0.5
+FUZZY_MIN_LENGTH = 4
+
+VENDOR_FIELDS = {
+    "name": 3.0, "business_name": 3.0, "service_type": 2.0, "specialties": 2.0,
+    "cultural_specializations": 1.5, "description": 1.0, "location": 1.0,
+}
+VENUE_FIELDS = {
+    "name": 3.0, "venue_type": 2.0, "amenities": 2.0, "description": 1.0, "location": 1.0,
+}
+
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from in is it of on or our the to we with your".split()
+)
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def stem(word: str) -> str:
+    if len(word) <= 3 or word.isdigit():
+        return word
+    if word.endswith("sses"):
+        word = word[:-2]
+    elif word.endswith("ies"):
+        word = word[:-3] + "y"
+    elif word.endswith("s") and not word.endswith(("ss", "us")):
+        word = word[:-1]
+    for suffix in ("ation", "ing", "er", "ed", "ly"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    return [stem(word) for word in _WORD.findall(text.lower()) if word not in STOP_WORDS]
+
+
+def _deletes(term: str) -> Set[str]:
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        # One substitution, or one adjacent transposition
+        return a[i + 1:] == b[i + 1:] or (a[i:i + 2] == b[i:i + 2][::-1] and a[i + 2:] == b[i + 2:])
+    return a[i:] == b[i + 1:]
+
+
+class SearchIndex:
+    # Attributes that make up the index contents, swapped together on rebuild
+    STATE = ("_ids", "_row_of", "_lengths", "_total_length", "_live", "_terms", "_postings", "_compiled", "_variants")
+
+    def __init__(self, collection: str, fields: Dict[str, float]):
+        self.collection = collection
+        self.fields = fields
+        self.projection = {"_id": 0, "id": 1, **{field: 1 for field in fields}}
+        # Documents get a row; postings map term -> {row: weighted frequency}
+        self._ids: List[str] = []
+        self._row_of: Dict[str, int] = {}
+        self._lengths = np.zeros(1024, dtype=np.float64)
+        self._total_length = 0.0
+        self._live = 0
+        self._terms: Dict[int, Tuple[str, ...]] = {}
+        self._postings: Dict[str, Dict[int, float]] = {}
+        # Array form of a term's postings, dropped whenever the term changes
+        self._compiled: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._variants: Dict[str, Set[str]] = {}
+        self._built = False
+        self._built_at = 0.0
+        self._rebuilding = False
+        # Ids refreshed while a rebuild reads the collection, replayed after the swap
+        self._written_during_build: Optional[Set[str]] = None
+        self._lock = asyncio.Lock()
+
+    def __len__(self):
+        return self._live
+
+    def _weighted_terms(self, document: dict) -> Dict[str, float]:
+        counts: Dict[str, float] = {}
+        for field, weight in self.fields.items():
+            value = document.get(field)
+            if isinstance(value, (list, tuple)):
+                value = " ".join(item for item in value if isinstance(item, str))
+            if not isinstance(value, str):
+                continue
+            for term in tokenize(value):
+                counts[term] = counts.get(term, 0.0) + weight
+        return counts
+
+    def _remove(self, document_id: str):
+        row = self._row_of.get(document_id)
+        if row is None or row not in self._terms:
+            return
+        for term in self._terms.pop(row):
+            self._postings[term].pop(row, None)
+            self._compiled.pop(term, None)
+        self._total_length -= self._lengths[row]
+        self._lengths[row] = 0.0
+        self._live -= 1
+
+    def _add(self, document: dict):
+        document_id = document["id"]
+        self._remove(document_id)
+        row = self._row_of.get(document_id)
+        if row is None:
+            row = self._row_of[document_id] = len(self._ids)
+            self._ids.append(document_id)
+            if row >= len(self._lengths):
+                self._lengths = np.concatenate([self._lengths, np.zeros(len(self._lengths), dtype=np.float64)])
+
+        counts = self._weighted_terms(document)
+        for term, frequency in counts.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                for variant in _deletes(term) | {term}:
+                    self._variants.setdefault(variant, set()).add(term)
+            postings[row] = frequency
+            self._compiled.pop(term, None)
+        self._terms[row] = tuple(counts)
+        length = sum(counts.values())
+        self._lengths[row] = length
+        self._total_length += length
+        self._live += 1
+
+    def _postings_arrays(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        compiled = self._compiled.get(term)
+        if compiled is None:
+            postings = self._postings[term]
+            compiled = self._compiled[term] = (
+                np.fromiter(postings.keys(), dtype=np.int64, count=len(postings)),
+                np.fromiter(postings.values(), dtype=np.float64, count=len(postings)),
+            )
+        return compiled
+
+    def _indexed(self, documents: List[dict]) -> "SearchIndex":
+        """A new index over documents; runs in a worker thread"""
+        fresh = SearchIndex(self.collection, self.fields)
+        for document in documents:
+            fresh._add(document)
+        return fresh
+
+    async def rebuild(self, db):
+        self._written_during_build = set()
+        try:
+            documents = await db[self.collection].find({}, self.projection).to_list(None)
+            fresh = await asyncio.get_running_loop().run_in_executor(None, self._indexed, documents)
+            for name in self.STATE:
+                setattr(self, name, getattr(fresh, name))
+            self._built_at = time.monotonic()
+            written = self._written_during_build
+        finally:
+            self._written_during_build = None
+        if written:
+            await self._reindex(db, written)
+
+    async def _refresh_in_background(self, db):
+        try:
+            await self.rebuild(db)
+        finally:
+            self._rebuilding = False
+
+    async def _ensure_built(self, db):
+        if not self._built:
+            async with self._lock:
+                if not self._built:
+                    await self.rebuild(db)
+                    self._built = True
+        elif not self._rebuilding and time.monotonic() - self._built_at > INDEX_TTL_SECONDS:
+            self._rebuilding = True
+            asyncio.get_running_loop().create_task(self._refresh_in_background(db))
+
+    async def _reindex(self, db, ids):
+        documents = await db[self.collection].find({"id": {"$in": list(ids)}}, self.projection).to_list(None)
+        for document in documents:
+            self._add(document)
+        for missing in set(ids) - {document["id"] for document in documents}:
+            self._remove(missing)
+
+    async def refresh(self, db, *ids: str):
+        """Re-index documents after a write; ids no longer in the collection are dropped"""
+        if self._written_during_build is not None:
+            self._written_during_build.update(ids)
+        if self._built:
+            await self._reindex(db, ids)
+
+    def _query_terms(self, text: str) -> Dict[str, float]:
+        """Index terms to look up for a query, with their match weight"""
+        terms: Dict[str, float] = {}
+        for token in tokenize(text):
+            if self._postings.get(token):
+                terms[token] = max(terms.get(token, 0.0), 1.0)
+                continue
+            if len(token) < FUZZY_MIN_LENGTH:
+                continue
+            candidates = set()
+            for variant in _deletes(token) | {token}:
+                candidates |= self._variants.get(variant, set())
+            for candidate in candidates:
+                if self._postings.get(candidate) and _within_one_edit(token, candidate):
+                    terms[candidate] = max(terms.get(candidate, 0.0), FUZZY_WEIGHT)
+        return terms
+
+    def _score(self, text: str, limit: int) -> Dict[str, float]:
+        terms = self._query_terms(text)
+        if not terms or not self._live:
+            return {}
+        base = K1 * (1.0 - B)
+        per_length = K1 * B / (self._total_length / self._live or 1.0)
+        scores = np.zeros(len(self._ids), dtype=np.float64)
+        for term, weight in terms.items():
+            rows, frequencies = self._postings_arrays(term)
+            idf = weight * (K1 + 1.0) * math.log(1.0 + (self._live - len(rows) + 0.5) / (len(rows) + 0.5))
+            scores[rows] += idf * frequencies / (frequencies + base + per_length * self._lengths[rows])
+
+        matched = np.flatnonzero(scores)
+        if len(matched) > limit:
+            matched = matched[np.argpartition(-scores[matched], limit - 1)[:limit]]
+        return {self._ids[row]: float(scores[row]) for row in matched}
+
+    async def search(self, db, text: str, limit: int = MAX_MATCHES) -> Dict[str, float]:
+        """BM25 scores of the best matching documents, keyed by id"""
+        await self._ensure_built(db)
+        return self._score(text, limit)
+
+
+vendor_index = SearchIndex("vendors", VENDOR_FIELDS)
+venue_index = SearchIndex("venues", VENUE_FIELDS)
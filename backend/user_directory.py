@@ -0,0 +1,140 @@
+"""Admin user directory: prefix search, role/status filters and keyset paging.
+
+Users carry lowercase copies of their name and email (``name_lower``,
+``email_lower``) so a search prefix becomes an anchored, index-backed regex.
+Pages are ordered by (created_at, id) descending and continued with an opaque
+cursor instead of skip(), so deep pages cost the same as the first one.
+Totals come from estimated_document_count() when unfiltered and from a short
+TTL cache of count_documents() per filter set otherwise.
+"""
+import base64
+import os
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import pymongo
+from fastapi import HTTPException
+
+COUNT_TTL_SECONDS = float(os.environ.get("USER_DIRECTORY_COUNT_TTL", "60"))
+MAX_CACHED_COUNTS = 256
+
+# Only what the admin user table shows: credentials (password_hash, or
+# hashed_password on seeded users) and 2FA codes never leave the database
+PROJECTION = {
+    "_id": 0, "id": 1, "name": 1, "email": 1, "mobile": 1, "role": 1, "status": 1,
+    "is_active": 1, "profile_completed": 1, "created_at": 1,
+}
+
+_counts: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()
+
+
+def normalized_fields(name: Optional[str], email: Optional[str]) -> Dict[str, str]:
+    return {"name_lower": (name or "").strip().lower(), "email_lower": (email or "").strip().lower()}
+
+
+async def ensure_indexes(db):
+    await db.users.create_index([("name_lower", pymongo.ASCENDING)])
+    await db.users.create_index([("email_lower", pymongo.ASCENDING)])
+    await db.users.create_index([("created_at", pymongo.DESCENDING), ("id", pymongo.DESCENDING)])
+    await db.users.create_index([("role", pymongo.ASCENDING), ("created_at", pymongo.DESCENDING), ("id", pymongo.DESCENDING)])
+    # Backfill users written before the normalized fields existed, server-side
+    await db.users.update_many(
+        {"name_lower": {"$exists": False}},
+        [{"$set": {"name_lower": {"$toLower": "$name"}, "email_lower": {"$toLower": "$email"}}}]
+    )
+    await db.users.update_many(
+        {"created_at": {"$exists": False}},
+        [{"$set": {"created_at": {"$toDate": "$_id"}}}]
+    )
+
+
+def encode_cursor(document: Dict[str, Any], field: str = "created_at") -> str:
+    """Opaque cursor for the (field, id) position of a document"""
+    position = document[field].isoformat()
+    return base64.urlsafe_b64encode(f"{position}|{document['id']}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        position, document_id = raw.split("|", 1)
+        return datetime.fromisoformat(position), document_id
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def build_filter(search: Optional[str], role: Optional[str], status: Optional[str]) -> Dict[str, Any]:
+    clauses = []
+    if search and search.strip():
+        prefix = "^" + re.escape(search.strip().lower())
+        clauses.append({"$or": [{"name_lower": {"$regex": prefix}}, {"email_lower": {"$regex": prefix}}]})
+    if role:
+        clauses.append({"role": {"$in": role.split(",")} if "," in role else role})
+    if status == "active":
+        clauses.append({"is_active": {"$ne": False}})
+    elif status == "inactive":
+        clauses.append({"is_active": False})
+    elif status:
+        clauses.append({"status": status})
+    if not clauses:
+        return {}
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+async def count(db, query: Dict[str, Any]) -> int:
+    if not query:
+        return await db.users.estimated_document_count()
+    key = repr(sorted(query.items()))
+    cached = _counts.get(key)
+    if cached is not None and cached[0] > time.monotonic():
+        _counts.move_to_end(key)
+        return cached[1]
+    total = await db.users.count_documents(query)
+    _counts[key] = (time.monotonic() + COUNT_TTL_SECONDS, total)
+    _counts.move_to_end(key)
+    while len(_counts) > MAX_CACHED_COUNTS:
+        _counts.popitem(last=False)
+    return total
+
+
+def invalidate_counts():
+    _counts.clear()
+
+
+async def page(
+    db,
+    limit: int,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    search: Optional[str] = None,
+    role: Optional[str] = None,
+    status: Optional[str] = None
+) -> Dict[str, Any]:
+    query = build_filter(search, role, status)
+    page_query = query
+    if cursor:
+        created_at, user_id = decode_cursor(cursor)
+        after = {"$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "id": {"$lt": user_id}},
+        ]}
+        page_query = {"$and": [query, after]} if query else after
+        skip = 0
+
+    # One extra row tells whether another page exists
+    ordered = db.users.find(page_query, PROJECTION).sort([("created_at", pymongo.DESCENDING), ("id", pymongo.DESCENDING)])
+    users: List[dict] = await ordered.skip(skip).limit(limit + 1).to_list(limit + 1)
+    has_more = len(users) > limit
+    users = users[:limit]
+
+    total = await count(db, query)
+    return {
+        "users": users,
+        "total": total,
+        "limit": limit,
+        "pages": (total + limit - 1) // limit,
+        "next_cursor": encode_cursor(users[-1]) if has_more else None,
+    }
@@ -0,0 +1,71 @@
+"""Vendors a user has blocked, kept out of their search results and recommendations.
+
+Blocks live in ``blocked_vendors`` (unique on user_id + vendor_id). Search never
+sends them to Mongo as a ``$nin`` list: each user's blocked ids are cached as a
+frozenset, and the ranker maps them to its integer row ordinals and drops
+those rows from the candidates before scoring. That costs one
+``np.isin`` over the candidate rows, however many vendors are blocked.
+
+The cache is per process: a block made through another worker shows up here
+after at most BLOCK_CACHE_TTL seconds. Typeahead suggestions, similar-vendor
+lists and search facet counts drop blocked vendors too.
+"""
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import FrozenSet, List, Tuple
+
+import pymongo
+
+CACHE_TTL_SECONDS = float(os.environ.get("BLOCK_CACHE_TTL", "30"))
+MAX_CACHED_USERS = 10000
+
+
+async def ensure_indexes(db):
+    await db.blocked_vendors.create_index(
+        [("user_id", pymongo.ASCENDING), ("vendor_id", pymongo.ASCENDING)], unique=True
+    )
+
+
+class BlockList:
+    def __init__(self):
+        # user id -> (expiry, blocked ids)
+        self._cache: "OrderedDict[str, Tuple[float, FrozenSet[str]]]" = OrderedDict()
+
+    async def blocked(self, db, user_id: str) -> FrozenSet[str]:
+        """Ids of the vendors a user has blocked"""
+        cached = self._cache.get(user_id)
+        if cached is not None and cached[0] > time.monotonic():
+            self._cache.move_to_end(user_id)
+            return cached[1]
+        blocked = frozenset(await db.blocked_vendors.distinct("vendor_id", {"user_id": user_id}))
+        self._cache[user_id] = (time.monotonic() + CACHE_TTL_SECONDS, blocked)
+        self._cache.move_to_end(user_id)
+        while len(self._cache) > MAX_CACHED_USERS:
+            self._cache.popitem(last=False)
+        return blocked
+
+    async def block(self, db, user_id: str, vendor_id: str, reason: str = None) -> bool:
+        """Block a vendor; False when it was already blocked"""
+        result = await db.blocked_vendors.update_one(
+            {"user_id": user_id, "vendor_id": vendor_id},
+            {"$setOnInsert": {"user_id": user_id, "vendor_id": vendor_id, "reason": reason, "blocked_date": datetime.utcnow()}},
+            upsert=True
+        )
+        self._cache.pop(user_id, None)
+        return result.upserted_id is not None
+
+    async def unblock(self, db, user_id: str, vendor_id: str) -> bool:
+        result = await db.blocked_vendors.delete_one({"user_id": user_id, "vendor_id": vendor_id})
+        self._cache.pop(user_id, None)
+        return result.deleted_count > 0
+
+    async def entries(self, db, user_id: str) -> List[dict]:
+        """The user's blocks, newest first"""
+        return await db.blocked_vendors.find(
+            {"user_id": user_id}, {"_id": 0, "vendor_id": 1, "reason": 1, "blocked_date": 1}
+        ).sort("blocked_date", pymongo.DESCENDING).to_list(None)
+
+
+blocks = BlockList()
@@ -0,0 +1,113 @@
+"""Vendor favorites: an atomic toggle, a maintained favorite_count and a
+cached favorite-id set per user.
+
+``vendor_favorites`` is unique on (user_id, vendor_id), so the toggle is a
+delete that falls through to an upsert, and two concurrent clicks can no
+longer create a duplicate. Each change moves the vendor's ``favorite_count``
+with ``$inc``. The vendor itself is not read beforehand: an add whose
+``$inc`` matches no vendor is undone and reported as not found. A count that
+moved is passed to catalog_sync so the vendor's cached pages and typeahead
+weight follow it.
+
+Search and marketplace results carry an ``is_favorite`` flag taken from the
+cached set, so flagging a page costs no query per vendor. The cache is per
+process: a toggle made through another worker shows up here after at most
+FAVORITE_CACHE_TTL seconds.
+"""
+import os
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import FrozenSet, Tuple
+
+import pymongo
+from fastapi import HTTPException
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+import catalog_sync
+
+CACHE_TTL_SECONDS = float(os.environ.get("FAVORITE_CACHE_TTL", "30"))
+MAX_CACHED_USERS = 10000
+
+
+async def ensure_indexes(db):
+    # Toggles that raced before the unique index existed may have left duplicates
+    duplicates = db.vendor_favorites.aggregate([
+        {"$group": {"_id": {"user_id": "$user_id", "vendor_id": "$vendor_id"}, "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+    ])
+    async for duplicate in duplicates:
+        await db.vendor_favorites.delete_many({"_id": {"$in": duplicate["ids"][1:]}})
+    await db.vendor_favorites.create_index(
+        [("user_id", pymongo.ASCENDING), ("vendor_id", pymongo.ASCENDING)], unique=True
+    )
+
+    # Backfill favorite_count for vendors written before it was maintained
+    if await db.vendors.count_documents({"favorite_count": {"$exists": False}}, limit=1):
+        counts = {
+            entry["_id"]: entry["count"]
+            async for entry in db.vendor_favorites.aggregate([{"$group": {"_id": "$vendor_id", "count": {"$sum": 1}}}])
+        }
+        missing = await db.vendors.distinct("id", {"favorite_count": {"$exists": False}})
+        if missing:
+            await db.vendors.bulk_write(
+                [UpdateOne({"id": vendor_id}, {"$set": {"favorite_count": counts.get(vendor_id, 0)}}) for vendor_id in missing],
+                ordered=False
+            )
+
+
+class Favorites:
+    def __init__(self):
+        # user id -> (expiry, favorite ids)
+        self._cache: "OrderedDict[str, Tuple[float, FrozenSet[str]]]" = OrderedDict()
+
+    async def ids(self, db, user_id: str) -> FrozenSet[str]:
+        """Ids of the vendors a user has favorited"""
+        cached = self._cache.get(user_id)
+        if cached is not None and cached[0] > time.monotonic():
+            self._cache.move_to_end(user_id)
+            return cached[1]
+        favorite_ids = frozenset(await db.vendor_favorites.distinct("vendor_id", {"user_id": user_id}))
+        self._cache[user_id] = (time.monotonic() + CACHE_TTL_SECONDS, favorite_ids)
+        self._cache.move_to_end(user_id)
+        while len(self._cache) > MAX_CACHED_USERS:
+            self._cache.popitem(last=False)
+        return favorite_ids
+
+    async def toggle(self, db, user_id: str, vendor_id: str) -> bool:
+        """Flip a favorite and return whether the vendor is now favorited"""
+        try:
+            favorited = await self._toggle(db, user_id, vendor_id)
+        finally:
+            # Dropped after the writes so a concurrent ids() cannot re-cache the old set
+            self._cache.pop(user_id, None)
+        await catalog_sync.vendor_stats_written(db, vendor_id)
+        return favorited
+
+    async def _toggle(self, db, user_id: str, vendor_id: str) -> bool:
+        removed = await db.vendor_favorites.delete_one({"user_id": user_id, "vendor_id": vendor_id})
+        if removed.deleted_count:
+            await db.vendors.update_one({"id": vendor_id}, {"$inc": {"favorite_count": -1}})
+            return False
+
+        try:
+            added = await db.vendor_favorites.update_one(
+                {"user_id": user_id, "vendor_id": vendor_id},
+                {"$setOnInsert": {"id": str(uuid.uuid4()), "user_id": user_id, "vendor_id": vendor_id, "created_at": datetime.utcnow()}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # A concurrent toggle inserted it first
+            return True
+        if added.upserted_id is None:
+            return True
+        counted = await db.vendors.update_one({"id": vendor_id}, {"$inc": {"favorite_count": 1}})
+        if not counted.matched_count:
+            await db.vendor_favorites.delete_one({"user_id": user_id, "vendor_id": vendor_id})
+            raise HTTPException(status_code=404, detail="Vendor not found")
+        return True
+
+
+favorites = Favorites()
@@ -0,0 +1,314 @@
+"""Relevance ranking for vendor search.
+
+Every vendor is reduced to one row of precomputed features held in NumPy
+arrays: rating, review volume, price, subscription plan boost, cultural
+styles and coordinates. A search reads only the ids matching its Mongo
+filter, scores those rows in one vectorized pass and keeps the best
+offset+limit with argpartition, so only the returned page is sorted and only
+its documents are read back from the database.
+
+Vendor writes call ``mark_written(*ids)``; the next search re-reads only
+those vendors and patches their rows in place (appending new vendors and
+retiring deleted ones), so a write costs one small query instead of a full
+re-read. The whole index is only rebuilt when it is older than
+RANKING_INDEX_TTL seconds, which also picks up writes made outside the API.
+
+    python ranking_benchmark.py --vendors 100000
+"""
+import asyncio
+import math
+import os
+import time
+from itertools import repeat
+from typing import Any, Collection, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+INDEX_TTL_SECONDS = float(os.environ.get("RANKING_INDEX_TTL", "300"))
+MAX_CANDIDATES = int(os.environ.get("RANKING_MAX_CANDIDATES", "100000"))
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+RATING_WEIGHT = 0.35
+REVIEWS_WEIGHT = 0.15
+BUDGET_WEIGHT = 0.2
+CULTURE_WEIGHT = 0.15
+DISTANCE_WEIGHT = 0.15
+TEXT_WEIGHT = 1.0
+DISTANCE_SCALE_KM = 25.0
+EARTH_RADIUS_KM = 6371.0
+
+# "Featured placement" and "Top featured placement" from SUBSCRIPTION_PLANS
+PLAN_BOOSTS = {"premium": 0.1, "enterprise": 0.2}
+
+FEATURE_PROJECTION = {
+    "_id": 0, "id": 1, "rating": 1, "total_reviews": 1, "review_count": 1,
+    "base_price": 1, "price_per_person": 1, "price_range": 1,
+    "subscription_plan": 1, "subscription_status": 1,
+    "cultural_specializations": 1, "latitude": 1, "longitude": 1,
+}
+
+
+class RankingContext:
+    __slots__ = ("budget_min", "budget_max", "cultural_style", "latitude", "longitude")
+
+    def __init__(self, budget_min=None, budget_max=None, cultural_style=None, latitude=None, longitude=None):
+        self.budget_min = budget_min
+        self.budget_max = budget_max
+        self.cultural_style = cultural_style
+        self.latitude = latitude
+        self.longitude = longitude
+
+
+def _price(vendor: dict) -> float:
+    for field in ("base_price", "price_per_person"):
+        if isinstance(vendor.get(field), (int, float)):
+            return float(vendor[field])
+    price_range = vendor.get("price_range")
+    if isinstance(price_range, dict) and price_range:
+        values = [value for value in price_range.values() if isinstance(value, (int, float))]
+        if values:
+            return float(sum(values) / len(values))
+    return math.nan
+
+
+def _number(value) -> float:
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else math.nan
+
+
+def _unit_vectors(latitude: np.ndarray, longitude: np.ndarray) -> np.ndarray:
+    latitude = np.radians(latitude)
+    longitude = np.radians(longitude)
+    return np.column_stack((
+        np.cos(latitude) * np.cos(longitude),
+        np.cos(latitude) * np.sin(longitude),
+        np.sin(latitude)
+    ))
+
+
+def _features(vendors: List[dict]) -> Dict[str, np.ndarray]:
+    """Per-vendor feature columns, one row per vendor"""
+    rating = np.array([min(_number(v.get("rating")), 5.0) for v in vendors], dtype=np.float64)
+    reviews = np.array([v.get("total_reviews") or v.get("review_count") or 0 for v in vendors], dtype=np.float64)
+    return {
+        "rating": np.nan_to_num(rating),
+        "review_log": np.log1p(reviews),
+        "price": np.array([_price(v) for v in vendors], dtype=np.float64),
+        "plan_boost": np.array([
+            PLAN_BOOSTS.get(v.get("subscription_plan"), 0.0) if v.get("subscription_status", "active") == "active" else 0.0
+            for v in vendors
+        ], dtype=np.float64),
+        # Coordinates as unit vectors: great-circle distance is then one dot product
+        "position": _unit_vectors(
+            np.array([_number(v.get("latitude")) for v in vendors], dtype=np.float64),
+            np.array([_number(v.get("longitude")) for v in vendors], dtype=np.float64)
+        ).reshape(len(vendors), 3),
+    }
+
+
+def _styles(vendor: dict) -> List[str]:
+    return [style.lower() for style in vendor.get("cultural_specializations") or [] if isinstance(style, str)]
+
+
+class FeatureIndex:
+    COLUMNS = ("rating", "review_log", "price", "plan_boost", "position")
+
+    def __init__(self, vendors: List[dict]):
+        self.ids = [vendor["id"] for vendor in vendors]
+        self.row_of = {vendor_id: row for row, vendor_id in enumerate(self.ids)}
+        self.built_at = time.monotonic()
+        self.live = np.ones(len(vendors), dtype=bool)
+        for name, column in _features(vendors).items():
+            setattr(self, name, column)
+        # Review volume is scaled by the busiest vendor; patches only ever raise it
+        self.review_scale = max(float(self.review_log.max()) if len(vendors) else 0.0, 1.0)
+
+        style_rows: Dict[str, List[int]] = {}
+        for row, vendor in enumerate(vendors):
+            for style in _styles(vendor):
+                style_rows.setdefault(style, []).append(row)
+        self.styles = {}
+        for style, rows in style_rows.items():
+            mask = np.zeros(len(vendors), dtype=bool)
+            mask[rows] = True
+            self.styles[style] = mask
+
+    def __len__(self):
+        return len(self.ids)
+
+    def patch(self, vendor_ids: Collection[str], vendors: List[dict]):
+        """Rewrite the rows of vendor_ids from their current documents
+
+        Ids without a document are retired, vendors the index has not seen are
+        appended. Rows never move, so row numbers held by a search in flight
+        stay valid.
+        """
+        found = {vendor["id"] for vendor in vendors}
+        for vendor_id in vendor_ids:
+            row = self.row_of.get(vendor_id)
+            if row is not None and vendor_id not in found:
+                self.live[row] = False
+
+        added = [vendor for vendor in vendors if vendor["id"] not in self.row_of]
+        if added:
+            columns = _features(added)
+            for name in self.COLUMNS:
+                setattr(self, name, np.concatenate((getattr(self, name), columns[name])))
+            self.live = np.concatenate((self.live, np.ones(len(added), dtype=bool)))
+            for style, mask in self.styles.items():
+                self.styles[style] = np.concatenate((mask, np.zeros(len(added), dtype=bool)))
+            for vendor in added:
+                self.row_of[vendor["id"]] = len(self.ids)
+                self.ids.append(vendor["id"])
+
+        if vendors:
+            rows = np.array([self.row_of[vendor["id"]] for vendor in vendors], dtype=np.int64)
+            columns = _features(vendors)
+            for name in self.COLUMNS:
+                getattr(self, name)[rows] = columns[name]
+            self.live[rows] = True
+            self.review_scale = max(self.review_scale, float(columns["review_log"].max()))
+            for mask in self.styles.values():
+                mask[rows] = False
+            for row, vendor in zip(rows.tolist(), vendors):
+                for style in _styles(vendor):
+                    if style not in self.styles:
+                        self.styles[style] = np.zeros(len(self.ids), dtype=bool)
+                    self.styles[style][row] = True
+
+    def rows_for(self, ids: List[str]) -> Tuple[np.ndarray, List[str]]:
+        """Live index rows for ids, plus ids the index has not seen yet"""
+        # dict.get mapped over the ids runs in C; -1 marks unseen ids
+        rows = np.array(list(map(self.row_of.get, ids, repeat(-1))), dtype=np.int64)
+        missing = rows < 0
+        unknown = [ids[position] for position in np.flatnonzero(missing).tolist()] if missing.any() else []
+        rows = rows[~missing]
+        return rows[self.live[rows]], unknown
+
+    def live_rows(self) -> np.ndarray:
+        return np.flatnonzero(self.live)
+
+    def score(self, rows: np.ndarray, context: RankingContext) -> np.ndarray:
+        scores = (
+            RATING_WEIGHT * self.rating[rows] / 5.0
+            + REVIEWS_WEIGHT * self.review_log[rows] / self.review_scale
+            + self.plan_boost[rows]
+        )
+
+        if context.budget_min is not None or context.budget_max is not None:
+            price = self.price[rows]
+            low = context.budget_min if context.budget_min is not None else -np.inf
+            high = context.budget_max if context.budget_max is not None else np.inf
+            gap = np.where(price < low, low - price, np.where(price > high, price - high, 0.0))
+            scale = max(context.budget_max or context.budget_min or 1.0, 1.0)
+            # Unknown prices get a neutral half score
+            fit = np.where(np.isnan(price), 0.5, 1.0 / (1.0 + gap / scale))
+            scores += BUDGET_WEIGHT * fit
+
+        if context.cultural_style:
+            mask = self.styles.get(context.cultural_style.lower())
+            if mask is not None:
+                scores += CULTURE_WEIGHT * mask[rows]
+
+        if context.latitude is not None and context.longitude is not None:
+            origin = _unit_vectors(np.array([context.latitude]), np.array([context.longitude]))[0]
+            distance_km = EARTH_RADIUS_KM * np.arccos(np.clip(self.position[rows] @ origin, -1.0, 1.0))
+            # Vendors without coordinates get no proximity score
+            scores += DISTANCE_WEIGHT * np.nan_to_num(np.exp(-distance_km / DISTANCE_SCALE_KM))
+
+        return scores
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k highest scores, best first"""
+    if k <= 0 or not len(scores):
+        return np.empty(0, dtype=np.int64)
+    if k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    best = np.argpartition(-scores, k - 1)[:k]
+    return best[np.argsort(-scores[best], kind="stable")]
+
+
+class VendorRanking:
+    def __init__(self):
+        self._index: Optional[FeatureIndex] = None
+        self._written: Set[str] = set()
+        self._lock = asyncio.Lock()
+
+    def mark_written(self, *vendor_ids: str):
+        """Queue vendors whose rows the next search re-reads"""
+        self._written.update(vendor_ids)
+
+    def _expired(self) -> bool:
+        return self._index is None or time.monotonic() - self._index.built_at >= INDEX_TTL_SECONDS
+
+    async def index(self, db) -> FeatureIndex:
+        if not self._written and not self._expired():
+            return self._index
+        async with self._lock:
+            # Another request may have rebuilt or patched it while this one waited
+            if self._expired():
+                self._written.clear()
+                vendors = await db.vendors.find({}, FEATURE_PROJECTION).to_list(None)
+                self._index = FeatureIndex(vendors)
+            elif self._written:
+                # Taken before the read, so writes landing meanwhile are patched next time
+                vendor_ids, self._written = self._written, set()
+                vendors = await db.vendors.find({"id": {"$in": list(vendor_ids)}}, FEATURE_PROJECTION).to_list(None)
+                self._index.patch(vendor_ids, vendors)
+            return self._index
+
+    async def rank(
+        self,
+        db,
+        query: Dict[str, Any],
+        context: RankingContext,
+        projection: Optional[dict] = None,
+        limit: int = PAGE_SIZE,
+        offset: int = 0,
+        text_scores: Optional[Dict[str, float]] = None,
+        exclude: Collection[str] = ()
+    ) -> Tuple[List[dict], int]:
+        """One page of vendors matching query, best first, and the total match count
+
+        With text_scores (full-text matches keyed by id) only those vendors are
+        candidates and their normalized text score joins the relevance score.
+        Vendors in exclude are dropped by index row, after the Mongo filter.
+        """
+        index = await self.index(db)
+        ids = None
+        if query:
+            ids = [vendor["id"] for vendor in await db.vendors.find(query, {"_id": 0, "id": 1}).to_list(MAX_CANDIDATES)]
+            if text_scores is not None:
+                ids = [vendor_id for vendor_id in ids if vendor_id in text_scores]
+        elif text_scores is not None:
+            ids = list(text_scores)
+        if ids is None:
+            rows, unknown = index.live_rows(), []
+        else:
+            rows, unknown = index.rows_for(ids)
+        if exclude:
+            excluded_rows, _ = index.rows_for(list(exclude))
+            rows = rows[~np.isin(rows, excluded_rows)]
+            unknown = [vendor_id for vendor_id in unknown if vendor_id not in exclude]
+        total = len(rows) + len(unknown)
+
+        scores = index.score(rows, context)
+        if text_scores and len(rows):
+            text = np.fromiter((text_scores[index.ids[row]] for row in rows), dtype=np.float64, count=len(rows))
+            scores += TEXT_WEIGHT * text / text.max()
+        picked = rows[top_k(scores, offset + limit)][offset:]
+        page_ids = [index.ids[row] for row in picked]
+        # Vendors written since the last rebuild rank after everything scored
+        if len(page_ids) < limit:
+            start = max(offset - len(rows), 0)
+            page_ids.extend(unknown[start:start + limit - len(page_ids)])
+        if not page_ids:
+            return [], total
+
+        documents = await db.vendors.find({"id": {"$in": page_ids}}, projection).to_list(len(page_ids))
+        by_id = {document["id"]: document for document in documents}
+        return [by_id[vendor_id] for vendor_id in page_ids if vendor_id in by_id], total
+
+
+ranker = VendorRanking()
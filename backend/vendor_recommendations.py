@@ -0,0 +1,270 @@
+"""Preferred vendors: the vendors a user already works with, plus vendors
+recommended from what other users favorite and book together.
+
+Favorites and bookings become a weighted user x vendor interaction list. An
+item-item co-occurrence matrix is computed from it in NumPy: vendors sharing a
+user are paired by comparing the user-sorted interaction list against itself
+shifted by 1..n places, pair weights are summed per (vendor, vendor) key and
+cosine-normalized by each vendor's interaction weight. Only the best
+NEIGHBORS entries of each row are kept, in CSR form (indptr, indices, scores).
+A user's recommendations then sum the rows of the vendors they interacted
+with.
+
+The matrix is built on first use and rebuilt in the background every
+RECOMMENDATION_REFRESH_SECONDS, while the previous one keeps serving; the
+NumPy work runs in the default executor, off the event loop. Each user's
+list is cached as vendor ids with the user's own booking totals until they
+toggle a favorite, block or book a vendor, or the matrix is rebuilt. Vendor
+documents are read at request time with one $in query, so catalog writes
+never have to touch the cache.
+"""
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import vendor_blocks
+
+REFRESH_SECONDS = float(os.environ.get("RECOMMENDATION_REFRESH_SECONDS", "3600"))
+TOP_N = int(os.environ.get("PREFERRED_VENDOR_COUNT", "20"))
+MAX_CACHED_USERS = 10000
+NEIGHBORS = 50  # similar vendors kept per matrix row
+MAX_ITEMS_PER_USER = 100  # heaviest interactions per user that form pairs
+
+FAVORITE_WEIGHT = 1.0
+BOOKING_WEIGHT = 2.0
+
+
+def cooccurrence(users: np.ndarray, vendors: np.ndarray, weights: np.ndarray, vendor_count: int,
+                 neighbors: int = NEIGHBORS) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Top item-item cosine scores in CSR form from (user, vendor, weight) interactions"""
+    # Merge repeated interactions of a user with a vendor
+    keys, inverse = np.unique(users * vendor_count + vendors, return_inverse=True)
+    weights = np.bincount(inverse, weights=weights)
+    users, vendors = keys // vendor_count, keys % vendor_count
+
+    # Group by user, heaviest first, and keep each user's top interactions
+    order = np.lexsort((-weights, users))
+    users, vendors, weights = users[order], vendors[order], weights[order]
+    rank = np.arange(len(users)) - np.searchsorted(users, users)
+    kept = rank < MAX_ITEMS_PER_USER
+    users, vendors, weights = users[kept], vendors[kept], weights[kept]
+    longest = int(rank[kept].max()) + 1 if len(users) else 0
+
+    # Entries d places apart belong to the same user exactly when their user ids match
+    left, right, products = [], [], []
+    for distance in range(1, longest):
+        same = users[:-distance] == users[distance:]
+        left.append(vendors[:-distance][same])
+        right.append(vendors[distance:][same])
+        products.append(weights[:-distance][same] * weights[distance:][same])
+    if not left:
+        return np.zeros(vendor_count + 1, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    rows = np.concatenate(left + right)
+    columns = np.concatenate(right + left)
+    products = np.concatenate(products + products)
+
+    pairs, inverse = np.unique(rows * vendor_count + columns, return_inverse=True)
+    counts = np.bincount(inverse, weights=products)
+    rows, columns = pairs // vendor_count, pairs % vendor_count
+    norms = np.sqrt(np.bincount(vendors, weights=weights ** 2, minlength=vendor_count))
+    scores = counts / (norms[rows] * norms[columns])
+
+    order = np.lexsort((-scores, rows))
+    rows, columns, scores = rows[order], columns[order], scores[order]
+    kept = np.arange(len(rows)) - np.searchsorted(rows, rows) < neighbors
+    rows, columns, scores = rows[kept], columns[kept], scores[kept]
+    indptr = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=vendor_count))))
+    return indptr, columns, scores.astype(np.float32)
+
+
+def build_matrix(users: List[str], vendors: List[str], weights: List[float]) -> "ItemMatrix":
+    """The item matrix for (user, vendor, weight) interactions; CPU bound, run it in an executor"""
+    vendor_ids = sorted(set(vendors))
+    vendor_ordinal = {vendor_id: row for row, vendor_id in enumerate(vendor_ids)}
+    user_ordinal: Dict[str, int] = {}
+    indptr, indices, scores = cooccurrence(
+        np.array([user_ordinal.setdefault(user, len(user_ordinal)) for user in users], dtype=np.int64),
+        np.array([vendor_ordinal[vendor] for vendor in vendors], dtype=np.int64),
+        np.array(weights, dtype=np.float64),
+        max(len(vendor_ids), 1),
+    )
+    return ItemMatrix(vendor_ids, indptr, indices, scores)
+
+
+class ItemMatrix:
+    __slots__ = ("vendor_ids", "ordinal", "indptr", "indices", "scores")
+
+    def __init__(self, vendor_ids: List[str], indptr: np.ndarray, indices: np.ndarray, scores: np.ndarray):
+        self.vendor_ids = vendor_ids
+        self.ordinal = {vendor_id: row for row, vendor_id in enumerate(vendor_ids)}
+        self.indptr = indptr
+        self.indices = indices
+        self.scores = scores
+
+    def recommend(self, interactions: Dict[str, float], exclude, limit: int) -> List[Tuple[str, float]]:
+        """Best scoring vendors for a user's {vendor_id: weight} interactions"""
+        totals: Dict[int, float] = {}
+        for vendor_id, weight in interactions.items():
+            row = self.ordinal.get(vendor_id)
+            if row is None:
+                continue
+            start, end = self.indptr[row], self.indptr[row + 1]
+            for column, score in zip(self.indices[start:end].tolist(), self.scores[start:end].tolist()):
+                totals[column] = totals.get(column, 0.0) + weight * score
+        ranked = sorted(totals.items(), key=lambda item: -item[1])
+        picked = []
+        for column, score in ranked:
+            vendor_id = self.vendor_ids[column]
+            if vendor_id in exclude:
+                continue
+            picked.append((vendor_id, round(score, 4)))
+            if len(picked) == limit:
+                break
+        return picked
+
+
+class Recommender:
+    def __init__(self):
+        self._matrix: Optional[ItemMatrix] = None
+        self._built_at = 0.0
+        self._refreshing = False
+        # user id -> [{"id", events_count, total_spent, ...}], without vendor documents
+        self._cache: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self._lock = asyncio.Lock()
+
+    async def _interactions(self, db) -> Tuple[List[str], List[str], List[float]]:
+        users, vendors, weights = [], [], []
+        async for favorite in db.vendor_favorites.find({}, {"_id": 0, "user_id": 1, "vendor_id": 1}):
+            users.append(favorite["user_id"])
+            vendors.append(favorite["vendor_id"])
+            weights.append(FAVORITE_WEIGHT)
+        event_owners = {}
+        async for event in db.events.find({}, {"_id": 0, "id": 1, "user_id": 1}):
+            event_owners[event["id"]] = event.get("user_id")
+        bookings = db.vendor_bookings.find({"status": {"$ne": "cancelled"}}, {"_id": 0, "event_id": 1, "vendor_id": 1})
+        async for booking in bookings:
+            owner = event_owners.get(booking.get("event_id"))
+            if owner and booking.get("vendor_id"):
+                users.append(owner)
+                vendors.append(booking["vendor_id"])
+                weights.append(BOOKING_WEIGHT)
+        return users, vendors, weights
+
+    async def rebuild(self, db):
+        users, vendors, weights = await self._interactions(db)
+        self._matrix = await asyncio.get_running_loop().run_in_executor(None, build_matrix, users, vendors, weights)
+        self._built_at = time.monotonic()
+        self._cache.clear()
+
+    async def _refresh_in_background(self, db):
+        try:
+            await self.rebuild(db)
+        finally:
+            self._refreshing = False
+
+    async def _ensure_matrix(self, db) -> ItemMatrix:
+        if self._matrix is None:
+            async with self._lock:
+                if self._matrix is None:
+                    await self.rebuild(db)
+        elif not self._refreshing and time.monotonic() - self._built_at > REFRESH_SECONDS:
+            self._refreshing = True
+            asyncio.get_running_loop().create_task(self._refresh_in_background(db))
+        return self._matrix
+
+    async def _history(self, db, user_id: str) -> Dict[str, Dict[str, Any]]:
+        """The user's own vendors with booking totals, favorites included"""
+        history: Dict[str, Dict[str, Any]] = {}
+        event_ids = await db.events.distinct("id", {"user_id": user_id})
+        bookings = await db.vendor_bookings.find(
+            {"event_id": {"$in": event_ids}, "status": {"$ne": "cancelled"}},
+            {"_id": 0, "event_id": 1, "vendor_id": 1, "cost": 1, "event_date": 1}
+        ).to_list(None)
+        for booking in bookings:
+            entry = history.setdefault(booking["vendor_id"], {"events": set(), "total_spent": 0.0, "last_hired": None})
+            entry["events"].add(booking["event_id"])
+            entry["total_spent"] += booking.get("cost") or 0.0
+            if booking.get("event_date") and (entry["last_hired"] is None or booking["event_date"] > entry["last_hired"]):
+                entry["last_hired"] = booking["event_date"]
+        async for favorite in db.vendor_favorites.find({"user_id": user_id}, {"_id": 0, "vendor_id": 1}):
+            history.setdefault(favorite["vendor_id"], {"events": set(), "total_spent": 0.0, "last_hired": None})
+        return history
+
+    async def _build_list(self, db, user_id: str) -> List[Dict[str, Any]]:
+        matrix = await self._ensure_matrix(db)
+        history = await self._history(db, user_id)
+        blocked = await vendor_blocks.blocks.blocked(db, user_id)
+        interactions = {
+            vendor_id: FAVORITE_WEIGHT + BOOKING_WEIGHT * len(entry["events"])
+            for vendor_id, entry in history.items() if vendor_id not in blocked
+        }
+        recommended = matrix.recommend(interactions, blocked | history.keys(), TOP_N)
+
+        own = sorted(interactions, key=lambda vendor_id: (-len(history[vendor_id]["events"]), -history[vendor_id]["total_spent"]))
+        entries = []
+        for vendor_id in own:
+            entry = history[vendor_id]
+            events_count = len(entry["events"])
+            entries.append({
+                "id": vendor_id,
+                "events_count": events_count,
+                "total_spent": entry["total_spent"],
+                "average_cost": round(entry["total_spent"] / events_count, 2) if events_count else 0.0,
+                "last_hired": entry["last_hired"],
+                "recommended": False,
+                "score": None,
+            })
+        for vendor_id, score in recommended:
+            entries.append({
+                "id": vendor_id, "events_count": 0, "total_spent": 0.0, "average_cost": 0.0,
+                "last_hired": None, "recommended": True, "score": score,
+            })
+        return entries
+
+    async def _entries(self, db, user_id: str) -> List[Dict[str, Any]]:
+        cached = self._cache.get(user_id)
+        if cached is not None:
+            self._cache.move_to_end(user_id)
+            await self._ensure_matrix(db)
+            return cached
+        entries = await self._build_list(db, user_id)
+        self._cache[user_id] = entries
+        while len(self._cache) > MAX_CACHED_USERS:
+            self._cache.popitem(last=False)
+        return entries
+
+    async def preferred(self, db, user_id: str, serializer) -> List[Dict[str, Any]]:
+        """The user's preferred vendors with current vendor documents"""
+        entries = await self._entries(db, user_id)
+        if not entries:
+            return []
+        documents = await db.vendors.find(
+            {"id": {"$in": [entry["id"] for entry in entries]}}, serializer.projection
+        ).to_list(None)
+        by_id = {vendor.id: vendor for vendor in serializer.load_many(documents, trusted=False)}
+        preferred = []
+        for entry in entries:
+            vendor = by_id.get(entry["id"])
+            if vendor is None:
+                continue
+            preferred.append({
+                **vendor.model_dump(mode="json"),
+                "contact": {
+                    "phone": vendor.contact_info.get("phone"),
+                    "email": vendor.contact_info.get("email"),
+                    "location": vendor.location,
+                },
+                **{field: value for field, value in entry.items() if field != "id"},
+            })
+        return preferred
+
+    def invalidate(self, *user_ids: str):
+        for user_id in user_ids:
+            self._cache.pop(user_id, None)
+
+
+recommender = Recommender()
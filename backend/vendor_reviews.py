@@ -0,0 +1,220 @@
+"""Vendor reviews with running rating aggregates on the vendor document.
+
+A new review moves the vendor's ``rating_sum`` and ``review_count`` with one
+``$inc`` and then stores the Bayesian-smoothed score in ``rating`` (and the
+count in ``total_reviews``), so ranking and marketplace queries read a
+precomputed number. The smoothed score pulls vendors with few reviews
+towards REVIEW_PRIOR_MEAN, as if each had REVIEW_PRIOR_WEIGHT extra reviews
+at that mean, so one 5-star review does not outrank hundreds of 4.8s. The
+score is only written while ``review_count`` still matches the value the
+``$inc`` returned, so of two concurrent reviews the later count wins.
+
+Vendors rated before reviews were stored keep that rating as their own prior:
+``prior_rating`` replaces REVIEW_PRIOR_MEAN and ``prior_reviews`` (their old
+``total_reviews``) adds to REVIEW_PRIOR_WEIGHT, so a first stored review moves
+a long-standing 4.5 a little instead of resetting it. ``carry_over_ratings()``
+records the priors at startup, and a review on a vendor it has not seen yet
+records that vendor's prior first.
+
+Listings are ordered by (created_at, id) descending and continued with the
+same opaque cursor as the admin user directory.
+
+``reconcile()`` recomputes every aggregate from the raw reviews; run it
+periodically:
+    python vendor_reviews.py --reconcile
+"""
+import argparse
+import asyncio
+import os
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import pymongo
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from deps import DATABASE_NAME
+from user_directory import decode_cursor, encode_cursor
+
+load_dotenv()
+
+PRIOR_MEAN = float(os.environ.get("REVIEW_PRIOR_MEAN", "4.0"))
+PRIOR_WEIGHT = float(os.environ.get("REVIEW_PRIOR_WEIGHT", "5"))
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+WRITE_BATCH = 1000
+
+# Public listing: the reviewer shows by display name; user_id and event_id
+# would tie an account to its events
+PROJECTION = {
+    "_id": 0, "id": 1, "vendor_id": 1, "vendor_name": 1, "service_type": 1,
+    "user_name": 1, "rating": 1, "comment": 1, "created_at": 1,
+}
+
+PRIOR_FIELDS = {"prior_rating": 1, "prior_reviews": 1}
+
+
+def smoothed_rating(rating_sum: float, review_count: int, prior_rating: float = PRIOR_MEAN, prior_reviews: int = 0) -> float:
+    prior_weight = PRIOR_WEIGHT + prior_reviews
+    return round((prior_rating * prior_weight + rating_sum) / (prior_weight + review_count), 2)
+
+
+def _aggregates(vendor: dict, rating_sum: float, review_count: int) -> Dict[str, Any]:
+    """rating and total_reviews for a vendor's review totals, counting its prior"""
+    prior_reviews = vendor.get("prior_reviews") or 0
+    return {
+        "rating": smoothed_rating(rating_sum, review_count, vendor.get("prior_rating", PRIOR_MEAN), prior_reviews),
+        "total_reviews": prior_reviews + review_count,
+    }
+
+
+def _carry_over(vendor: dict) -> UpdateOne:
+    """Start a vendor's review totals, keeping a rating it had before reviews were stored"""
+    fields: Dict[str, Any] = {"rating_sum": 0, "review_count": 0}
+    rating, reviews = vendor.get("rating"), vendor.get("total_reviews")
+    if isinstance(rating, (int, float)) and rating > 0:
+        fields["prior_rating"] = float(rating)
+        fields["prior_reviews"] = reviews if isinstance(reviews, int) and reviews > 0 else 0
+    # Only vendors still without totals, so a concurrent review is never overwritten
+    return UpdateOne({"id": vendor["id"], "review_count": {"$exists": False}}, {"$set": fields})
+
+
+async def carry_over_ratings(db) -> int:
+    """Record priors for vendors without review totals; returns vendors started"""
+    operations = [
+        _carry_over(vendor)
+        async for vendor in db.vendors.find(
+            {"review_count": {"$exists": False}}, {"_id": 0, "id": 1, "rating": 1, "total_reviews": 1}
+        )
+    ]
+    for start in range(0, len(operations), WRITE_BATCH):
+        await db.vendors.bulk_write(operations[start:start + WRITE_BATCH], ordered=False)
+    return len(operations)
+
+
+async def ensure_indexes(db):
+    # One review per vendor per event and user
+    await db.reviews.create_index(
+        [("user_id", pymongo.ASCENDING), ("vendor_id", pymongo.ASCENDING), ("event_id", pymongo.ASCENDING)], unique=True
+    )
+    await db.reviews.create_index(
+        [("vendor_id", pymongo.ASCENDING), ("created_at", pymongo.DESCENDING), ("id", pymongo.DESCENDING)]
+    )
+    await carry_over_ratings(db)
+
+
+async def _store_rating(db, vendor: dict):
+    await db.vendors.update_one(
+        {"id": vendor["id"], "review_count": vendor["review_count"]},
+        {"$set": _aggregates(vendor, vendor["rating_sum"], vendor["review_count"])}
+    )
+
+
+async def create(db, user: dict, vendor_id: str, rating: int, comment: str, event_id: Optional[str]) -> Dict[str, Any]:
+    vendor = await db.vendors.find_one(
+        {"id": vendor_id},
+        {"_id": 0, "id": 1, "name": 1, "business_name": 1, "service_type": 1, "rating": 1, "total_reviews": 1, "review_count": 1}
+    )
+    if not vendor:
+        raise HTTPException(status_code=404, detail="Vendor not found")
+    if event_id and not await db.events.find_one({"id": event_id, "user_id": user["id"]}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Event not found")
+
+    review = {
+        "id": str(uuid.uuid4()),
+        "vendor_id": vendor_id,
+        "vendor_name": vendor.get("name") or vendor.get("business_name"),
+        "service_type": vendor.get("service_type"),
+        "event_id": event_id,
+        "user_id": user["id"],
+        "user_name": user.get("name"),
+        "rating": rating,
+        "comment": comment,
+        "created_at": datetime.utcnow(),
+    }
+    try:
+        await db.reviews.insert_one(dict(review))
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail="You have already reviewed this vendor for this event")
+
+    if "review_count" not in vendor:
+        # Created since startup with a rating of its own
+        await db.vendors.bulk_write([_carry_over(vendor)])
+    totals = await db.vendors.find_one_and_update(
+        {"id": vendor_id},
+        {"$inc": {"rating_sum": rating, "review_count": 1}},
+        projection={"id": 1, "rating_sum": 1, "review_count": 1, **PRIOR_FIELDS},
+        return_document=ReturnDocument.AFTER
+    )
+    if totals:
+        await _store_rating(db, totals)
+    return review
+
+
+async def page(db, vendor_id: str, limit: int, cursor: Optional[str] = None) -> Dict[str, Any]:
+    query: Dict[str, Any] = {"vendor_id": vendor_id}
+    if cursor:
+        created_at, review_id = decode_cursor(cursor)
+        query["$or"] = [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "id": {"$lt": review_id}},
+        ]
+    ordered = db.reviews.find(query, PROJECTION).sort([("created_at", pymongo.DESCENDING), ("id", pymongo.DESCENDING)])
+    # One extra row tells whether another page exists
+    reviews: List[dict] = await ordered.limit(limit + 1).to_list(limit + 1)
+    has_more = len(reviews) > limit
+    reviews = reviews[:limit]
+    return {"reviews": reviews, "next_cursor": encode_cursor(reviews[-1]) if has_more else None}
+
+
+async def reconcile(db) -> int:
+    """Recompute every vendor's aggregates from the raw reviews; returns vendors changed"""
+    await carry_over_ratings(db)
+    totals = {
+        entry["_id"]: entry
+        async for entry in db.reviews.aggregate([
+            {"$group": {"_id": "$vendor_id", "rating_sum": {"$sum": "$rating"}, "review_count": {"$sum": 1}}}
+        ])
+    }
+    operations = []
+    vendors = db.vendors.find(
+        {"$or": [{"id": {"$in": list(totals)}}, {"review_count": {"$gt": 0}}]},
+        {"_id": 0, "id": 1, "rating_sum": 1, "review_count": 1, "rating": 1, "total_reviews": 1, **PRIOR_FIELDS}
+    )
+    async for vendor in vendors:
+        entry = totals.get(vendor["id"], {"rating_sum": 0, "review_count": 0})
+        expected = {
+            "rating_sum": entry["rating_sum"],
+            "review_count": entry["review_count"],
+            **_aggregates(vendor, entry["rating_sum"], entry["review_count"]),
+        }
+        if any(vendor.get(field) != expected[field] for field in expected):
+            operations.append(UpdateOne({"id": vendor["id"]}, {"$set": expected}))
+    for start in range(0, len(operations), WRITE_BATCH):
+        await db.vendors.bulk_write(operations[start:start + WRITE_BATCH], ordered=False)
+    return len(operations)
+
+
+async def _reconcile_database(mongo_url: str, db_name: str) -> int:
+    return await reconcile(AsyncIOMotorClient(mongo_url)[db_name])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vendor review maintenance")
+    parser.add_argument("--reconcile", action="store_true", help="Recompute vendor rating aggregates from reviews")
+    parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db-name", default=DATABASE_NAME)
+    args = parser.parse_args()
+    if not args.reconcile:
+        parser.error("nothing to do; pass --reconcile")
+
+    changed = asyncio.run(_reconcile_database(args.mongo_url, args.db_name))
+    print(f"✅ Reconciled review aggregates, {changed:,} vendors corrected")
+
+
+if __name__ == "__main__":
+    main()
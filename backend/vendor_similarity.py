@@ -0,0 +1,229 @@
+"""Batch job precomputing "similar vendors" for every vendor.
+
+Each vendor becomes a hashed TF-IDF vector built from its service type,
+specialties, cultural specializations, price band and description words
+(field-weighted, sign-hashed into VECTOR_DIMENSIONS buckets, L2-normalized).
+Cosine top-k neighbors are computed with blocked matrix multiplies, so a
+block of rows is scored against the whole catalog at once without ever
+materializing the full n x n similarity matrix. The results are stored
+per vendor in ``vendor_similar`` (unique on vendor_id), and
+GET /api/vendors/{id}/similar serves them with one indexed read.
+
+A full run recomputes everything. ``--incremental`` handles only vendors that
+have no entry yet: it scores them against the catalog, finds the existing
+vendors whose stored list one of them now beats, and recomputes just those
+lists, with no n x n pass. IDF weights depend on the whole catalog, so the
+vectors it scores with differ slightly from the ones the stored lists were
+built with; recomputing the touched lists (rather than pushing a new score
+into them) keeps every list internally comparable, and the untouched ones
+are brought in line by the next full run.
+
+Usage:
+    python vendor_similarity.py              # full rebuild
+    python vendor_similarity.py --incremental
+"""
+import argparse
+import math
+import os
+import time
+import zlib
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pymongo
+from dotenv import load_dotenv
+from pymongo import ReplaceOne, UpdateOne
+
+from deps import DATABASE_NAME
+from text_search import tokenize
+
+load_dotenv()
+
+VECTOR_DIMENSIONS = int(os.environ.get("SIMILAR_VENDOR_DIMENSIONS", "256"))
+NEIGHBORS = int(os.environ.get("SIMILAR_VENDOR_COUNT", "20"))
+BLOCK_ROWS = 256
+WRITE_BATCH = 1000
+
+FIELD_WEIGHTS = {"service": 3.0, "specialty": 2.0, "culture": 1.5, "price": 1.0, "word": 1.0}
+PRICE_BANDS = ((500, "$"), (2000, "$$"), (5000, "$$$"))
+
+PROJECTION = {
+    "_id": 0, "id": 1, "service_type": 1, "specialties": 1, "cultural_specializations": 1,
+    "price_range": 1, "base_price": 1, "price_per_person": 1, "description": 1,
+}
+
+
+def price_band(vendor: dict) -> str:
+    if vendor.get("price_range") in ("$", "$$", "$$$", "$$$$"):
+        return vendor["price_range"]
+    price = vendor.get("base_price") or vendor.get("price_per_person")
+    if not isinstance(price, (int, float)):
+        return ""
+    for ceiling, band in PRICE_BANDS:
+        if price < ceiling:
+            return band
+    return "$$$$"
+
+
+def features(vendor: dict) -> Counter:
+    found = Counter()
+    if isinstance(vendor.get("service_type"), str):
+        found["service:" + vendor["service_type"].strip().lower()] += 1
+    for specialty in vendor.get("specialties") or []:
+        if isinstance(specialty, str):
+            found["specialty:" + specialty.strip().lower()] += 1
+    for culture in vendor.get("cultural_specializations") or []:
+        if isinstance(culture, str):
+            found["culture:" + culture.strip().lower()] += 1
+    band = price_band(vendor)
+    if band:
+        found["price:" + band] += 1
+    if isinstance(vendor.get("description"), str):
+        for word in tokenize(vendor["description"]):
+            found["word:" + word] += 1
+    return found
+
+
+def vectorize(vendors: List[dict]) -> np.ndarray:
+    """L2-normalized hashed TF-IDF rows, one per vendor"""
+    documents = [features(vendor) for vendor in vendors]
+    frequency = Counter(feature for document in documents for feature in document)
+    vectors = np.zeros((len(vendors), VECTOR_DIMENSIONS), dtype=np.float32)
+    for row, document in enumerate(documents):
+        for feature, count in document.items():
+            hashed = zlib.crc32(feature.encode())
+            sign = 1.0 if hashed & 0x80000000 else -1.0
+            idf = math.log((1 + len(vendors)) / (1 + frequency[feature])) + 1.0
+            weight = FIELD_WEIGHTS[feature.split(":", 1)[0]] * (1.0 + math.log(count)) * idf
+            vectors[row, hashed % VECTOR_DIMENSIONS] += sign * weight
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return vectors
+
+
+def nearest(queries: np.ndarray, query_rows: np.ndarray, vectors: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Top-k rows of vectors by cosine similarity for each query, excluding the query's own row"""
+    k = min(k, len(vectors) - 1)
+    indices = np.zeros((len(queries), max(k, 0)), dtype=np.int64)
+    scores = np.zeros((len(queries), max(k, 0)), dtype=np.float32)
+    if k <= 0:
+        return indices, scores
+    for start in range(0, len(queries), BLOCK_ROWS):
+        block = queries[start:start + BLOCK_ROWS] @ vectors.T
+        block[np.arange(len(block)), query_rows[start:start + BLOCK_ROWS]] = -np.inf
+        top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(block, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        indices[start:start + len(block)] = np.take_along_axis(top, order, axis=1)
+        scores[start:start + len(block)] = np.take_along_axis(top_scores, order, axis=1)
+    return indices, scores
+
+
+def neighbor_list(ids: List[str], indices: np.ndarray, scores: np.ndarray) -> List[dict]:
+    # Vendors sharing no features are not similar, however few neighbors that leaves
+    return [
+        {"vendor_id": ids[index], "score": round(float(score), 4)}
+        for index, score in zip(indices, scores) if score > 0
+    ]
+
+
+async def ensure_indexes(db):
+    await db.vendor_similar.create_index("vendor_id", unique=True)
+
+
+def load(db) -> Tuple[List[str], np.ndarray]:
+    vendors = list(db.vendors.find({}, PROJECTION))
+    return [vendor["id"] for vendor in vendors], vectorize(vendors)
+
+
+def write(db, operations: List):
+    for start in range(0, len(operations), WRITE_BATCH):
+        db.vendor_similar.bulk_write(operations[start:start + WRITE_BATCH], ordered=False)
+
+
+def rebuild(db, k: int = NEIGHBORS) -> int:
+    ids, vectors = load(db)
+    rows = np.arange(len(ids))
+    indices, scores = nearest(vectors, rows, vectors, k)
+    built_at = datetime.utcnow()
+    write(db, [
+        ReplaceOne(
+            {"vendor_id": ids[row]},
+            {"vendor_id": ids[row], "neighbors": neighbor_list(ids, indices[row], scores[row]), "built_at": built_at},
+            upsert=True
+        )
+        for row in rows
+    ])
+    db.vendor_similar.delete_many({"vendor_id": {"$nin": ids}})
+    return len(ids)
+
+
+def add_new_vendors(db, k: int = NEIGHBORS) -> int:
+    ids, vectors = load(db)
+    row_of = {vendor_id: row for row, vendor_id in enumerate(ids)}
+    floors: Dict[str, Tuple[float, int]] = {
+        entry["vendor_id"]: (entry.get("floor") or 0.0, entry["count"])
+        for entry in db.vendor_similar.aggregate([
+            {"$project": {"_id": 0, "vendor_id": 1, "floor": {"$min": "$neighbors.score"}, "count": {"$size": "$neighbors"}}}
+        ])
+    }
+    new_rows = np.array([row for vendor_id, row in row_of.items() if vendor_id not in floors], dtype=np.int64)
+    if not len(new_rows):
+        return 0
+
+    # Lists for the new vendors, scored against the whole catalog
+    indices, scores = nearest(vectors[new_rows], new_rows, vectors, k)
+    built_at = datetime.utcnow()
+    operations = [
+        ReplaceOne(
+            {"vendor_id": ids[row]},
+            {"vendor_id": ids[row], "neighbors": neighbor_list(ids, indices[i], scores[i]), "built_at": built_at},
+            upsert=True
+        )
+        for i, row in enumerate(new_rows)
+    ]
+
+    # Existing vendors whose list a new vendor now beats get their list recomputed
+    existing = np.array([row_of[vendor_id] for vendor_id in floors if vendor_id in row_of], dtype=np.int64)
+    floor = np.array([floors[ids[row]][0] if floors[ids[row]][1] >= k else 0.0 for row in existing], dtype=np.float32)
+    beaten = np.zeros(len(existing), dtype=bool)
+    for start in range(0, len(new_rows), BLOCK_ROWS):
+        similarity = vectors[existing] @ vectors[new_rows[start:start + BLOCK_ROWS]].T
+        beaten |= (similarity > floor[:, None]).any(axis=1)
+    affected = existing[beaten]
+    indices, scores = nearest(vectors[affected], affected, vectors, k)
+    operations.extend(
+        UpdateOne(
+            {"vendor_id": ids[row]},
+            {"$set": {"neighbors": neighbor_list(ids, indices[i], scores[i]), "built_at": built_at}}
+        )
+        for i, row in enumerate(affected)
+    )
+    write(db, operations)
+    return len(new_rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute similar vendors")
+    parser.add_argument("--incremental", action="store_true", help="Only add vendors without an entry yet")
+    parser.add_argument("--k", type=int, default=NEIGHBORS)
+    parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db-name", default=DATABASE_NAME)
+    args = parser.parse_args()
+
+    db = pymongo.MongoClient(args.mongo_url)[args.db_name]
+    # Synchronous twin of ensure_indexes() for this pymongo job
+    db.vendor_similar.create_index("vendor_id", unique=True)
+    started = time.perf_counter()
+    if args.incremental:
+        count = add_new_vendors(db, args.k)
+        print(f"✅ Added neighbors for {count:,} new vendors in {time.perf_counter() - started:.1f}s")
+    else:
+        count = rebuild(db, args.k)
+        print(f"✅ Rebuilt neighbors for {count:,} vendors in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,15 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
 from pydantic import BaseModel, EmailStr
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Union
 from datetime import datetime, timedelta
 import uuid
-from server import get_current_user, db
+from deps import ADMIN_ROLES, db, get_current_user, get_optional_user
+from response_cache import catalog_cache
+import catalog_sync
+import vendor_blocks
+import vendor_favorites
+import vendor_ranking
+from serialization import json_response
 
 # Vendor subscription routes
 vendor_router = APIRouter(prefix="/api/vendor")
@@ -53,13 +59,14 @@ class VendorProfile(BaseModel):
     description: str
     website: Optional[str] = None
     portfolio_images: List[str] = []
-    price_range: Dict[str, float]
+    price_range: Union[Dict[str, float], str]  # min/max from registration, or a $-$$$$ tier
     rating: float = 0.0
     total_reviews: int = 0
     subscription_status: str
     subscription_plan: str
     created_at: datetime
     verified: bool = False
+    is_favorite: bool = False  # for the signed-in user, set on marketplace results
 
 class VendorService(BaseModel):
     id: str = None
@@ -121,6 +128,34 @@ SUBSCRIPTION_PLANS = {
     }
 }
 
+# Fields a vendor cannot set on their own profile
+PROTECTED_PROFILE_FIELDS = {
+    "id", "email", "status", "verified", "created_at", "rating", "rating_sum", "review_count", "total_reviews",
+    "favorite_count", "subscription_status", "subscription_plan", "subscription_activated_at", "commission_rate",
+}
+
+async def _accessible_vendor(vendor_id: str, current_user: dict) -> dict:
+    """The vendor document, if the user is an admin or the vendor's own account"""
+    vendor = await db.vendors.find_one({"id": vendor_id}, {"_id": 0, "id": 1, "email": 1})
+    if not vendor:
+        raise HTTPException(status_code=404, detail="Vendor not found")
+    if current_user.get("role") not in ADMIN_ROLES and (
+        current_user.get("role") != "vendor" or vendor.get("email") != current_user.get("email")
+    ):
+        raise HTTPException(status_code=403, detail="Permission denied")
+    return vendor
+
+async def _accessible_service(service_id: str, current_user: dict) -> dict:
+    service = await db.vendor_services.find_one({"id": service_id}, {"_id": 0, "id": 1, "vendor_id": 1})
+    if not service:
+        raise HTTPException(status_code=404, detail="Service not found")
+    await _accessible_vendor(service["vendor_id"], current_user)
+    return service
+
+def _require_admin(current_user: dict):
+    if current_user.get("role") not in ADMIN_ROLES:
+        raise HTTPException(status_code=403, detail="Admin access required")
+
 # Vendor Registration
 @vendor_router.post("/register")
 async def register_vendor(vendor_data: VendorRegistration):
@@ -139,18 +174,17 @@ async def register_vendor(vendor_data: VendorRegistration):
     vendor_dict["total_reviews"] = 0
     
     await db.vendors.insert_one(vendor_dict)
+    await catalog_sync.vendors_written(db, vendor_dict["id"])
     return {"message": "Vendor registered successfully. Please complete subscription to activate your profile.", "vendor_id": vendor_dict["id"]}
 
 # Vendor Subscription Management
 @vendor_router.post("/subscribe")
-async def create_subscription(vendor_id: str, plan_type: str, payment_method: str):
+async def create_subscription(vendor_id: str, plan_type: str, payment_method: str, current_user: dict = Depends(get_current_user)):
     """Create a subscription for a vendor"""
     if plan_type not in SUBSCRIPTION_PLANS:
         raise HTTPException(status_code=400, detail="Invalid subscription plan")
     
-    vendor = await db.vendors.find_one({"id": vendor_id})
-    if not vendor:
-        raise HTTPException(status_code=404, detail="Vendor not found")
+    await _accessible_vendor(vendor_id, current_user)
     
     plan = SUBSCRIPTION_PLANS[plan_type]
     
@@ -179,6 +213,7 @@ async def create_subscription(vendor_id: str, plan_type: str, payment_method: st
             "subscription_activated_at": datetime.utcnow()
         }}
     )
+    await catalog_sync.vendors_written(db, vendor_id)
     
     # Record payment
     payment = {
@@ -197,13 +232,17 @@ async def create_subscription(vendor_id: str, plan_type: str, payment_method: st
 # Get Active Subscribed Vendors (for marketplace display)
 @vendor_router.get("/marketplace", response_model=List[VendorProfile])
 async def get_marketplace_vendors(
+    response: Response,
     service_type: Optional[str] = None,
     location: Optional[str] = None,
     min_budget: Optional[float] = None,
     max_budget: Optional[float] = None,
-    city: Optional[str] = None
+    city: Optional[str] = None,
+    limit: int = Query(vendor_ranking.PAGE_SIZE, ge=1, le=vendor_ranking.MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    current_user: Optional[dict] = Depends(get_optional_user)
 ):
-    """Get only active subscribed vendors for marketplace"""
+    """Get only active subscribed vendors for marketplace, best matches first"""
     query = {
         "status": "active",
         "subscription_status": "active"
@@ -236,8 +275,14 @@ async def get_marketplace_vendors(
             {"price_range.max": {"$gte": min_budget}}
         ]
     
-    vendors = await db.vendors.find(query).to_list(1000)
-    return [VendorProfile(**vendor) for vendor in vendors]
+    context = vendor_ranking.RankingContext(budget_min=min_budget, budget_max=max_budget)
+    blocked = await vendor_blocks.blocks.blocked(db, current_user["id"]) if current_user else frozenset()
+    vendors, total = await vendor_ranking.ranker.rank(
+        db, query, context, {"_id": 0}, limit, offset, exclude=blocked
+    )
+    response.headers["X-Total-Count"] = str(total)
+    favorite_ids = await vendor_favorites.favorites.ids(db, current_user["id"]) if current_user else frozenset()
+    return [VendorProfile(**{**vendor, "is_favorite": vendor["id"] in favorite_ids}) for vendor in vendors]
 
 # Vendor Profile Management
 @vendor_router.get("/profile/{vendor_id}")
@@ -264,22 +309,25 @@ async def get_vendor_profile(vendor_id: str):
     }
 
 @vendor_router.put("/profile/{vendor_id}")
-async def update_vendor_profile(vendor_id: str, profile_data: dict):
+async def update_vendor_profile(vendor_id: str, profile_data: dict, current_user: dict = Depends(get_current_user)):
     """Update vendor profile"""
-    result = await db.vendors.update_one(
+    await _accessible_vendor(vendor_id, current_user)
+    protected = PROTECTED_PROFILE_FIELDS.intersection(profile_data)
+    if protected or any(field.startswith("$") or field.startswith("_") for field in profile_data):
+        raise HTTPException(status_code=400, detail=f"Fields cannot be updated: {', '.join(sorted(protected)) or 'reserved names'}")
+    
+    await db.vendors.update_one(
         {"id": vendor_id},
         {"$set": {**profile_data, "updated_at": datetime.utcnow()}}
     )
-    
-    if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="Vendor not found")
-    
+    await catalog_sync.vendors_written(db, vendor_id)
     return {"message": "Profile updated successfully"}
 
 # Vendor Services Management
 @vendor_router.post("/services")
-async def add_vendor_service(service: VendorService):
+async def add_vendor_service(service: VendorService, current_user: dict = Depends(get_current_user)):
     """Add a new service for vendor"""
+    await _accessible_vendor(service.vendor_id, current_user)
     service_dict = service.dict()
     service_dict["id"] = str(uuid.uuid4())
     service_dict["created_at"] = datetime.utcnow()
@@ -294,21 +342,22 @@ async def get_vendor_services(vendor_id: str):
     return services
 
 @vendor_router.put("/services/{service_id}")
-async def update_vendor_service(service_id: str, service_data: dict):
+async def update_vendor_service(service_id: str, service_data: dict, current_user: dict = Depends(get_current_user)):
     """Update a vendor service"""
-    result = await db.vendor_services.update_one(
+    await _accessible_service(service_id, current_user)
+    # A service stays with the vendor it was created for
+    service_data = {field: value for field, value in service_data.items() if field not in ("id", "vendor_id", "_id")}
+    await db.vendor_services.update_one(
         {"id": service_id},
         {"$set": {**service_data, "updated_at": datetime.utcnow()}}
     )
     
-    if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="Service not found")
-    
     return {"message": "Service updated successfully"}
 
 @vendor_router.delete("/services/{service_id}")
-async def delete_vendor_service(service_id: str):
+async def delete_vendor_service(service_id: str, current_user: dict = Depends(get_current_user)):
     """Delete a vendor service"""
+    await _accessible_service(service_id, current_user)
     result = await db.vendor_services.delete_one({"id": service_id})
     
     if result.deleted_count == 0:
@@ -327,8 +376,9 @@ async def get_vendor_subscription(vendor_id: str):
     return subscription
 
 @vendor_router.put("/subscription/{vendor_id}/upgrade")
-async def upgrade_subscription(vendor_id: str, new_plan: str):
+async def upgrade_subscription(vendor_id: str, new_plan: str, current_user: dict = Depends(get_current_user)):
     """Upgrade vendor subscription plan"""
+    await _accessible_vendor(vendor_id, current_user)
     if new_plan not in SUBSCRIPTION_PLANS:
         raise HTTPException(status_code=400, detail="Invalid subscription plan")
     
@@ -354,12 +404,14 @@ async def upgrade_subscription(vendor_id: str, new_plan: str):
         {"id": vendor_id},
         {"$set": {"subscription_plan": new_plan}}
     )
+    await catalog_sync.vendors_written(db, vendor_id)
     
     return {"message": f"Subscription upgraded to {new_plan} successfully"}
 
 @vendor_router.post("/subscription/{vendor_id}/cancel")
-async def cancel_subscription(vendor_id: str, reason: Optional[str] = None):
+async def cancel_subscription(vendor_id: str, reason: Optional[str] = None, current_user: dict = Depends(get_current_user)):
     """Cancel vendor subscription"""
+    await _accessible_vendor(vendor_id, current_user)
     await db.vendor_subscriptions.update_one(
         {"vendor_id": vendor_id, "status": "active"},
         {"$set": {
@@ -377,6 +429,7 @@ async def cancel_subscription(vendor_id: str, reason: Optional[str] = None):
             "subscription_status": "cancelled"
         }}
     )
+    await catalog_sync.vendors_written(db, vendor_id)
     
     return {"message": "Subscription cancelled successfully"}
 
@@ -395,8 +448,9 @@ async def get_vendor_billing(vendor_id: str):
     }
 
 @vendor_router.post("/billing/{vendor_id}/process")
-async def process_monthly_billing(vendor_id: str):
-    """Process monthly billing for vendor"""
+async def process_monthly_billing(vendor_id: str, current_user: dict = Depends(get_current_user)):
+    """Process monthly billing for vendor (admin only)"""
+    _require_admin(current_user)
     subscription = await db.vendor_subscriptions.find_one({"vendor_id": vendor_id, "status": "active"})
     if not subscription:
         raise HTTPException(status_code=404, detail="No active subscription found")
@@ -455,6 +509,9 @@ async def get_vendor_analytics(vendor_id: str):
 
 # Get subscription plans
 @vendor_router.get("/plans")
-async def get_subscription_plans():
+async def get_subscription_plans(request: Request):
     """Get available subscription plans"""
-    return SUBSCRIPTION_PLANS
\ No newline at end of file
+    async def load():
+        return json_response(SUBSCRIPTION_PLANS)
+    
+    return await catalog_cache.serve(request, ["plans"], load)
\ No newline at end of file
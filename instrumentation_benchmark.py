@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Instrumentation Overhead Benchmark for Urevent 360
+
+Times the same trivial route with and without the request metrics in
+backend/instrumentation.py:
+
+- bare: a FastAPI app with one JSON route
+- instrumented: the same app behind MetricsMiddleware, with the route
+  publishing --commands MongoDB command events to MongoCommandListener,
+  as pymongo does for every command a handler issues
+
+Requests are driven straight through the ASGI interface, so neither
+network nor Mongo time dilutes the overhead: the percentage is against the
+cheapest request the framework can serve, the worst case for the budget of
+2%. Each round serves a chunk from both apps back to back and the overhead
+is the median of the per-round ratios, which cancels drift on a busy host.
+
+Usage:
+    python instrumentation_benchmark.py --requests 2000 --rounds 50 --commands 0 1 3
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import instrumentation  # noqa: E402
+
+
+def build_app(instrumented, commands):
+    app = FastAPI()
+    listener = instrumentation.MongoCommandListener()
+    events = [
+        SimpleNamespace(command_name="find", database_name="urevent_db", command={"find": "vendors"},
+                        connection_id=("localhost", 27017), request_id=n, duration_micros=400)
+        for n in range(commands)
+    ]
+
+    @app.get("/api/vendors/{vendor_id}")
+    async def get_vendor(vendor_id: str):
+        if instrumented:
+            for event in events:
+                listener.started(event)
+                listener.succeeded(event)
+        return {"id": vendor_id, "name": "Lens Studio", "rating": 4.5}
+
+    if instrumented:
+        app.add_middleware(instrumentation.MetricsMiddleware, metrics=instrumentation.MetricsRegistry())
+    return app
+
+
+def request_scope(path):
+    return {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"testserver")], "client": ("127.0.0.1", 50000), "server": ("testserver", 80),
+    }
+
+
+async def serve(app, requests):
+    """Seconds per request over requests sequential calls"""
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for n in range(requests):
+        await app(request_scope(f"/api/vendors/v{n % 100}"), receive, send)
+    return (time.perf_counter() - start) / requests
+
+
+async def compare(commands, requests, rounds):
+    """Per-request seconds of each app per round"""
+    apps = {"bare": build_app(False, commands), "instrumented": build_app(True, commands)}
+    for app in apps.values():
+        await serve(app, requests)  # warm route matching and the middleware stack
+    timings = {name: [] for name in apps}
+    for _ in range(rounds):
+        for name, app in apps.items():
+            timings[name].append(await serve(app, requests))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Request instrumentation overhead benchmark")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per app per round")
+    parser.add_argument("--commands", type=int, nargs="+", default=[0, 1, 3],
+                        help="MongoDB commands each request publishes to the listener")
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    results = []
+    for commands in args.commands:
+        timings = asyncio.run(compare(commands, args.requests, args.rounds))
+        bare, instrumented = statistics.median(timings["bare"]), statistics.median(timings["instrumented"])
+        overhead = statistics.median(
+            with_metrics / without - 1 for without, with_metrics in zip(timings["bare"], timings["instrumented"])
+        )
+        result = {
+            "commands": commands,
+            "bare_us": round(bare * 1e6, 2),
+            "instrumented_us": round(instrumented * 1e6, 2),
+            "overhead_us": round((instrumented - bare) * 1e6, 2),
+            "overhead_percent": round(overhead * 100, 2),
+        }
+        results.append(result)
+        print(f"{commands:>2} commands  bare {result['bare_us']:8.2f}us  instrumented {result['instrumented_us']:8.2f}us  "
+              f"overhead {result['overhead_us']:6.2f}us ({result['overhead_percent']:5.2f}%)", file=sys.stderr)
+
+    print(json.dumps({"instrumentation": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
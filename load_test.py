@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Load Test & Benchmark Harness for Urevent 360 Backend
+
+Replays weighted user journeys taken from the functional test scripts
+(backend_test.py, interactive_planner_test.py, special_venue_types_test.py)
+against a local stack, either in-process through the ASGI app or against a
+server on localhost, and reports p50/p95/p99 latency, throughput and error
+rate per endpoint as JSON. Requests advertise --accept-encoding (default
+"gzip, br") and each endpoint reports both decoded and on-the-wire bytes, so
+the bandwidth saved by response compression shows up next to its latency
+cost; pass --accept-encoding identity for an uncompressed comparison run.
+
+Journeys:
+1. auth: register + login
+2. create_event: create an event, list events, fetch it back
+3. venue_search: venue search by city/type, public venue listing
+4. planner_cart: planner state/steps, planner vendors, add to cart, view cart
+5. finalize: cart + appointment confirmed by vendor + finalize
+6. calendar: calendar events, appointments, create calendar entry
+
+Usage:
+    # In-process against a local mongod (MONGO_URL, default mongodb://localhost:27017)
+    python load_test.py --in-process --duration 30 --concurrency 20 --output results.json
+
+    # Against a running server, gating on a stored baseline
+    python load_test.py --base-url http://localhost:8001 --baseline load_test_baseline.json
+
+The journeys register users and create events, venues and vendors, so the
+in-process run writes to its own database (--db-name, default
+urevent_loadtest) rather than the application's. A server used with
+--base-url should be started the same way, with DATABASE_NAME=urevent_loadtest.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import httpx
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+
+# Journey weights roughly follow how often the frontend exercises each flow
+JOURNEY_WEIGHTS = {
+    "auth": 1,
+    "create_event": 2,
+    "venue_search": 4,
+    "planner_cart": 4,
+    "finalize": 1,
+    "calendar": 2,
+}
+
+SEED_VENUES = [
+    {"name": "Grand Ballroom Plaza", "location": "New York, NY 10001", "venue_type": "Hotel", "capacity": 300, "price_per_person": 120.0},
+    {"name": "Harbor Rooftop", "location": "Miami Beach, FL 33101", "venue_type": "Rooftop", "capacity": 120, "price_per_person": 95.0},
+    {"name": "Oak Barn Estate", "location": "Atlanta, GA 30301", "venue_type": "Barn", "capacity": 200, "price_per_person": 70.0},
+    {"name": "Lakeside Garden", "location": "Chicago, IL 60601", "venue_type": "Garden", "capacity": 150, "price_per_person": 80.0},
+]
+
+SEED_VENDORS = [
+    {"name": "Elegant Catering Co.", "service_type": "Catering", "location": "New York, NY", "base_price": 2500.0, "cultural_specializations": ["american", "indian"]},
+    {"name": "Perfect Moments Photography", "service_type": "Photography", "location": "New York, NY", "base_price": 1200.0, "cultural_specializations": ["american"]},
+    {"name": "Bloom Decor Studio", "service_type": "Decoration", "location": "Chicago, IL", "base_price": 1500.0, "cultural_specializations": ["hispanic", "indian"]},
+    {"name": "Beat Drop DJs", "service_type": "Music/DJ", "location": "Miami, FL", "base_price": 800.0, "cultural_specializations": ["hispanic", "african"]},
+]
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+class LoadTester:
+    def __init__(self, client, duration, concurrency, seed):
+        self.client = client
+        self.duration = duration
+        self.concurrency = concurrency
+        self.random = random.Random(seed)
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.bytes = defaultdict(int)
+        self.wire_bytes = defaultdict(int)
+        self.journeys_run = defaultdict(int)
+        self.vendor_account = None
+
+    async def request(self, name, method, url, token=None, **kwargs):
+        """Issue one request and record it under a stable endpoint name"""
+        headers = kwargs.pop("headers", {})
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, headers=headers, **kwargs)
+        except httpx.HTTPError:
+            self.latencies[name].append(time.perf_counter() - start)
+            self.errors[name] += 1
+            return None
+        self.latencies[name].append(time.perf_counter() - start)
+        self.bytes[name] += len(response.content)
+        self.wire_bytes[name] += response.num_bytes_downloaded
+        if response.status_code >= 400:
+            self.errors[name] += 1
+            return None
+        return response
+
+    async def register(self, role="client"):
+        email = f"load-{uuid.uuid4().hex[:12]}@example.com"
+        response = await self.request("POST /api/register", "POST", "/api/register", json={
+            "name": "Load Test User", "email": email, "password": "LoadTest123", "role": role
+        })
+        if response is None:
+            return None
+        data = response.json()
+        return {"email": email, "token": data["access_token"], "id": data["user"]["id"]}
+
+    async def setup(self):
+        """Seed catalog data and a vendor account whose id matches a vendor document"""
+        admin = await self.register("admin")
+        if admin is None:
+            raise RuntimeError("Could not register seed user - is the backend reachable?")
+        for venue in SEED_VENUES:
+            await self.request("POST /api/venues", "POST", "/api/venues", token=admin["token"], json={
+                **venue, "description": f"{venue['name']} load test venue", "amenities": ["Parking", "WiFi"]
+            })
+        for vendor in SEED_VENDORS:
+            await self.request("POST /api/vendors", "POST", "/api/vendors", token=admin["token"], json={
+                **vendor, "description": f"{vendor['name']} load test vendor", "rating": 4.5
+            })
+
+        self.vendor_account = await self.register("vendor")
+        await self.request("POST /api/vendors", "POST", "/api/vendors", token=admin["token"], json={
+            "id": self.vendor_account["id"], "name": "Load Test Vendor", "description": "Finalize journey vendor",
+            "service_type": "Catering", "location": "New York, NY", "base_price": 1000.0
+        })
+
+    async def create_event(self, token):
+        response = await self.request("POST /api/events", "POST", "/api/events", token=token, json={
+            "name": "Load Test Wedding",
+            "event_type": "wedding",
+            "cultural_style": self.random.choice(["indian", "american", "hispanic"]),
+            "date": (datetime.utcnow() + timedelta(days=120)).isoformat(),
+            "location": "New York, NY",
+            "budget": 30000.0,
+            "guest_count": 150,
+            "services_needed": ["catering", "photography", "decoration", "music/dj"],
+        })
+        return response.json()["id"] if response is not None else None
+
+    # Journeys
+    async def journey_auth(self, user):
+        account = await self.register()
+        if account is None:
+            return
+        await self.request("POST /api/login", "POST", "/api/login", json={
+            "email": account["email"], "password": "LoadTest123"
+        })
+        await self.request("GET /api/users/profile", "GET", "/api/users/profile", token=account["token"])
+
+    async def journey_create_event(self, user):
+        event_id = await self.create_event(user["token"])
+        await self.request("GET /api/events", "GET", "/api/events", token=user["token"])
+        if event_id:
+            await self.request("GET /api/events/{event_id}", "GET", f"/api/events/{event_id}", token=user["token"])
+
+    async def journey_venue_search(self, user):
+        city = self.random.choice(["New York", "Miami", "Chicago", "Atlanta"])
+        await self.request("GET /api/venues/search", "GET", "/api/venues/search", token=user["token"], params={
+            "city": city, "venue_type": self.random.choice(["hotel", "garden", "barn", "all"]), "capacity_min": 50
+        })
+        await self.request("GET /api/venues", "GET", "/api/venues", params={"location": city})
+        await self.request("GET /api/vendors", "GET", "/api/vendors", params={"location": city})
+
+    async def journey_planner_cart(self, user):
+        event_id = user.get("event_id") or await self.create_event(user["token"])
+        if not event_id:
+            return
+        user["event_id"] = event_id
+        token = user["token"]
+        await self.request("GET /api/events/{event_id}", "GET", f"/api/events/{event_id}", token=token)
+        await self.request("GET /api/events/{event_id}/planner/state", "GET", f"/api/events/{event_id}/planner/state", token=token)
+        await self.request("GET /api/events/{event_id}/planner/steps", "GET", f"/api/events/{event_id}/planner/steps", token=token)
+        await self.request("GET /api/events/{event_id}/cart", "GET", f"/api/events/{event_id}/cart", token=token)
+        response = await self.request(
+            "GET /api/events/{event_id}/planner/vendors/{service_type}", "GET",
+            f"/api/events/{event_id}/planner/vendors/catering", token=token
+        )
+        vendors = response.json() if response is not None else []
+        if vendors:
+            vendor = self.random.choice(vendors)
+            await self.request("POST /api/events/{event_id}/cart/add", "POST", f"/api/events/{event_id}/cart/add", token=token, json={
+                "vendor_id": vendor["id"], "vendor_name": vendor["name"], "service_type": vendor["service_type"],
+                "service_name": f"{vendor['service_type']} package", "price": vendor.get("base_price") or 1000.0
+            })
+        await self.request("GET /api/vendors/search", "GET", "/api/vendors/search", token=token, params={
+            "event_id": event_id, "service_type": "photography"
+        })
+
+    async def journey_finalize(self, user):
+        token = user["token"]
+        vendor = self.vendor_account
+        event_id = await self.create_event(token)
+        if not event_id or vendor is None:
+            return
+        await self.request("POST /api/events/{event_id}/cart/add", "POST", f"/api/events/{event_id}/cart/add", token=token, json={
+            "vendor_id": vendor["id"], "vendor_name": "Load Test Vendor", "service_type": "Catering",
+            "service_name": "Catering package", "price": 1000.0
+        })
+        response = await self.request("POST /api/appointments", "POST", "/api/appointments", token=token, json={
+            "vendor_id": vendor["id"], "event_id": event_id, "appointment_type": "virtual",
+            "date": (datetime.utcnow() + timedelta(days=7)).isoformat(), "meeting_link": "https://meet.example.com/load"
+        })
+        if response is None:
+            return
+        appointment_id = response.json()["id"]
+        await self.request(
+            "PUT /api/appointments/{appointment_id}/respond", "PUT",
+            f"/api/appointments/{appointment_id}/respond", token=vendor["token"], json={"response": "approved"}
+        )
+        await self.request(
+            "PUT /api/appointments/{appointment_id}/confirm", "PUT",
+            f"/api/appointments/{appointment_id}/confirm", token=token
+        )
+        await self.request(
+            "POST /api/events/{event_id}/planner/finalize", "POST",
+            f"/api/events/{event_id}/planner/finalize", token=token
+        )
+
+    async def journey_calendar(self, user):
+        token = user["token"]
+        await self.request("GET /api/calendar/events", "GET", "/api/calendar/events", token=token)
+        await self.request("GET /api/appointments", "GET", "/api/appointments", token=token)
+        await self.request("POST /api/calendar/events", "POST", "/api/calendar/events", token=token, json={
+            "title": "Tasting", "date": (datetime.utcnow() + timedelta(days=14)).isoformat(), "event_type": "reminder"
+        })
+
+    async def virtual_user(self, deadline):
+        user = await self.register()
+        if user is None:
+            return
+        names = list(JOURNEY_WEIGHTS)
+        weights = [JOURNEY_WEIGHTS[name] for name in names]
+        while time.perf_counter() < deadline:
+            name = self.random.choices(names, weights)[0]
+            await getattr(self, f"journey_{name}")(user)
+            self.journeys_run[name] += 1
+
+    async def run(self):
+        await self.setup()
+        # Setup traffic is not part of the measurement
+        self.latencies.clear()
+        self.errors.clear()
+        self.bytes.clear()
+        self.wire_bytes.clear()
+        start = time.perf_counter()
+        deadline = start + self.duration
+        await asyncio.gather(*(self.virtual_user(deadline) for _ in range(self.concurrency)))
+        return self.report(time.perf_counter() - start)
+
+    def report(self, elapsed):
+        endpoints = {}
+        total_requests = 0
+        total_errors = 0
+        for name in sorted(self.latencies):
+            values = sorted(self.latencies[name])
+            count = len(values)
+            total_requests += count
+            total_errors += self.errors[name]
+            endpoints[name] = {
+                "requests": count,
+                "errors": self.errors[name],
+                "error_rate": round(self.errors[name] / count, 4) if count else 0.0,
+                "throughput_rps": round(count / elapsed, 2),
+                "p50_ms": round(percentile(values, 50) * 1000, 3),
+                "p95_ms": round(percentile(values, 95) * 1000, 3),
+                "p99_ms": round(percentile(values, 99) * 1000, 3),
+                "mean_bytes": round(self.bytes[name] / count) if count else 0,
+                "mean_wire_bytes": round(self.wire_bytes[name] / count) if count else 0,
+            }
+        total_bytes = sum(self.bytes.values())
+        total_wire_bytes = sum(self.wire_bytes.values())
+        return {
+            "generated_at": datetime.utcnow().isoformat(),
+            "duration_s": round(elapsed, 3),
+            "concurrency": self.concurrency,
+            "total_requests": total_requests,
+            "throughput_rps": round(total_requests / elapsed, 2) if elapsed else 0.0,
+            "error_rate": round(total_errors / total_requests, 4) if total_requests else 0.0,
+            "wire_bytes_ratio": round(total_wire_bytes / total_bytes, 4) if total_bytes else 1.0,
+            "journeys": dict(self.journeys_run),
+            "endpoints": endpoints,
+        }
+
+
+def compare_with_baseline(results, baseline, max_regression, max_error_rate_increase):
+    """Return a list of regressions of results against a stored baseline run"""
+    regressions = []
+    for name, current in results["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(name)
+        if not previous:
+            continue
+        for metric in ("p95_ms", "p99_ms"):
+            if previous[metric] > 0 and current[metric] > previous[metric] * (1 + max_regression):
+                regressions.append(
+                    f"{name}: {metric} {current[metric]}ms vs baseline {previous[metric]}ms"
+                )
+        if current["error_rate"] > previous["error_rate"] + max_error_rate_increase:
+            regressions.append(
+                f"{name}: error rate {current['error_rate']} vs baseline {previous['error_rate']}"
+            )
+    return regressions
+
+
+async def run_load_test(args):
+    headers = {"Accept-Encoding": args.accept_encoding}
+    if args.in_process:
+        # Must be set before server is imported, which opens the database
+        os.environ["DATABASE_NAME"] = args.db_name
+        sys.path.insert(0, BACKEND_DIR)
+        import server
+
+        transport = httpx.ASGITransport(app=server.app)
+        async with server.app.router.lifespan_context(server.app):
+            async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=30, headers=headers) as client:
+                return await LoadTester(client, args.duration, args.concurrency, args.seed).run()
+
+    limits = httpx.Limits(max_connections=args.concurrency * 2)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=30, limits=limits, headers=headers) as client:
+        return await LoadTester(client, args.duration, args.concurrency, args.seed).run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Urevent 360 load test and benchmark harness")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--in-process", action="store_true", help="Drive the FastAPI app in-process via ASGI")
+    target.add_argument("--base-url", default="http://localhost:8001", help="Backend base URL (default: %(default)s)")
+    parser.add_argument("--db-name", default="urevent_loadtest", help="Database for --in-process runs (default: %(default)s)")
+    parser.add_argument("--duration", type=float, default=30, help="Measured run time in seconds")
+    parser.add_argument("--concurrency", type=int, default=10, help="Number of virtual users")
+    parser.add_argument("--accept-encoding", default="gzip, br", help="Accept-Encoding sent with every request (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=360, help="Random seed for journey selection")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--baseline", help="Compare against a stored JSON report")
+    parser.add_argument("--save-baseline", help="Store this run as the new baseline")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed p95/p99 slowdown ratio (default: %(default)s)")
+    parser.add_argument("--max-error-rate-increase", type=float, default=0.01)
+    args = parser.parse_args()
+
+    results = asyncio.run(run_load_test(args))
+    output = json.dumps(results, indent=2)
+    print(output)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            f.write(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(results, baseline, args.max_regression, args.max_error_rate_increase)
+        if regressions:
+            print("\n❌ Performance regressions against baseline:", file=sys.stderr)
+            for regression in regressions:
+                print(f"   {regression}", file=sys.stderr)
+            sys.exit(1)
+        print("\n✅ No regressions against baseline", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
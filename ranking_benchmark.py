@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Vendor Ranking Index Benchmark for Urevent 360
+
+Times the in-memory work behind /api/vendors/search and the marketplace
+against the feature index in backend/vendor_ranking.py:
+
+- full rebuild: FeatureIndex over every vendor (what each write used to cost
+  on the next search, now only paid once per RANKING_INDEX_TTL)
+- patch: rewriting the rows of a handful of written vendors in place
+- candidate lookup: mapping the ids a Mongo filter returned to index rows,
+  old per-id Python loop against the current rows_for()
+- score + top_k: relevance scores for every candidate and the first page
+
+Vendor documents come from the synthetic data generator; no database is
+needed, so the numbers exclude Mongo round trips.
+
+Usage:
+    python ranking_benchmark.py --vendors 10000 100000 --repeat 5
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from argparse import Namespace
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import generate_synthetic_data  # noqa: E402
+import vendor_ranking  # noqa: E402
+
+
+def build_vendors(count):
+    dataset = generate_synthetic_data.Dataset(Namespace(
+        seed=360, users=0, vendors=count, venues=0, events_per_user=0, bookings_per_event=0,
+        messages_per_user=0, availability_days=0, favorites_per_user=0
+    ))
+    vendors = list(generate_synthetic_data.generate_vendors(dataset, random.Random(360), 0, count))
+    fields = vendor_ranking.FEATURE_PROJECTION
+    return [{key: value for key, value in vendor.items() if fields.get(key)} for vendor in vendors]
+
+
+def loop_rows_for(index, ids):
+    """rows_for as it was: one dict lookup and append per id in Python"""
+    rows, unknown = [], []
+    for vendor_id in ids:
+        row = index.row_of.get(vendor_id)
+        if row is None:
+            unknown.append(vendor_id)
+        else:
+            rows.append(row)
+    return np.array(rows, dtype=np.int64), unknown
+
+
+def time_call(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vendor ranking index benchmark")
+    parser.add_argument("--vendors", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--written", type=int, default=10, help="Vendors written between two searches")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(360)
+    context = vendor_ranking.RankingContext(budget_min=500, budget_max=3000, cultural_style="indian",
+                                            latitude=40.7, longitude=-74.0)
+    results = []
+    for count in args.vendors:
+        vendors = build_vendors(count)
+        index = vendor_ranking.FeatureIndex(vendors)
+        ids = [vendor["id"] for vendor in vendors]
+        rng.shuffle(ids)
+
+        written = []
+        for vendor in rng.sample(vendors, min(args.written, count)):
+            written.append({**vendor, "rating": round(rng.uniform(1, 5), 1), "total_reviews": rng.randint(0, 500)})
+        written_ids = [vendor["id"] for vendor in written]
+
+        rows, _ = index.rows_for(ids)
+        timings = {
+            "full_rebuild_ms": time_call(lambda: vendor_ranking.FeatureIndex(vendors), args.repeat),
+            "patch_ms": time_call(lambda: index.patch(written_ids, written), args.repeat),
+            "rows_for_loop_ms": time_call(lambda: loop_rows_for(index, ids), args.repeat),
+            "rows_for_ms": time_call(lambda: index.rows_for(ids), args.repeat),
+            "score_top_k_ms": time_call(
+                lambda: rows[vendor_ranking.top_k(index.score(rows, context), vendor_ranking.PAGE_SIZE)], args.repeat
+            ),
+        }
+        result = {"vendors": count, "written": len(written), **{name: round(seconds * 1000, 3) for name, seconds in timings.items()}}
+        results.append(result)
+        print(f"{count:>7} vendors  rebuild {result['full_rebuild_ms']:8.1f}ms  patch({len(written)}) {result['patch_ms']:6.2f}ms  "
+              f"rows_for loop {result['rows_for_loop_ms']:6.1f}ms -> {result['rows_for_ms']:6.1f}ms  "
+              f"score+top_k {result['score_top_k_ms']:6.1f}ms", file=sys.stderr)
+
+    print(json.dumps({"ranking": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
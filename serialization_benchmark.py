@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Serialization Benchmark for Urevent 360 Read Endpoints
+
+Compares the CPU cost of turning MongoDB documents into the JSON body of
+/api/vendors and /api/events:
+
+- old path: one Pydantic model per document, then FastAPI's response_model
+  validation (serialize_response) and JSONResponse rendering
+- new path: projection-shaped documents encoded by serialization.ModelSerializer
+  (batch TypeAdapter validation for vendors, trusted orjson encoding for events)
+
+Documents come from the synthetic data generator so shapes match production.
+
+The encoded bodies are then run through each response compression setting
+(gzip levels, brotli qualities when brotli is installed) to weigh compression
+CPU time against the bytes it saves.
+
+Usage:
+    python serialization_benchmark.py --sizes 1000 10000 --repeat 5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from argparse import Namespace
+from typing import List
+
+from bson import ObjectId
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+
+import compression  # noqa: E402
+import generate_synthetic_data  # noqa: E402
+from server import Event, Vendor, EVENT_SERIALIZER, VENDOR_SERIALIZER  # noqa: E402
+
+
+def build_documents(kind, count):
+    dataset = generate_synthetic_data.Dataset(Namespace(
+        seed=360, users=count, vendors=count, venues=0, events_per_user=1, bookings_per_event=1,
+        messages_per_user=0, availability_days=0, favorites_per_user=0
+    ))
+    generator = generate_synthetic_data.GENERATORS[kind]
+    documents = list(generator(dataset, random.Random(360), 0, count))
+    for document in documents:
+        document["_id"] = ObjectId()
+    return documents
+
+
+def project(documents, serializer):
+    """What Mongo returns for the serializer's projection"""
+    return [{key: value for key, value in document.items() if key in serializer.projection} for document in documents]
+
+
+async def old_path(model, documents):
+    field = create_response_field(name=f"Response_{model.__name__}", type_=List[model])
+    models = [model(**document) for document in documents]
+    content = await serialize_response(field=field, response_content=models)
+    return JSONResponse(content).body
+
+
+def compression_settings():
+    settings = [("gzip", compression.Settings(gzip_level=level)) for level in (1, 5, 9)]
+    if compression.brotli is not None:
+        settings += [("br", compression.Settings(brotli_quality=quality)) for quality in (1, 4, 6)]
+    return settings
+
+
+def time_call(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = function()
+        timings.append(time.perf_counter() - start)
+    return min(timings), len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Old vs new serialization path benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    cases = [
+        ("/api/vendors", "vendors", Vendor, VENDOR_SERIALIZER, False),
+        ("/api/events", "events", Event, EVENT_SERIALIZER, True),
+    ]
+    results = []
+    compression_results = []
+    for endpoint, kind, model, serializer, trusted in cases:
+        for size in args.sizes:
+            documents = build_documents(kind, size)
+            projected = project(documents, serializer)
+            old_seconds, old_bytes = time_call(lambda: asyncio.run(old_path(model, documents)), args.repeat)
+            new_seconds, new_bytes = time_call(lambda: serializer.dump_many(projected, trusted=trusted), args.repeat)
+            results.append({
+                "endpoint": endpoint,
+                "rows": size,
+                "old_ms": round(old_seconds * 1000, 2),
+                "new_ms": round(new_seconds * 1000, 2),
+                "speedup": round(old_seconds / new_seconds, 1),
+                "old_bytes": old_bytes,
+                "new_bytes": new_bytes,
+            })
+            print(f"{endpoint:14} {size:>6} rows  old {old_seconds * 1000:8.1f}ms  new {new_seconds * 1000:7.1f}ms  "
+                  f"x{old_seconds / new_seconds:.1f}", file=sys.stderr)
+
+            body = serializer.dump_many(projected, trusted=trusted)
+            for encoding, settings in compression_settings():
+                level = settings.gzip_level if encoding == "gzip" else settings.brotli_quality
+                seconds, compressed_bytes = time_call(lambda: compression.compress(body, encoding, settings), args.repeat)
+                saved_kb = (len(body) - compressed_bytes) / 1024
+                compression_results.append({
+                    "endpoint": endpoint,
+                    "rows": size,
+                    "encoding": f"{encoding}-{level}",
+                    "compress_ms": round(seconds * 1000, 2),
+                    "bytes": len(body),
+                    "compressed_bytes": compressed_bytes,
+                    "ratio": round(compressed_bytes / len(body), 4),
+                    "kb_saved_per_cpu_ms": round(saved_kb / (seconds * 1000), 1),
+                })
+                print(f"{endpoint:14} {size:>6} rows  {encoding + '-' + str(level):7} {seconds * 1000:7.1f}ms  "
+                      f"{len(body):>9} -> {compressed_bytes:>8} bytes", file=sys.stderr)
+
+    print(json.dumps({"serialization": results, "compression": compression_results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Typeahead Benchmark for Urevent 360 /api/suggest
+
+Times the in-memory suggestion index in backend/suggest.py over synthetic
+vendors:
+
+- build: filing every vendor and sorting the keys once
+- lookup: an uncached prefix lookup (1 to 4 characters, the costliest case
+  being one letter, whose key range spans a large part of the index)
+- refresh: re-filing one written vendor, against the previous approach of
+  shifting the weight and type arrays with np.insert/np.delete per key
+- compact: merging MERGE_THRESHOLD pending entries and tombstones back into
+  the arrays, paid once per that many filed entries
+
+Vendor documents come from the synthetic data generator; no database is
+needed.
+
+Usage:
+    python suggest_benchmark.py --vendors 10000 100000 --repeat 5
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from argparse import Namespace
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import generate_synthetic_data  # noqa: E402
+import suggest  # noqa: E402
+
+PREFIXES = ["s", "ca", "new", "phot", "1"]
+
+
+def build_vendors(count):
+    dataset = generate_synthetic_data.Dataset(Namespace(
+        seed=360, users=0, vendors=count, venues=0, events_per_user=0, bookings_per_event=0,
+        messages_per_user=0, availability_days=0, favorites_per_user=0
+    ))
+    return list(generate_synthetic_data.generate_vendors(dataset, random.Random(360), 0, count))
+
+
+def build_index(vendors):
+    index = suggest.SuggestIndex()
+    for vendor in vendors:
+        index._add_document("vendor", vendor)
+    index._arrange(index._keys)
+    index._built = True
+    return index
+
+
+def array_shift(index, keys_per_vendor):
+    """What re-filing one vendor cost before: an insert and a delete per key"""
+    weights, types = index._weights, index._types
+    for _ in range(keys_per_vendor):
+        position = len(weights) // 2
+        weights = np.delete(np.insert(weights, position, 1.0), position)
+        types = np.delete(np.insert(types, position, 0), position)
+
+
+def time_call(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suggestion index benchmark")
+    parser.add_argument("--vendors", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--limit", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(360)
+    results = []
+    for count in args.vendors:
+        vendors = build_vendors(count)
+        build_seconds = time_call(lambda: build_index(vendors), 1)
+        index = build_index(vendors)
+
+        lookups = {
+            prefix: round(time_call(lambda: index._lookup(prefix, args.limit, suggest.TYPES), args.repeat) * 1000, 3)
+            for prefix in PREFIXES
+        }
+
+        def refresh():
+            vendor = rng.choice(vendors)
+            index._add_document("vendor", {**vendor, "rating": round(rng.uniform(1, 5), 1)})
+            index._compact_if_needed()
+
+        keys_per_vendor = round(len(index._keys) / max(len(vendors), 1))
+        threshold = suggest.MERGE_THRESHOLD
+        suggest.MERGE_THRESHOLD = float("inf")
+        while len(index._pending) + index._dead < threshold:
+            vendor = rng.choice(vendors)
+            index._add_document("vendor", {**vendor, "name": f"{vendor['name']} {rng.randrange(1000)}"})
+        suggest.MERGE_THRESHOLD = threshold
+        compact_seconds = time_call(index._compact_if_needed, 1)
+
+        result = {
+            "vendors": count,
+            "keys": len(index._keys),
+            "build_ms": round(build_seconds * 1000, 1),
+            "lookup_ms": lookups,
+            "refresh_ms": round(time_call(refresh, args.repeat) * 1000, 3),
+            "array_shift_refresh_ms": round(time_call(lambda: array_shift(index, keys_per_vendor), args.repeat) * 1000, 3),
+            "compact_ms": round(compact_seconds * 1000, 1),
+        }
+        results.append(result)
+        print(f"{count:>7} vendors  {result['keys']:>7} keys  build {result['build_ms']:8.1f}ms  "
+              f"lookup max {max(lookups.values()):6.3f}ms  refresh {result['refresh_ms']:6.3f}ms "
+              f"(array shift {result['array_shift_refresh_ms']:6.3f}ms)  compact {result['compact_ms']:6.1f}ms", file=sys.stderr)
+
+    print(json.dumps({"suggest": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import os
+import sys
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def db():
+    return AsyncMongoMockClient()["urevent_test"]
+
+
+@pytest.fixture
+def api(db, monkeypatch):
+    """A TestClient for the API on the mock database, with fresh in-process caches and indexes"""
+    from fastapi.testclient import TestClient
+
+    import admin_routes
+    import deps
+    import response_cache
+    import server
+    import suggest
+    import text_search
+    import vendor_blocks
+    import vendor_favorites
+    import vendor_ranking
+    import vendor_subscription_routes
+
+    for module in (deps, server, admin_routes, vendor_subscription_routes):
+        monkeypatch.setattr(module, "db", db)
+    monkeypatch.setattr(vendor_ranking, "ranker", vendor_ranking.VendorRanking())
+    monkeypatch.setattr(suggest, "index", suggest.SuggestIndex())
+    monkeypatch.setattr(text_search, "vendor_index", text_search.SearchIndex("vendors", text_search.VENDOR_FIELDS))
+    monkeypatch.setattr(vendor_blocks, "blocks", vendor_blocks.BlockList())
+    monkeypatch.setattr(vendor_favorites, "favorites", vendor_favorites.Favorites())
+    response_cache.catalog_cache.clear()
+    return TestClient(server.app)
+
+
+def sign_in(api, email="client@example.com", role="client"):
+    """Register a user and return the Authorization header for them"""
+    response = api.post("/api/register", json={"name": "Test User", "email": email, "password": "secret123", "role": role})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
@@ -0,0 +1,16 @@
+import vendor_subscription_routes
+from response_cache import catalog_cache
+
+
+def test_revalidation_uses_the_etag_not_the_second(api, monkeypatch):
+    first = api.get("/api/vendor/plans")
+    # A write within the same second as the cached response
+    monkeypatch.setitem(vendor_subscription_routes.SUBSCRIPTION_PLANS, "basic", {"monthly_fee": 89.0, "features": []})
+    catalog_cache.invalidate("plans")
+
+    changed = api.get("/api/vendor/plans", headers={"If-Modified-Since": first.headers["Last-Modified"]})
+    assert changed.status_code == 200
+    assert changed.json()["basic"]["monthly_fee"] == 89.0
+    assert changed.headers["ETag"] != first.headers["ETag"]
+
+    assert api.get("/api/vendor/plans", headers={"If-None-Match": changed.headers["ETag"]}).status_code == 304
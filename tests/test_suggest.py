@@ -0,0 +1,81 @@
+import random
+
+import pytest
+
+import suggest
+from suggest import SuggestIndex, normalize
+
+pytestmark = pytest.mark.anyio
+
+VENDORS = [
+    {"id": "v1", "name": "Sunset Photography", "location": "Austin, TX 78701", "rating": 4.8, "total_reviews": 120},
+    {"id": "v2", "name": "Sunrise Catering", "location": "Austin, TX 78702", "rating": 3.0},
+    {"id": "v3", "name": "Golden Sun Events", "location": "Dallas, TX", "rating": 4.0},
+]
+
+
+@pytest.fixture
+async def index(db):
+    await db.vendors.insert_many([dict(vendor) for vendor in VENDORS])
+    await db.venues.insert_one({"id": "h1", "name": "Sundance Hall", "location": "Austin, TX"})
+    return SuggestIndex()
+
+
+def ids(suggestions):
+    return [suggestion.get("id") or suggestion["text"] for suggestion in suggestions]
+
+
+def test_normalize_folds_case_accents_and_punctuation():
+    assert normalize("  Café-Bar & Grill ") == "cafe bar grill"
+
+
+async def test_prefix_matches_any_name_word_by_weight(db, index):
+    suggestions = await index.suggest(db, "sun", 10)
+
+    assert ids(suggestions) == ["v1", "v3", "v2", "h1"]
+
+
+async def test_places_and_types(db, index):
+    assert ids(await index.suggest(db, "aus", 5)) == ["Austin"]
+    assert ids(await index.suggest(db, "787", 5)) == ["78701", "78702"]
+    assert ids(await index.suggest(db, "sun", 5, ("venue",))) == ["h1"]
+
+
+async def test_exclude_drops_vendors(db, index):
+    assert ids(await index.suggest(db, "sun", 10, exclude={"v1"})) == ["v3", "v2", "h1"]
+
+
+async def test_refresh_refiles_renamed_and_deleted_documents(db, index):
+    await index.suggest(db, "sun", 10)
+    await db.vendors.update_one({"id": "v2"}, {"$set": {"name": "Moonrise Catering"}})
+    await db.vendors.delete_one({"id": "v3"})
+
+    await index.refresh(db, "vendors", "v2", "v3")
+
+    assert ids(await index.suggest(db, "sun", 10)) == ["v1", "h1"]
+    assert ids(await index.suggest(db, "moon", 10)) == ["v2"]
+
+
+async def test_reweigh_reorders_cached_prefixes(db, index):
+    assert ids(await index.suggest(db, "sun", 10))[:2] == ["v1", "v3"]
+    await db.vendors.update_one({"id": "v3"}, {"$set": {"rating": 5.0, "total_reviews": 500, "favorite_count": 90}})
+
+    await index.reweigh(db, "v3")
+
+    assert ids(await index.suggest(db, "sun", 10))[:2] == ["v3", "v1"]
+
+
+async def test_pending_entries_match_a_fresh_index(db, index, monkeypatch):
+    monkeypatch.setattr(suggest, "MERGE_THRESHOLD", 50)
+    rng = random.Random(7)
+    words = ["sun", "sunny", "star", "stone", "river", "rose"]
+    await index.suggest(db, "s", 5)
+    for step in range(120):
+        vendor_id = f"n{rng.randrange(40)}"
+        name = " ".join(rng.sample(words, 2))
+        await db.vendors.update_one({"id": vendor_id}, {"$set": {"name": name, "rating": rng.uniform(1, 5)}}, upsert=True)
+        await index.refresh(db, "vendors", vendor_id)
+
+    fresh = SuggestIndex()
+    for prefix in ("s", "su", "st", "r", "ro", "sunny s"):
+        assert ids(await index.suggest(db, prefix, 8)) == ids(await fresh.suggest(db, prefix, 8))
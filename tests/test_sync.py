@@ -0,0 +1,94 @@
+import pytest
+
+import sync
+
+pytestmark = pytest.mark.anyio
+
+USER = {"id": "user-1"}
+
+
+async def insert_event(db, event_id, user_id="user-1"):
+    await db.events.insert_one({"id": event_id, "user_id": user_id, "name": event_id, "version": sync.next_version()})
+
+
+def test_versions_only_increase():
+    versions = [sync.next_version() for _ in range(1000)]
+    assert versions == sorted(set(versions))
+
+
+def test_cursor_round_trip():
+    assert sync.decode_cursor(sync.encode_cursor(1234567)) == 1234567
+    assert sync.decode_cursor(None) == 0
+    with pytest.raises(sync.HTTPException) as error:
+        sync.decode_cursor("not-hex")
+    assert error.value.status_code == 400
+
+
+async def test_first_sync_is_a_full_snapshot(db):
+    await insert_event(db, "e1")
+    await db.events.insert_one({"id": "legacy", "user_id": "user-1"})  # written before versions existed
+    await insert_event(db, "other", user_id="user-2")
+
+    result = await sync.collect(db, USER, None)
+
+    assert sorted(event["id"] for event in result["changes"]["events"]) == ["e1", "legacy"]
+    assert result["deleted"] == {}
+    # No cursor reads as one too old to continue, so the client replaces its state
+    assert result["reset"] and not result["has_more"]
+
+
+async def test_later_sync_returns_changes_and_tombstones(db, monkeypatch):
+    monkeypatch.setattr(sync, "OVERLAP_MS", 0)
+    await insert_event(db, "e1")
+    await insert_event(db, "e2")
+    cursor = (await sync.collect(db, USER, None))["cursor"]
+
+    await insert_event(db, "e3")
+    await db.events.update_one({"id": "e1"}, {"$set": {"name": "renamed", **sync.stamp()}})
+    assert await sync.delete_with_tombstones(db, "events", {"id": "e2"}, "user-1") == 1
+
+    result = await sync.collect(db, USER, cursor)
+
+    assert [event["id"] for event in result["changes"]["events"]] == ["e3", "e1"]
+    assert result["deleted"] == {"events": ["e2"]}
+
+
+async def test_cursor_trails_the_clock_by_the_overlap(db, monkeypatch):
+    monkeypatch.setattr(sync, "OVERLAP_MS", 60000)
+    cursor = (await sync.collect(db, USER, None))["cursor"]
+    await insert_event(db, "e1")
+
+    first = await sync.collect(db, USER, cursor)
+    second = await sync.collect(db, USER, first["cursor"])
+
+    # A write inside the window is sent again rather than risk missing a late commit
+    assert [event["id"] for event in first["changes"]["events"]] == ["e1"]
+    assert [event["id"] for event in second["changes"]["events"]] == ["e1"]
+
+
+async def test_full_page_resumes_from_its_last_version(db, monkeypatch):
+    monkeypatch.setattr(sync, "OVERLAP_MS", 0)
+    monkeypatch.setattr(sync, "MAX_CHANGES", 2)
+    cursor = (await sync.collect(db, USER, None))["cursor"]
+    for event_id in ("e1", "e2", "e3"):
+        await insert_event(db, event_id)
+
+    seen = []
+    for _ in range(3):
+        result = await sync.collect(db, USER, cursor)
+        seen.extend(event["id"] for event in result["changes"]["events"])
+        cursor = result["cursor"]
+        if not result["has_more"]:
+            break
+
+    assert not result["has_more"]
+    assert set(seen) == {"e1", "e2", "e3"}
+
+
+async def test_cursor_older_than_tombstones_resets(db):
+    await insert_event(db, "e1")
+
+    result = await sync.collect(db, USER, sync.encode_cursor(1))
+
+    assert result["reset"]
+    assert [event["id"] for event in result["changes"]["events"]] == ["e1"]
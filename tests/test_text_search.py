@@ -0,0 +1,74 @@
+import math
+
+import pytest
+
+import text_search
+from text_search import B, K1, SearchIndex, stem, tokenize
+
+pytestmark = pytest.mark.anyio
+
+VENDORS = [
+    {"id": "photo", "name": "Lens Photography", "service_type": "photography", "description": "Wedding photos"},
+    {"id": "cater", "name": "Spice Kitchen", "service_type": "catering", "description": "Indian catering for weddings"},
+    {"id": "flowers", "name": "Bloom", "service_type": "decoration", "description": "Flowers and catering tables"},
+]
+
+
+@pytest.fixture
+async def index(db):
+    await db.vendors.insert_many([dict(vendor) for vendor in VENDORS])
+    return SearchIndex("vendors", text_search.VENDOR_FIELDS)
+
+
+def test_tokenize_drops_stop_words_and_stems():
+    assert tokenize("The Weddings and Catering") == ["wedd", "cater"]
+    assert stem("photos") == "photo"
+    assert stem("bus") == "bus"
+
+
+async def test_scores_follow_bm25(db, index):
+    scores = await index.search(db, "catering")
+
+    # Both mention catering once per field; the service_type field weighs more
+    assert set(scores) == {"cater", "flowers"}
+    assert scores["cater"] > scores["flowers"]
+
+    lengths = {vendor["id"]: sum(index._weighted_terms(vendor).values()) for vendor in VENDORS}
+    average = sum(lengths.values()) / len(lengths)
+    frequency = index._weighted_terms(VENDORS[1])["cater"]
+    idf = (K1 + 1.0) * math.log(1.0 + (3 - 2 + 0.5) / (2 + 0.5))
+    expected = idf * frequency / (frequency + K1 * (1.0 - B + B * lengths["cater"] / average))
+    assert scores["cater"] == pytest.approx(expected)
+
+
+async def test_rarer_terms_weigh_more(db, index):
+    scores = await index.search(db, "indian weddings")
+
+    assert max(scores, key=scores.get) == "cater"
+
+
+async def test_fuzzy_match_within_one_edit(db, index):
+    exact = await index.search(db, "photography")
+    typo = await index.search(db, "photogarphy")
+
+    assert list(typo) == ["photo"]
+    assert typo["photo"] == pytest.approx(exact["photo"] * text_search.FUZZY_WEIGHT)
+    # Short tokens are not expanded
+    assert await index.search(db, "lns") == {}
+
+
+async def test_limit_keeps_the_best_matches(db, index):
+    scores = await index.search(db, "catering", limit=1)
+
+    assert list(scores) == ["cater"]
+
+
+async def test_refresh_reindexes_and_drops_deleted_documents(db, index):
+    await index.search(db, "catering")
+    await db.vendors.update_one({"id": "photo"}, {"$set": {"description": "Catering photos"}})
+    await db.vendors.delete_one({"id": "flowers"})
+
+    await index.refresh(db, "photo", "flowers")
+
+    assert set(await index.search(db, "catering")) == {"cater", "photo"}
+    assert len(index) == 2
@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import user_directory
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_page_leaves_out_credentials(db):
+    created = datetime(2026, 1, 1)
+    await db.users.insert_many([
+        {"id": "seeded", "name": "Admin", "email": "admin@example.com", "role": "admin",
+         "hashed_password": "$2b$12$seeded", "created_at": created},
+        {"id": "registered", "name": "Asha", "email": "asha@example.com", "role": "client", "is_active": True,
+         "password_hash": "$2b$12$registered", "backup_codes": ["123456"], "created_at": created + timedelta(days=1)},
+    ])
+    await user_directory.ensure_indexes(db)
+
+    result = await user_directory.page(db, limit=10)
+
+    assert [user["id"] for user in result["users"]] == ["registered", "seeded"]
+    for user in result["users"]:
+        assert not {"hashed_password", "password_hash", "backup_codes", "name_lower", "email_lower", "_id"} & set(user)
+    assert result["users"][0]["email"] == "asha@example.com"
+
+
+async def test_cursor_pages_through_every_user(db):
+    start = datetime(2026, 1, 1)
+    await db.users.insert_many([
+        {"id": f"user-{index:02d}", "name": f"User {index}", "email": f"user{index}@example.com",
+         "created_at": start + timedelta(minutes=index)}
+        for index in range(25)
+    ])
+
+    seen, cursor = [], None
+    while True:
+        result = await user_directory.page(db, limit=10, cursor=cursor)
+        seen.extend(user["id"] for user in result["users"])
+        cursor = result["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == [f"user-{index:02d}" for index in reversed(range(25))]
@@ -0,0 +1,49 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import vendor_favorites
+from vendor_favorites import Favorites
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def vendors(db):
+    await db.vendors.insert_many([{"id": "v1", "name": "One", "favorite_count": 0}, {"id": "v2", "name": "Two", "favorite_count": 0}])
+    await vendor_favorites.ensure_indexes(db)
+
+
+async def test_toggle_counts_and_refreshes_the_cached_set(db, vendors):
+    favorites = Favorites()
+    assert await favorites.ids(db, "user-1") == frozenset()
+
+    assert await favorites.toggle(db, "user-1", "v1") is True
+    assert await favorites.ids(db, "user-1") == {"v1"}
+    assert await favorites.toggle(db, "user-1", "v1") is False
+    assert await favorites.ids(db, "user-1") == frozenset()
+    assert (await db.vendors.find_one({"id": "v1"}))["favorite_count"] == 0
+
+
+async def test_toggle_of_a_missing_vendor_is_undone(db, vendors):
+    favorites = Favorites()
+
+    with pytest.raises(vendor_favorites.HTTPException) as error:
+        await favorites.toggle(db, "user-1", "missing")
+
+    assert error.value.status_code == 404
+    assert await db.vendor_favorites.count_documents({}) == 0
+
+
+async def test_cached_set_expires(db, vendors, monkeypatch):
+    favorites = Favorites()
+    assert await favorites.ids(db, "user-1") == frozenset()
+    # A toggle through another worker's cache
+    await Favorites().toggle(db, "user-1", "v2")
+    assert await favorites.ids(db, "user-1") == frozenset()
+
+    later = time.monotonic() + vendor_favorites.CACHE_TTL_SECONDS + 1
+    monkeypatch.setattr(vendor_favorites, "time", SimpleNamespace(monotonic=lambda: later))
+
+    assert await favorites.ids(db, "user-1") == {"v2"}
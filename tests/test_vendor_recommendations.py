@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+import vendor_recommendations
+from vendor_recommendations import build_matrix, cooccurrence
+
+
+def dense_cosine(users, vendors, weights, user_count, vendor_count):
+    matrix = np.zeros((user_count, vendor_count))
+    np.add.at(matrix, (users, vendors), weights)
+    norms = np.linalg.norm(matrix, axis=0)
+    similarity = (matrix.T @ matrix) / np.outer(norms, norms)
+    np.fill_diagonal(similarity, 0.0)
+    return similarity
+
+
+def test_cooccurrence_matches_dense_cosine():
+    rng = np.random.default_rng(360)
+    users = rng.integers(0, 40, 400)
+    vendors = rng.integers(0, 25, 400)
+    weights = rng.choice([1.0, 2.0], 400)
+
+    indptr, indices, scores = cooccurrence(users, vendors, weights, 25)
+
+    expected = dense_cosine(users, vendors, weights, 40, 25)
+    for row in range(25):
+        columns = indices[indptr[row]:indptr[row + 1]]
+        found = dict(zip(columns.tolist(), scores[indptr[row]:indptr[row + 1]].tolist()))
+        assert found == pytest.approx({column: expected[row, column] for column in np.flatnonzero(expected[row])}, rel=1e-5)
+        assert list(scores[indptr[row]:indptr[row + 1]]) == sorted(found.values(), reverse=True)
+
+
+def test_cooccurrence_keeps_the_top_neighbors_per_row():
+    users = np.array([0, 0, 0, 1, 1, 2, 2])
+    vendors = np.array([0, 1, 2, 0, 1, 0, 3])
+    weights = np.ones(7)
+
+    indptr, indices, scores = cooccurrence(users, vendors, weights, 4, neighbors=1)
+
+    # Vendor 0 co-occurs with 1 twice and with 2 and 3 once each
+    assert indices[indptr[0]:indptr[1]].tolist() == [1]
+    assert np.all(np.diff(indptr) <= 1)
+
+
+def test_cooccurrence_without_pairs():
+    indptr, indices, scores = cooccurrence(np.array([0, 1]), np.array([0, 1]), np.ones(2), 2)
+
+    assert indptr.tolist() == [0, 0, 0]
+    assert len(indices) == len(scores) == 0
+
+
+def test_cooccurrence_caps_items_per_user(monkeypatch):
+    monkeypatch.setattr(vendor_recommendations, "MAX_ITEMS_PER_USER", 2)
+    # The lightest interaction of user 0 falls outside its top two
+    users = np.array([0, 0, 0])
+    vendors = np.array([0, 1, 2])
+    weights = np.array([3.0, 2.0, 1.0])
+
+    indptr, indices, _ = cooccurrence(users, vendors, weights, 3)
+
+    assert indices[indptr[2]:indptr[3]].tolist() == []
+    assert indices[indptr[0]:indptr[1]].tolist() == [1]
+
+
+def test_recommend_skips_excluded_and_seen_vendors():
+    matrix = build_matrix(
+        ["u1", "u1", "u2", "u2", "u3", "u3"],
+        ["a", "b", "a", "c", "b", "c"],
+        [1.0, 1.0, 1.0, 1.0, 1.0, 1.0],
+    )
+
+    picked = matrix.recommend({"a": 1.0}, exclude={"a", "b"}, limit=5)
+
+    assert [vendor_id for vendor_id, _ in picked] == ["c"]
+    assert matrix.recommend({"unknown": 1.0}, exclude=set(), limit=5) == []
@@ -0,0 +1,76 @@
+import pytest
+
+import vendor_reviews
+from vendor_reviews import PRIOR_MEAN, smoothed_rating
+
+pytestmark = pytest.mark.anyio
+
+USER = {"id": "user-1", "name": "Asha"}
+
+
+def test_smoothed_rating_without_reviews_is_the_prior():
+    assert smoothed_rating(0, 0) == PRIOR_MEAN
+    assert smoothed_rating(0, 0, prior_rating=4.5, prior_reviews=40) == 4.5
+
+
+def test_smoothed_rating_pulls_few_reviews_towards_the_prior():
+    one_five_star = smoothed_rating(5, 1)
+    many_high = smoothed_rating(4.8 * 200, 200)
+    assert PRIOR_MEAN < one_five_star < many_high < 4.8
+
+
+async def test_first_review_keeps_an_existing_rating(db):
+    await db.vendors.insert_many([
+        {"id": "rated", "name": "Rated", "rating": 4.5, "total_reviews": 40},
+        {"id": "uncounted", "name": "Uncounted", "rating": 4.5},
+        {"id": "new", "name": "New"},
+    ])
+    await vendor_reviews.ensure_indexes(db)
+
+    for vendor_id in ("rated", "uncounted", "new"):
+        await vendor_reviews.create(db, USER, vendor_id, 5, "Great", None)
+    vendors = {vendor["id"]: vendor async for vendor in db.vendors.find({}, {"_id": 0})}
+
+    assert vendors["rated"]["rating"] == smoothed_rating(5, 1, 4.5, 40)
+    assert 4.5 < vendors["rated"]["rating"] < 4.55
+    assert vendors["rated"]["total_reviews"] == 41
+    assert vendors["uncounted"]["rating"] == smoothed_rating(5, 1, 4.5)
+    assert vendors["uncounted"]["total_reviews"] == 1
+    assert vendors["new"]["rating"] == smoothed_rating(5, 1)
+
+
+async def test_review_of_a_vendor_created_after_startup_keeps_its_rating(db):
+    await vendor_reviews.ensure_indexes(db)
+    await db.vendors.insert_one({"id": "late", "name": "Late", "rating": 4.5, "total_reviews": 40})
+
+    await vendor_reviews.create(db, USER, "late", 5, "Great", None)
+
+    vendor = await db.vendors.find_one({"id": "late"})
+    assert vendor["rating"] == smoothed_rating(5, 1, 4.5, 40)
+
+
+async def test_reconcile_keeps_the_prior(db):
+    await db.vendors.insert_one({"id": "rated", "name": "Rated", "rating": 4.5, "total_reviews": 40})
+    await vendor_reviews.ensure_indexes(db)
+    await vendor_reviews.create(db, USER, "rated", 5, "Great", None)
+    # An aggregate drifted, e.g. by a write that raced a crash
+    await db.vendors.update_one({"id": "rated"}, {"$set": {"rating_sum": 9, "review_count": 2, "rating": 1.0}})
+
+    assert await vendor_reviews.reconcile(db) == 1
+
+    vendor = await db.vendors.find_one({"id": "rated"})
+    assert (vendor["rating_sum"], vendor["review_count"], vendor["total_reviews"]) == (5, 1, 41)
+    assert vendor["rating"] == smoothed_rating(5, 1, 4.5, 40)
+    assert await vendor_reviews.reconcile(db) == 0
+
+
+async def test_listing_shows_the_reviewer_by_name_only(db):
+    await db.vendors.insert_one({"id": "v1", "name": "One"})
+    await db.events.insert_one({"id": "event-1", "user_id": USER["id"]})
+    await vendor_reviews.ensure_indexes(db)
+    await vendor_reviews.create(db, USER, "v1", 4, "Good", "event-1")
+
+    [review] = (await vendor_reviews.page(db, "v1", 10))["reviews"]
+
+    assert review["user_name"] == "Asha"
+    assert "user_id" not in review and "event_id" not in review
@@ -0,0 +1,75 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from tests.conftest import sign_in
+
+VENDORS = [
+    {"id": "photo", "name": "Lens Studio", "service_type": "Photography", "description": "Photos", "location": "Austin, TX",
+     "price_range": "$$", "base_price": 2000.0, "rating": 4.5, "subscription_status": "active"},
+    {"id": "cater", "name": "Spice Kitchen", "service_type": "Catering", "description": "Food", "location": "Austin, TX",
+     "price_range": "$$", "base_price": 2000.0, "rating": 4.5, "subscription_status": "active"},
+]
+
+
+@pytest.fixture
+def planned_event(api, db):
+    headers = sign_in(api)
+    user_id = api.get("/api/users/profile", headers=headers).json()["id"]
+    asyncio.run(db.vendors.insert_many([dict(vendor) for vendor in VENDORS]))
+    asyncio.run(db.events.insert_one({
+        "id": "event-1", "user_id": user_id, "name": "Wedding", "event_type": "wedding", "date": datetime(2027, 6, 1),
+        "location": "Austin, TX", "budget": 20000.0, "guest_count": 100, "services_needed": ["photography"],
+        "status": "planning", "created_at": datetime(2026, 1, 1),
+    }))
+    return headers
+
+
+def ids(response):
+    assert response.status_code == 200, response.text
+    return [vendor["id"] for vendor in response.json()]
+
+
+def test_public_search_prefers_the_events_services_over_service_type(api, planned_event):
+    response = api.get("/api/vendors/search", params={"event_id": "event-1", "service_type": "catering"}, headers=planned_event)
+
+    assert ids(response) == ["photo"]
+
+
+def test_public_search_services_needed_wins(api, planned_event):
+    response = api.get("/api/vendors/search", params={"event_id": "event-1", "services_needed": "catering"}, headers=planned_event)
+
+    assert ids(response) == ["cater"]
+
+
+def test_public_search_service_type_without_event(api, planned_event):
+    assert ids(api.get("/api/vendors/search", params={"service_type": "catering"}, headers=planned_event)) == ["cater"]
+
+
+def test_planner_step_lists_only_its_service(api, planned_event):
+    response = api.get("/api/events/event-1/planner/vendors/catering", headers=planned_event)
+
+    assert ids(response) == ["cater"]
+
+
+def marketplace_vendor(vendor_id):
+    return {
+        "id": vendor_id, "business_name": vendor_id.title(), "owner_name": "Owner", "email": f"{vendor_id}@example.com",
+        "mobile": "5550100", "business_type": "LLC", "service_category": "photography", "address": "1 Main St",
+        "city": "Austin", "state": "TX", "description": "Photos", "price_range": {"min": 1000.0, "max": 3000.0},
+        "rating": 4.5, "status": "active", "subscription_status": "active", "subscription_plan": "basic",
+        "created_at": datetime(2026, 1, 1),
+    }
+
+
+def test_marketplace_hides_vendors_the_user_blocked(api, db):
+    headers = sign_in(api)
+    asyncio.run(db.vendors.insert_many([marketplace_vendor("north"), marketplace_vendor("south")]))
+    asyncio.run(db.vendor_subscriptions.insert_many([
+        {"vendor_id": vendor_id, "status": "active", "next_billing_date": datetime(2099, 1, 1)} for vendor_id in ("north", "south")
+    ]))
+    assert api.post("/api/users/blocked-vendors", json={"vendor_id": "south"}, headers=headers).status_code == 200
+
+    assert ids(api.get("/api/vendor/marketplace", headers=headers)) == ["north"]
+    assert sorted(ids(api.get("/api/vendor/marketplace"))) == ["north", "south"]
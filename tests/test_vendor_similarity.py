@@ -0,0 +1,68 @@
+import numpy as np
+
+import vendor_similarity
+from vendor_similarity import nearest, neighbor_list, price_band, vectorize
+
+VENDORS = [
+    {"id": "a", "service_type": "photography", "specialties": ["weddings"], "price_range": "$$"},
+    {"id": "b", "service_type": "photography", "specialties": ["weddings"], "price_range": "$$$"},
+    {"id": "c", "service_type": "photography", "specialties": ["corporate"], "price_range": "$$"},
+    {"id": "d", "service_type": "catering", "cultural_specializations": ["indian"], "base_price": 800},
+]
+
+
+def brute_force(vectors, k):
+    similarity = vectors @ vectors.T
+    np.fill_diagonal(similarity, -np.inf)
+    return np.argsort(-similarity, axis=1, kind="stable")[:, :k]
+
+
+def test_price_band_from_range_or_price():
+    assert price_band({"price_range": "$$$"}) == "$$$"
+    assert price_band({"base_price": 800}) == "$$"
+    assert price_band({"price_per_person": 9000}) == "$$$$"
+    assert price_band({}) == ""
+
+
+def test_vectors_are_unit_length():
+    vectors = vectorize(VENDORS)
+
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0, atol=1e-6)
+
+
+def test_nearest_excludes_self_and_orders_by_cosine():
+    vectors = vectorize(VENDORS)
+
+    indices, scores = nearest(vectors, np.arange(len(VENDORS)), vectors, 2)
+
+    assert indices[0].tolist() == [1, 2]
+    assert all(row not in indices[row] for row in range(len(VENDORS)))
+    assert np.all(np.diff(scores, axis=1) <= 0)
+
+
+def test_nearest_matches_brute_force_across_blocks(monkeypatch):
+    monkeypatch.setattr(vendor_similarity, "BLOCK_ROWS", 7)
+    rng = np.random.default_rng(360)
+    vectors = rng.standard_normal((50, 16)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    indices, scores = nearest(vectors, np.arange(50), vectors, 5)
+
+    assert indices.tolist() == brute_force(vectors, 5).tolist()
+    assert np.allclose(scores, np.take_along_axis(vectors @ vectors.T, indices, axis=1))
+
+
+def test_nearest_with_fewer_vendors_than_k():
+    vectors = vectorize(VENDORS[:1])
+
+    indices, scores = nearest(vectors, np.arange(1), vectors, 5)
+
+    assert indices.shape == scores.shape == (1, 0)
+
+
+def test_neighbor_list_drops_unrelated_vendors():
+    ids = ["a", "b", "c"]
+
+    neighbors = neighbor_list(ids, np.array([2, 0, 1]), np.array([0.51234, 0.0, -0.1], dtype=np.float32))
+
+    assert neighbors == [{"vendor_id": "c", "score": 0.5123}]